@@ -4,6 +4,7 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.models import User
+from templates_app.analysis import get_palette
 from .models import BrandProfile, ServiceCatalog
 from .serializers import (
     UserRegistrationSerializer, BrandProfileSerializer, 
@@ -169,6 +170,18 @@ def upload_logo(request):
         profile.logo = request.FILES['logo']
         profile.color_source = 'logo'
         profile.save()
+
+        # Derive the brand colors from the logo; keep the old ones if the
+        # image can't be read
+        try:
+            roles = get_palette(profile.logo)['roles']
+        except Exception as e:
+            print(f"Warning: could not extract logo colors: {e}")
+            roles = {}
+        if roles:
+            for field, value in roles.items():
+                setattr(profile, field, value)
+            profile.save(update_fields=list(roles))
         
         serializer = BrandProfileSerializer(profile)
         return Response(serializer.data)
@@ -69,6 +69,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Conversion workers write from several processes at once; take
+            # the write lock when a transaction starts and wait for it,
+            # instead of failing with "database is locked" on lock upgrade
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -117,6 +124,72 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20
 }
 
+# Template conversion jobs
+# Jobs are executed by `python manage.py conversion_worker`. Set
+# CONVERSION_RUN_INLINE=True to run them inside the request instead
+# (handy for local development without a worker).
+CONVERSION_RUN_INLINE = config('CONVERSION_RUN_INLINE', default=False, cast=bool)
+CONVERSION_WORKER_PROCESSES = config('CONVERSION_WORKER_PROCESSES', default=2, cast=int)
+CONVERSION_WORKER_POLL_INTERVAL = config('CONVERSION_WORKER_POLL_INTERVAL', default=1.0, cast=float)
+# RUNNING jobs whose claim hasn't been refreshed (each conversion stage
+# refreshes it) for this long are assumed orphaned by a crashed worker and
+# are put back in the queue.
+CONVERSION_JOB_STALE_AFTER = config('CONVERSION_JOB_STALE_AFTER', default=600, cast=int)
+# Packs are built in a pool of long-lived converter processes (per worker
+# process, or per server process with CONVERSION_RUN_INLINE); 0 builds
+# them in the calling process. Pool processes are replaced after
+# CONVERTER_POOL_MAX_TASKS_PER_CHILD tasks (0 = never), and a task that
+# takes longer than CONVERTER_POOL_TASK_TIMEOUT seconds fails its job.
+CONVERTER_POOL_SIZE = config('CONVERTER_POOL_SIZE', default=2, cast=int)
+CONVERTER_POOL_MAX_TASKS_PER_CHILD = config('CONVERTER_POOL_MAX_TASKS_PER_CHILD', default=100, cast=int)
+CONVERTER_POOL_TASK_TIMEOUT = config('CONVERTER_POOL_TASK_TIMEOUT', default=120, cast=int)
+# Also write each generated pack to a temp folder for inspection
+CONVERSION_DEBUG_TREE = config('CONVERSION_DEBUG_TREE', default=False, cast=bool)
+# Builds are reused for identical image/target/converter-version inputs.
+# CONVERSION_CACHE_MAX_BYTES bounds the zips only the cache still holds;
+# those shared with a job or library item aren't freed by eviction
+CONVERSION_CACHE_ENABLED = config('CONVERSION_CACHE_ENABLED', default=True, cast=bool)
+CONVERSION_CACHE_MAX_BYTES = config('CONVERSION_CACHE_MAX_BYTES', default=512 * 1024 * 1024, cast=int)
+# Job progress stream (/api/templates/jobs/<id>/events/): how often each
+# open stream re-reads its job, and when it gives up on a job that never ends
+CONVERSION_EVENTS_POLL_INTERVAL = config('CONVERSION_EVENTS_POLL_INTERVAL', default=0.5, cast=float)
+CONVERSION_EVENTS_MAX_DURATION = config('CONVERSION_EVENTS_MAX_DURATION', default=900, cast=int)
+
+# Finance CSV import jobs
+# Run by `python manage.py import_worker`; FINANCE_IMPORT_RUN_INLINE=True
+# runs them inside the upload request instead (local development only).
+FINANCE_IMPORT_RUN_INLINE = config('FINANCE_IMPORT_RUN_INLINE', default=False, cast=bool)
+FINANCE_IMPORT_WORKER_POLL_INTERVAL = config('FINANCE_IMPORT_WORKER_POLL_INTERVAL', default=1.0, cast=float)
+# RUNNING imports that haven't committed a batch for this long are assumed
+# orphaned and are put back in the queue; they resume from their checkpoint.
+FINANCE_IMPORT_JOB_STALE_AFTER = config('FINANCE_IMPORT_JOB_STALE_AFTER', default=300, cast=int)
+# Files of at least FINANCE_IMPORT_PARALLEL_MIN_SIZE bytes are parsed and
+# validated in a pool of this many processes while the worker inserts
+# (`manage.py benchmark_import` shows the gain); 0 or 1 parses in the worker.
+FINANCE_IMPORT_PARSE_PROCESSES = config('FINANCE_IMPORT_PARSE_PROCESSES', default=0, cast=int)
+FINANCE_IMPORT_PARALLEL_MIN_SIZE = config('FINANCE_IMPORT_PARALLEL_MIN_SIZE', default=16 * 1024 * 1024, cast=int)
+
+# Cache
+# The default in-process cache is fine for a single runserver; point
+# CACHE_BACKEND/CACHE_LOCATION at a shared backend (Redis, database,
+# memcached) when running several processes so invalidation reaches all.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='dashboard'),
+    }
+}
+
+# Library category tree is cached until a LibraryItem changes
+LIBRARY_CATEGORY_TREE_TIMEOUT = config('LIBRARY_CATEGORY_TREE_TIMEOUT', default=300, cast=int)
+
+# Library downloads
+# '' streams zips from Django; 'x-accel' (nginx) or 'x-sendfile' (Apache,
+# lighttpd) hands the file to the front proxy after the checks are done.
+LIBRARY_DOWNLOAD_OFFLOAD = config('LIBRARY_DOWNLOAD_OFFLOAD', default='')
+# nginx `internal` location that maps onto MEDIA_ROOT
+LIBRARY_DOWNLOAD_ACCEL_PREFIX = config('LIBRARY_DOWNLOAD_ACCEL_PREFIX', default='/protected-media/')
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS', 
@@ -0,0 +1,115 @@
+"""
+Export of expenses as CSV or XLSX.
+
+Rows are read with values_list() across the vendor, category and
+payment method joins (one query, no model instances) and fetched from
+the cursor EXPORT_CHUNK_SIZE at a time, so memory use doesn't depend on
+how many expenses are exported.
+
+CSV is streamed as it is written, in blocks of about EXPORT_BUFFER_SIZE
+characters. Under ASGI the row iterator is wrapped in an async one (see
+stream_csv), because Django reads a sync iterator into a list before
+serving it there. The column names are the ones the CSV import reads,
+so an export imports back as it is.
+
+XLSX needs openpyxl (optional). The workbook is written in openpyxl's
+write-only mode to a temporary file, since the zip has to be finished
+before any of it can be sent.
+"""
+import csv
+import io
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, StreamingHttpResponse
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - optional dependency
+    Workbook = None
+
+# Rows fetched from the database cursor at a time
+EXPORT_CHUNK_SIZE = 2000
+# Characters of CSV collected before a block is sent
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+# (header, Expense field path)
+EXPORT_COLUMNS = (
+    ('ID', 'id'),
+    ('Date', 'date'),
+    ('Description', 'description'),
+    ('Amount', 'amount'),
+    ('Currency', 'currency'),
+    ('Vendor', 'vendor__name'),
+    ('Category', 'category__name'),
+    ('Payment_Method', 'payment_method__name'),
+    ('Paid_Date', 'paid_date'),
+    ('Note', 'note'),
+)
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Echo:
+    """File-like object whose write() hands back the line csv.writer made."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset):
+    """Tuples in EXPORT_COLUMNS order, read EXPORT_CHUNK_SIZE rows at a time."""
+    fields = [field for _, field in EXPORT_COLUMNS]
+    return queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_csv(queryset):
+    """The export as CSV text, in blocks of about EXPORT_BUFFER_SIZE characters."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+    for row in export_rows(queryset):
+        # None (no payment method, unpaid, no note) is written as empty
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _aiter_sync(iterator):
+    # thread_sensitive keeps every fetch on the thread that ran the view,
+    # which owns the database connection and its open cursor
+    next_block = sync_to_async(next, thread_sensitive=True)
+    while True:
+        block = await next_block(iterator, None)
+        if block is None:
+            return
+        yield block
+
+
+def stream_csv(request, queryset, filename):
+    content = iter_csv(queryset)
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        content = _aiter_sync(content)
+    response = StreamingHttpResponse(content, content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def xlsx_response(queryset, filename):
+    """The export as an XLSX attachment; raises RuntimeError without openpyxl."""
+    if Workbook is None:
+        raise RuntimeError("XLSX export needs openpyxl (pip install openpyxl)")
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Expenses')
+    sheet.append([header for header, _ in EXPORT_COLUMNS])
+    for row in export_rows(queryset):
+        sheet.append(row)
+    # Removed when the response closes it
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE)
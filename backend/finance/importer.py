@@ -0,0 +1,221 @@
+"""
+Bulk CSV import of expenses.
+
+Rows are parsed and validated in Python and written in batches. The
+owner's vendors, categories and payment methods are loaded into dicts
+once; names that aren't there yet are created with one bulk_create per
+type per batch. Expenses go in with one executemany() per batch of
+IMPORT_BATCH_SIZE rows: per-field ORM preparation in bulk_create costs
+more than the insert itself at this volume.
+
+Each batch is committed in its own transaction together with
+checkpoint(), which subclasses use to record progress (see jobs.py).
+
+The input is read a record at a time and only one batch is held, so
+memory use doesn't grow with the file; open_text() decodes a stored or
+uploaded file as it goes instead of reading it in whole. For big files on
+disk, run_parallel() moves the parsing and validation (parsing.py) into
+a process pool, leaving this process only the inserts.
+
+Columns are matched case-insensitively: date, description, amount,
+vendor and category are required; payment_method, paid_date and note are
+optional. Dates are YYYY-MM-DD or DD/MM/YYYY.
+"""
+import io
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Vendor, Category, PaymentMethod, Expense
+from .parsing import PARSE_CHUNK_SIZE, RowError, RowParser, parse_chunks, split_file
+
+IMPORT_BATCH_SIZE = 2000
+# Rejected rows kept as messages; checkpoint() gets all of them
+MAX_REPORTED_ERRORS = 10
+
+# Expense columns written by the importer; the rest keep their defaults
+INSERT_FIELDS = (
+    'owner', 'date', 'vendor', 'category', 'description', 'amount', 'currency',
+    'payment_method', 'paid_date', 'receipt', 'note', 'created_at', 'updated_at',
+)
+# Inserted columns the CSV has no value for, written with the field default
+DEFAULT_FIELDS = ('currency', 'receipt')
+
+MAX_AMOUNT_DIGITS = Expense._meta.get_field('amount').max_digits
+
+
+class ExpenseImporter:
+    """
+    Imports CSV rows as expenses of `owner`.
+
+    Usage:
+        result = ExpenseImporter(user).run(csv.reader(text_stream))
+        result.created, result.skipped, result.errors
+    """
+
+    def __init__(self, owner, batch_size=IMPORT_BATCH_SIZE):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        # (line, message, values) of the rows rejected since the last commit
+        self.rejected = []
+        self._ids = {model: self._load_names(model) for model in (Vendor, Category, PaymentMethod)}
+
+    def _load_names(self, model):
+        """name -> pk of the owner's rows; the oldest wins on duplicate names."""
+        ids = {}
+        for pk, name in model.objects.filter(owner=self.owner).order_by('pk').values_list('pk', 'name'):
+            ids.setdefault(name, pk)
+        return ids
+
+    def run(self, reader, start_line=0):
+        """
+        Import every record of a csv.reader whose first row is the header,
+        skipping those that end on or before CSV line `start_line` (a
+        checkpoint of an earlier run). Returns self with `created`,
+        `skipped` and `errors` filled in.
+        """
+        header = next(reader, None)
+        if header is None:
+            return self
+        self.start(header)
+        parser = RowParser(header, MAX_AMOUNT_DIGITS)
+
+        batch = []
+        for values in reader:
+            if not values or reader.line_num <= start_line:
+                continue
+            try:
+                batch.append(parser.parse_row(values))
+            except RowError as e:
+                self.skip(reader.line_num, str(e), values)
+            # Rejected rows count too, so they can't pile up either
+            if len(batch) + len(self.rejected) >= self.batch_size:
+                self.commit(batch, reader.line_num)
+                batch = []
+        if batch or self.rejected:
+            self.commit(batch, reader.line_num)
+        return self
+
+    def run_parallel(self, path, processes, start_line=0, chunk_size=PARSE_CHUNK_SIZE):
+        """
+        Like run(), for a CSV file on disk, with parsing and validation
+        spread over a pool of `processes` (see parsing.py). Rows are
+        inserted in file order as the chunks come back; each chunk is
+        committed as one unit.
+        """
+        header, chunks = split_file(path, chunk_size)
+        if header is None:
+            return self
+        self.start(header)
+        for rows, rejected, line_num in parse_chunks(path, header, chunks, processes, MAX_AMOUNT_DIGITS, start_line):
+            for line, message, values in rejected:
+                self.skip(line, message, values)
+            if rows or self.rejected:
+                self.commit(rows, line_num)
+        return self
+
+    def start(self, header):
+        """Called with the header row before the first record is read."""
+
+    def checkpoint(self, line_num):
+        """
+        Called in the transaction of each batch, once its expenses are
+        inserted; `line_num` is the last CSV line it covers and
+        `self.rejected` holds the rows it skipped.
+        """
+
+    def commit(self, rows, line_num):
+        with transaction.atomic():
+            for index in range(0, len(rows), self.batch_size):
+                self.flush(rows[index:index + self.batch_size])
+            self.checkpoint(line_num)
+        self.rejected = []
+
+    def skip(self, line_num, message, values):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {line_num}: {message}")
+        self.rejected.append((line_num, message, values))
+
+    def resolve(self, model, names, **defaults):
+        """Create the names `model` doesn't have yet; returns the name -> pk dict."""
+        ids = self._ids[model]
+        missing = sorted(name for name in names if name and name not in ids)
+        if missing:
+            created = model.objects.bulk_create(
+                [model(owner=self.owner, name=name, **defaults) for name in missing]
+            )
+            if all(obj.pk is not None for obj in created):
+                ids.update((obj.name, obj.pk) for obj in created)
+            else:
+                # Backend can't return primary keys from a bulk insert
+                ids.update(self._load_names(model))
+        return ids
+
+    def insert_sql(self):
+        meta = Expense._meta
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(meta.get_field(name).column) for name in INSERT_FIELDS)
+        placeholders = ', '.join(['%s'] * len(INSERT_FIELDS))
+        return f"INSERT INTO {quote(meta.db_table)} ({columns}) VALUES ({placeholders})"
+
+    def default_values(self):
+        """DEFAULT_FIELDS as the database values Expense.objects.create() writes when they are left out."""
+        expense = Expense()
+        fields = (Expense._meta.get_field(name) for name in DEFAULT_FIELDS)
+        return [field.get_db_prep_save(field.pre_save(expense, True), connection) for field in fields]
+
+    def flush(self, rows):
+        """Insert ParsedRows, or plain tuples in the same field order."""
+        _, _, _, vendor_names, category_names, method_names, _, _ = zip(*rows)
+        vendors = self.resolve(Vendor, set(vendor_names))
+        categories = self.resolve(Category, set(category_names), type='expense')
+        methods = self.resolve(PaymentMethod, set(method_names))
+
+        ops = connection.ops
+        now = ops.adapt_datetimefield_value(timezone.now())
+        currency, receipt = self.default_values()
+        params = [
+            (
+                self.owner.pk,
+                ops.adapt_datefield_value(expense_date),
+                vendors[vendor],
+                categories[category],
+                description,
+                ops.adapt_decimalfield_value(amount, MAX_AMOUNT_DIGITS, 2),
+                currency,
+                methods.get(method),
+                ops.adapt_datefield_value(paid_date),
+                receipt,
+                note,
+                now,
+                now,
+            )
+            for expense_date, description, amount, vendor, category, method, paid_date, note in rows
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(self.insert_sql(), params)
+        self.created += len(rows)
+
+    @property
+    def processed(self):
+        return self.created + self.skipped
+
+
+@contextmanager
+def open_text(binary_file):
+    """
+    Text stream over an open binary file (an upload or a stored file)
+    that decodes it as it is read: UTF-8, with or without a byte order
+    mark. The file itself is left open.
+    """
+    binary_file.seek(0)
+    text_stream = io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline='')
+    try:
+        yield text_stream
+    finally:
+        text_stream.detach()
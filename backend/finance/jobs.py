@@ -0,0 +1,143 @@
+"""
+Running ImportJob.
+
+The upload endpoint stores the file and creates a QUEUED job; the worker
+(worker.py) claims it and calls run_import(). Every committed batch also
+updates the job's counts and checkpoint and stores the rows it rejected,
+so progress can be polled while the import runs and a job that stops
+half-way resumes after its last committed batch instead of starting over.
+"""
+import csv
+
+from django.conf import settings
+from django.utils import timezone
+
+from .export import Echo
+from .importer import IMPORT_BATCH_SIZE, ExpenseImporter, open_text
+from .models import ImportJob, ImportJobError
+
+
+class JobClaimLost(Exception):
+    """The job was requeued or taken over while this run was busy with it."""
+
+
+class JobImporter(ExpenseImporter):
+    """ExpenseImporter that records its progress on an ImportJob."""
+
+    def __init__(self, job, worker_id, batch_size=IMPORT_BATCH_SIZE):
+        super().__init__(job.owner, batch_size=batch_size)
+        self.job = job
+        self.worker_id = worker_id
+        # Carry on from the counts of the committed batches
+        self.created = job.created_count
+        self.skipped = job.skipped_count
+        self.errors = list(job.errors)
+
+    def update_job(self, **fields):
+        """Update the job row, as long as this run still holds it."""
+        updated = ImportJob.objects.filter(
+            pk=self.job.pk, status='RUNNING', claimed_by=self.worker_id,
+        ).update(updated_at=timezone.now(), **fields)
+        if not updated:
+            raise JobClaimLost(f"Import job {self.job.pk} is no longer claimed by {self.worker_id}")
+
+    def start(self, header):
+        if header != self.job.header:
+            self.update_job(header=header)
+
+    def checkpoint(self, line_num):
+        ImportJobError.objects.bulk_create([
+            ImportJobError(job=self.job, line=line, message=message, values=values)
+            for line, message, values in self.rejected
+        ])
+        # Rolls the batch back along with it if the claim is gone
+        self.update_job(
+            checkpoint_line=line_num,
+            rows_processed=self.processed,
+            created_count=self.created,
+            skipped_count=self.skipped,
+            errors=self.errors,
+        )
+
+
+def parallel_path(job):
+    """
+    Local path of the job's file when it should be parsed in a process
+    pool: parallel parsing is enabled and the file is big enough to gain
+    from it. None otherwise.
+    """
+    if settings.FINANCE_IMPORT_PARSE_PROCESSES < 2:
+        return None
+    try:
+        path = job.file.path
+    except NotImplementedError:
+        # Storage without local files
+        return None
+    if job.file.size < settings.FINANCE_IMPORT_PARALLEL_MIN_SIZE:
+        return None
+    return path
+
+
+def run_import(job_id, worker_id):
+    """
+    Run a RUNNING job claimed by `worker_id` to the end, from its
+    checkpoint. Failures are recorded on the job (status ERROR) and can be
+    resumed with resume_job().
+
+    Returns:
+        bool: Whether the import finished
+    """
+    job = ImportJob.objects.select_related('owner').get(pk=job_id)
+    importer = JobImporter(job, worker_id)
+    if job.checkpoint_line:
+        print(f"Import job {job.pk}: resuming after line {job.checkpoint_line}")
+
+    try:
+        path = parallel_path(job)
+        if path:
+            importer.run_parallel(path, settings.FINANCE_IMPORT_PARSE_PROCESSES, start_line=job.checkpoint_line)
+        else:
+            with job.file.open('rb') as stored, open_text(stored) as text_stream:
+                importer.run(csv.reader(text_stream), start_line=job.checkpoint_line)
+        importer.update_job(status='SUCCESS', error='', finished_at=timezone.now())
+    except JobClaimLost as e:
+        print(f"Import job {job.pk}: {e}")
+        return False
+    except Exception as e:
+        print(f"Import job {job.pk} failed: {type(e).__name__}: {e}")
+        ImportJob.objects.filter(pk=job.pk, claimed_by=worker_id).update(
+            status='ERROR',
+            error=f"{type(e).__name__}: {e}",
+            updated_at=timezone.now(),
+        )
+        return False
+
+    # Only needed for resuming
+    job.file.delete(save=False)
+    ImportJob.objects.filter(pk=job.pk).update(file='')
+    print(f"Import job {job.pk}: {importer.created} created, {importer.skipped} skipped")
+    return True
+
+
+def resume_job(job):
+    """Queue a failed job again; returns False when it isn't in ERROR."""
+    return bool(ImportJob.objects.filter(pk=job.pk, status='ERROR').update(
+        status='QUEUED',
+        error='',
+        claimed_by='',
+        claimed_at=None,
+        updated_at=timezone.now(),
+    ))
+
+
+def iter_error_report(job):
+    """
+    The job's rejected rows as CSV text: line number, error and the row
+    as it was. The file's own columns keep their names, so a corrected
+    report imports like any other file.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(['line', 'error', *job.header])
+    rows = job.row_errors.order_by('line').values_list('line', 'message', 'values')
+    for line, message, values in rows.iterator(chunk_size=IMPORT_BATCH_SIZE):
+        yield writer.writerow([line, message, *values])
@@ -0,0 +1,121 @@
+import csv
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from finance.importer import MAX_AMOUNT_DIGITS, ExpenseImporter, open_text
+from finance.parsing import PARSE_CHUNK_SIZE, RowError, RowParser, parse_chunks, split_file
+
+HEADER = ['Date', 'Description', 'Amount', 'Vendor', 'Category', 'Payment_Method', 'Paid_Date', 'Note']
+
+
+class Command(BaseCommand):
+    help = 'Measure expense CSV parsing (and optionally import) speed, serial and in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500000, help='Rows in the generated file (default: 500000)')
+        parser.add_argument(
+            '--processes', default='2,4,8',
+            help='Comma separated pool sizes to compare with parsing in-process (default: 2,4,8)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=PARSE_CHUNK_SIZE, help='Bytes per pool task')
+        parser.add_argument(
+            '--insert', action='store_true',
+            help='Also time full imports for a throwaway user (rolled back)',
+        )
+
+    def handle(self, *args, **options):
+        pool_sizes = [int(size) for size in options['processes'].split(',') if size.strip()]
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                self._generate(f, options['rows'])
+            megabytes = os.path.getsize(path) / (1024 * 1024)
+            self.stdout.write(f"{options['rows']} rows, {megabytes:.1f} MB, {os.cpu_count()} CPU(s)")
+
+            self.stdout.write('\nParse and validate')
+            self.stdout.write(f"{'processes':<12} {'rows/s':>12} {'seconds':>10} {'speedup':>10}")
+            serial, expected = self._time(self._parse_serial, path)
+            self._report('in-process', options['rows'], serial, serial)
+            for size in pool_sizes:
+                seconds, counts = self._time(self._parse_parallel, path, size, options['chunk_size'])
+                if counts != expected:
+                    self.stderr.write(f"Pool of {size} parsed {counts} (rows, rejected), expected {expected}")
+                self._report(size, options['rows'], seconds, serial)
+
+            if options['insert']:
+                self.stdout.write('\nFull import (rolled back)')
+                self.stdout.write(f"{'processes':<12} {'rows/s':>12} {'seconds':>10} {'speedup':>10}")
+                serial, _ = self._time(self._import, path, 1, options['chunk_size'])
+                self._report('in-process', options['rows'], serial, serial)
+                for size in pool_sizes:
+                    seconds, _ = self._time(self._import, path, size, options['chunk_size'])
+                    self._report(size, options['rows'], seconds, serial)
+        finally:
+            os.remove(path)
+
+    def _generate(self, f, rows):
+        rng = random.Random(42)
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        start = date(2020, 1, 1)
+        for index in range(rows):
+            day = start + timedelta(days=rng.randrange(1500))
+            paid = (day + timedelta(days=rng.randrange(30))).strftime('%d/%m/%Y') if rng.random() < 0.7 else ''
+            note = 'Split over\ntwo lines, "quoted"' if index % 1000 == 0 else ''
+            writer.writerow([
+                day.isoformat() if index % 2 else day.strftime('%d/%m/%Y'),
+                f"Invoice {index} for services",
+                f"{rng.uniform(1, 5000):.2f}".replace('.', ',') if index % 3 == 0 else f"{rng.uniform(1, 5000):.2f}",
+                f"Vendor {rng.randrange(300)}",
+                f"Category {rng.randrange(40)}",
+                rng.choice(['Visa', 'Bank transfer', '']),
+                paid,
+                note,
+            ])
+
+    def _time(self, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        return time.perf_counter() - start, result
+
+    def _report(self, label, rows, seconds, serial):
+        self.stdout.write(f"{label!s:<12} {rows / seconds:>12,.0f} {seconds:>10.2f} {serial / seconds:>9.2f}x")
+
+    def _parse_serial(self, path):
+        parsed = rejected = 0
+        with open(path, 'rb') as f, open_text(f) as text_stream:
+            reader = csv.reader(text_stream)
+            parser = RowParser(next(reader), MAX_AMOUNT_DIGITS)
+            for values in reader:
+                try:
+                    parser.parse_row(values)
+                    parsed += 1
+                except RowError:
+                    rejected += 1
+        return parsed, rejected
+
+    def _parse_parallel(self, path, processes, chunk_size):
+        parsed = rejected = 0
+        header, chunks = split_file(path, chunk_size)
+        for rows, errors, _ in parse_chunks(path, header, chunks, processes, MAX_AMOUNT_DIGITS):
+            parsed += len(rows)
+            rejected += len(errors)
+        return parsed, rejected
+
+    def _import(self, path, processes, chunk_size):
+        with transaction.atomic():
+            owner = User.objects.create(username=f'benchmark-import-{os.getpid()}')
+            importer = ExpenseImporter(owner)
+            if processes > 1:
+                importer.run_parallel(path, processes, chunk_size=chunk_size)
+            else:
+                with open(path, 'rb') as f, open_text(f) as text_stream:
+                    importer.run(csv.reader(text_stream))
+            transaction.set_rollback(True)
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Run finance CSV import jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.FINANCE_IMPORT_WORKER_POLL_INTERVAL,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help='Exit after running this many jobs',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        from finance.worker import requeue_stale_jobs, run_worker
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale import job(s)'))
+
+        run_worker(
+            poll_interval=options['poll_interval'],
+            max_jobs=options['max_jobs'],
+            stop_when_idle=options['once'],
+        )
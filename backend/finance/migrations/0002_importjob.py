@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2025-11-20 10:12
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file', models.FileField(blank=True, help_text='Uploaded CSV, removed once the import succeeds', upload_to='finance/imports/')),
+                ('filename', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCESS', 'Success'), ('ERROR', 'Error')], default='QUEUED', max_length=10)),
+                ('header', models.JSONField(blank=True, default=list, help_text='Column names of the file')),
+                ('checkpoint_line', models.PositiveIntegerField(default=0, help_text='Last CSV line of the last committed batch')),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('skipped_count', models.PositiveIntegerField(default=0)),
+                ('errors', models.JSONField(blank=True, default=list, help_text='First rejected rows, as messages')),
+                ('error', models.TextField(blank=True, help_text='Why the last run failed')),
+                ('claimed_by', models.CharField(blank=True, help_text='Worker that is running this job', max_length=255)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='import_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ImportJobError',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('line', models.PositiveIntegerField()),
+                ('message', models.CharField(max_length=255)),
+                ('values', models.JSONField(default=list)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='row_errors', to='finance.importjob')),
+            ],
+            options={
+                'ordering': ['job', 'line'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['status', 'created_at'], name='finance_imp_status_474cd1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['owner', 'created_at'], name='finance_imp_owner_i_cda575_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjoberror',
+            index=models.Index(fields=['job', 'line'], name='finance_imp_job_id_619430_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from decimal import Decimal
@@ -102,3 +104,65 @@ class Expense(models.Model):
     @property
     def is_paid(self):
         return self.paid_date is not None
+
+
+class ImportJob(models.Model):
+    """
+    A CSV import of expenses, run by `manage.py import_worker`.
+
+    Rows are committed in batches; with each batch the job records the
+    last CSV line it covers (`checkpoint_line`) and its running counts, in
+    the same transaction. A job that fails, or whose worker dies, picks up
+    after that line when it runs again.
+    """
+    STATUS_CHOICES = [
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCESS', 'Success'),
+        ('ERROR', 'Error'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_jobs')
+    file = models.FileField(upload_to='finance/imports/', blank=True, help_text="Uploaded CSV, removed once the import succeeds")
+    filename = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
+    header = models.JSONField(default=list, blank=True, help_text="Column names of the file")
+    checkpoint_line = models.PositiveIntegerField(default=0, help_text="Last CSV line of the last committed batch")
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True, help_text="First rejected rows, as messages")
+    error = models.TextField(blank=True, help_text="Why the last run failed")
+    claimed_by = models.CharField(max_length=255, blank=True, help_text="Worker that is running this job")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['owner', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+
+
+class ImportJobError(models.Model):
+    """A row an import rejected, kept for the job's error report"""
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name='row_errors')
+    line = models.PositiveIntegerField()
+    message = models.CharField(max_length=255)
+    values = models.JSONField(default=list)
+
+    class Meta:
+        ordering = ['job', 'line']
+        indexes = [
+            models.Index(fields=['job', 'line']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} line {self.line}: {self.message}"
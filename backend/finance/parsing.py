@@ -0,0 +1,249 @@
+"""
+Parsing and validation of expense CSV rows, with no database access.
+
+RowParser turns one CSV record into a ParsedRow. On top of it, large
+files can be parsed in a process pool: split_file() cuts the file into
+byte ranges that end on record boundaries, and parse_chunks() parses them
+in child processes and hands the results back in file order, for the
+importer to insert. The children only import this module, so they never
+load Django or touch the database.
+
+Parsed rows cross the process boundary as tuples of strings: pickling
+dates and Decimals costs the parent more than building them again from
+strings, and the parent's share of the work is what limits the speedup.
+
+Chunk boundaries are found without decoding the file: a newline ends a
+record when the number of double quotes before it is even, which holds
+for quoted fields with embedded newlines and "" escapes. Line numbers
+count "\\n"; files with bare "\\r" line endings come out as one chunk.
+"""
+import csv
+import io
+import multiprocessing
+from collections import deque, namedtuple
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+REQUIRED_COLUMNS = ('date', 'description', 'amount', 'vendor', 'category')
+OPTIONAL_COLUMNS = ('payment_method', 'paid_date', 'note')
+
+CENT = Decimal('0.01')
+
+# Parsed dates are memoized; bank exports repeat the same few hundred
+MAX_CACHED_DATES = 100000
+
+# Bytes of CSV per pool task. Each parsed chunk is held until it has been
+# inserted, so this and the number of processes bound the memory used.
+PARSE_CHUNK_SIZE = 1024 * 1024
+
+ParsedRow = namedtuple('ParsedRow', REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+
+
+class RowError(ValueError):
+    pass
+
+
+class RowParser:
+    """
+    Validates the records of a file with the given header.
+
+    Columns are matched case-insensitively; a missing optional column
+    reads as empty. Amounts must fit `max_digits` once rounded to cents.
+    """
+
+    def __init__(self, header, max_digits):
+        positions = {name.lower().strip(): index for index, name in enumerate(header)}
+        self.columns = [positions.get(name) for name in ParsedRow._fields]
+        self.max_digits = max_digits
+        self._dates = {}
+
+    def parse_date(self, value):
+        try:
+            return self._dates[value]
+        except KeyError:
+            pass
+        parsed = None
+        for date_format in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(value, date_format).date()
+                break
+            except ValueError:
+                continue
+        if len(self._dates) < MAX_CACHED_DATES:
+            self._dates[value] = parsed
+        return parsed
+
+    def parse_amount(self, value):
+        try:
+            amount = Decimal(value.replace(',', '.'))
+            # Rounded to cents like the column does, and it has to fit
+            amount = amount.quantize(CENT)
+        except (InvalidOperation, ValueError):
+            raise RowError("Invalid amount")
+        if not amount.is_finite() or len(amount.as_tuple().digits) > self.max_digits:
+            raise RowError("Invalid amount")
+        return amount
+
+    def parse_row(self, values):
+        """Validate one CSV record; returns a ParsedRow or raises RowError."""
+        count = len(values)
+        row = ParsedRow._make(
+            values[index].strip() if index is not None and index < count else ''
+            for index in self.columns
+        )
+        if not all(row[:len(REQUIRED_COLUMNS)]):
+            raise RowError("Missing required fields")
+
+        expense_date = self.parse_date(row.date)
+        if expense_date is None:
+            raise RowError("Invalid date format")
+        return row._replace(
+            date=expense_date,
+            amount=self.parse_amount(row.amount),
+            # An unreadable paid date is dropped rather than failing the row
+            paid_date=self.parse_date(row.paid_date) if row.paid_date else None,
+        )
+
+
+def pack_row(row):
+    """ParsedRow as a tuple of strings, cheap to pickle."""
+    return (
+        row.date.isoformat(), row.description, str(row.amount), row.vendor, row.category,
+        row.payment_method, row.paid_date.isoformat() if row.paid_date else None, row.note,
+    )
+
+
+def unpack_rows(packed, dates):
+    """
+    Rows from pack_row() tuples, as plain tuples in ParsedRow field order
+    (building namedtuples here would double the parent's share of the
+    work); `dates` memoizes parsed dates.
+    """
+    rows = []
+    append = rows.append
+    for expense_date, description, amount, vendor, category, payment_method, paid_date, note in packed:
+        parsed = dates.get(expense_date)
+        if parsed is None:
+            parsed = dates[expense_date] = date.fromisoformat(expense_date)
+        if paid_date is not None:
+            paid = dates.get(paid_date)
+            if paid is None:
+                paid = dates[paid_date] = date.fromisoformat(paid_date)
+            paid_date = paid
+        append((parsed, description, Decimal(amount), vendor, category, payment_method, paid_date, note))
+    return rows
+
+
+def _read_record(f):
+    """Read one whole CSV record (possibly several lines) as bytes."""
+    record = f.readline()
+    while record.count(b'"') % 2:
+        line = f.readline()
+        if not line:
+            break
+        record += line
+    return record
+
+
+def split_file(path, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Read the header of a CSV file and cut the rest into chunks of about
+    `chunk_size` bytes that start and end on record boundaries.
+
+    Returns:
+        tuple: (header, [(start, end, line_offset), ...]) where
+        `line_offset` is the number of lines before the chunk; header is
+        None for an empty file
+    """
+    with open(path, 'rb') as f:
+        header_bytes = _read_record(f)
+        if not header_bytes:
+            return None, []
+        header = next(csv.reader(io.StringIO(header_bytes.decode('utf-8-sig'), newline='')), [])
+        line_offset = header_bytes.count(b'\n')
+
+        chunks = []
+        start = f.tell()
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            size = len(block)
+            quotes = block.count(b'"')
+            newlines = block.count(b'\n')
+            ends_line = block.endswith(b'\n')
+            # Carry on to the end of the record the block stopped in
+            while quotes % 2 or not ends_line:
+                line = f.readline()
+                if not line:
+                    break
+                size += len(line)
+                quotes += line.count(b'"')
+                newlines += line.count(b'\n')
+                ends_line = line.endswith(b'\n')
+            chunks.append((start, start + size, line_offset))
+            start += size
+            line_offset += newlines
+    return header, chunks
+
+
+def parse_chunk(path, start, end, line_offset, header, max_digits, start_line=0):
+    """
+    Parse the records in bytes `start`..`end` of the file (pool task).
+
+    Returns:
+        tuple: (rows, rejected, last_line) with the rows packed with
+        pack_row(), the rejected rows as (line, message, values), and the
+        file line number the chunk ends on
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = csv.reader(io.StringIO(data.decode('utf-8'), newline=''))
+    parser = RowParser(header, max_digits)
+    rows = []
+    rejected = []
+    for values in reader:
+        line = line_offset + reader.line_num
+        if not values or line <= start_line:
+            continue
+        try:
+            rows.append(pack_row(parser.parse_row(values)))
+        except RowError as e:
+            rejected.append((line, str(e), values))
+    return rows, rejected, line_offset + reader.line_num
+
+
+def parse_chunks(path, header, chunks, processes, max_digits, start_line=0):
+    """
+    Parse `chunks` of a file from split_file() in a pool of `processes`
+    and yield (rows, rejected, last_line) for each, in file order, with
+    the rows unpacked by unpack_rows(). Only a few chunks are queued ahead
+    of the one being consumed; chunks that end on or before `start_line`
+    are not parsed at all.
+    """
+    # Leave out chunks that end at or before the checkpoint
+    todo = [
+        chunk for index, chunk in enumerate(chunks)
+        if index + 1 == len(chunks) or chunks[index + 1][2] > start_line
+    ]
+    dates = {}
+
+    def collect(result):
+        packed, rejected, last_line = result.get()
+        if len(dates) > MAX_CACHED_DATES:
+            dates.clear()
+        return unpack_rows(packed, dates), rejected, last_line
+
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes=processes) as pool:
+        pending = deque()
+        for start, end, line_offset in todo:
+            pending.append(pool.apply_async(
+                parse_chunk, (path, start, end, line_offset, header, max_digits, start_line),
+            ))
+            if len(pending) > processes:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
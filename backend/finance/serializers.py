@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Vendor, Category, PaymentMethod, Expense
+from .models import Vendor, Category, PaymentMethod, Expense, ImportJob
 
 
 class VendorSerializer(serializers.ModelSerializer):
@@ -87,4 +87,14 @@ class SummarySerializer(serializers.Serializer):
     total = serializers.DecimalField(max_digits=10, decimal_places=2)
     from_date = serializers.DateField()
     to_date = serializers.DateField()
-    period = serializers.CharField()
\ No newline at end of file
+    period = serializers.CharField()
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'filename', 'status', 'rows_processed', 'created_count', 'skipped_count',
+            'checkpoint_line', 'errors', 'error', 'created_at', 'updated_at', 'finished_at',
+        ]
+        read_only_fields = fields
@@ -1,3 +1,520 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from unittest import mock
+
+from . import export, worker
+from .importer import MAX_AMOUNT_DIGITS, ExpenseImporter
+from .models import Category, Expense, ImportJob, PaymentMethod, Vendor
+from .parsing import parse_chunk, split_file
+
+HEADER = ['Date', 'Description', 'Amount', 'Vendor', 'Category', 'Note']
+
+
+def write_csv(test, rows, header=HEADER):
+    """A CSV file on disk, removed after `test`."""
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    test.addCleanup(os.remove, path)
+    with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        if header:
+            writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def reader(rows, header=HEADER):
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(header)
+    writer.writerows(rows)
+    return csv.reader(io.StringIO(out.getvalue()))
+
+
+class RecordingImporter(ExpenseImporter):
+    """Keeps what each committed batch reported to checkpoint()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkpoints = []
+
+    def checkpoint(self, line_num):
+        self.checkpoints.append((line_num, self.created, [line for line, _, _ in self.rejected]))
+
+
+class ExpenseImporterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+
+    def row(self, description, amount='1.00', vendor='Office Depot', category='Office', day='2024-01-15', note=''):
+        return [day, description, amount, vendor, category, note]
+
+    def test_rows_are_created_with_the_model_defaults(self):
+        header = ['DATE', ' Amount ', 'description', 'Vendor', 'category', 'Payment_Method', 'Paid_Date', 'Note']
+        rows = [
+            ['2024-01-15', '12,5', 'Paper', 'Office Depot', 'Office', 'Visa', '20/01/2024', 'A4'],
+            ['16/01/2024', '3', 'Pens', 'Office Depot', 'Office', '', 'not a date', ''],
+        ]
+        result = ExpenseImporter(self.user).run(reader(rows, header))
+        self.assertEqual((result.created, result.skipped), (2, 0))
+
+        paper, pens = Expense.objects.order_by('date')
+        self.assertEqual(
+            (paper.date, paper.description, paper.amount, paper.vendor.name, paper.category.name,
+             paper.payment_method.name, paper.paid_date, paper.note),
+            (date(2024, 1, 15), 'Paper', Decimal('12.50'), 'Office Depot', 'Office', 'Visa', date(2024, 1, 20), 'A4'),
+        )
+        self.assertEqual((pens.payment_method, pens.paid_date), (None, None))
+
+        # Columns the CSV doesn't have are stored as the ORM stores them
+        expected = Expense.objects.create(
+            owner=self.user, date=date(2024, 1, 1), description='ORM', amount=1,
+            vendor=paper.vendor, category=paper.category,
+        )
+        expected.refresh_from_db()
+        for expense in (paper, pens):
+            for name in ('currency', 'receipt'):
+                self.assertEqual(getattr(expense, name), getattr(expected, name), name)
+        self.assertEqual(Expense.objects.filter(currency='EUR', receipt='').count(), 3)
+
+    def test_vendors_and_categories_are_reused_or_created_once(self):
+        oldest = Vendor.objects.create(owner=self.user, name='Office Depot')
+        Vendor.objects.create(owner=self.user, name='Office Depot')
+        office = Category.objects.create(owner=self.user, name='Office')
+        # Another owner's names don't count
+        other = User.objects.create_user('other')
+        Vendor.objects.create(owner=other, name='New Co')
+
+        rows = [self.row(f'Item {index}', vendor='New Co' if index % 2 else 'Office Depot',
+                         category='Travel' if index > 2 else 'Office') for index in range(6)]
+        ExpenseImporter(self.user, batch_size=2).run(reader(rows))
+
+        new_co = Vendor.objects.get(owner=self.user, name='New Co')
+        travel = Category.objects.get(owner=self.user, name='Travel')
+        self.assertEqual(travel.type, 'expense')
+        self.assertEqual(Vendor.objects.filter(owner=self.user).count(), 3)
+        self.assertFalse(PaymentMethod.objects.exists())
+        self.assertEqual(
+            list(Expense.objects.order_by('description').values_list('vendor_id', 'category_id')),
+            [(oldest.pk, office.pk), (new_co.pk, office.pk), (oldest.pk, office.pk),
+             (new_co.pk, travel.pk), (oldest.pk, travel.pk), (new_co.pk, travel.pk)],
+        )
+
+    def test_rejected_rows_report_their_csv_line(self):
+        rows = [
+            self.row('Paper', note='Two\nlines'),
+            self.row('Bad date', day='2024-13-01'),
+            self.row('', amount='5.00'),
+            self.row('Bad amount', amount='12.5.0'),
+        ] + [self.row(f'Bad {index}', amount='x') for index in range(10)]
+        result = ExpenseImporter(self.user).run(reader(rows))
+
+        self.assertEqual((result.created, result.skipped), (1, 13))
+        # The note of line 2 spans two lines, so the next record is on line 4
+        self.assertEqual(result.errors[:3], [
+            'Row 4: Invalid date format',
+            'Row 5: Missing required fields',
+            'Row 6: Invalid amount',
+        ])
+        self.assertEqual(len(result.errors), 10)
+
+    def test_amount_must_fit_the_column(self):
+        self.assertEqual(MAX_AMOUNT_DIGITS, 10)
+        amounts = {
+            '99999999.99': Decimal('99999999.99'),
+            '-99999999.99': Decimal('-99999999.99'),
+            '0.004': Decimal('0.00'),
+            '100000000.00': None,
+            # Rounds up past the limit
+            '99999999.995': None,
+            'NaN': None,
+            'Infinity': None,
+            '1e20': None,
+        }
+        rows = [self.row(text, amount=text) for text in amounts]
+        result = ExpenseImporter(self.user).run(reader(rows))
+
+        self.assertEqual(
+            dict(Expense.objects.values_list('description', 'amount')),
+            {text: amount for text, amount in amounts.items() if amount is not None},
+        )
+        self.assertEqual(result.errors, [f'Row {line}: Invalid amount' for line in range(5, 10)])
+
+    def test_each_batch_commits_with_its_checkpoint(self):
+        rows = [self.row(f'Item {index}', vendor=f'Vendor {index}') for index in range(4)]
+        rows.insert(1, self.row('Bad', amount='x'))
+        rows.append(self.row('Last', vendor='Vendor last'))
+        importer = RecordingImporter(self.user, batch_size=2)
+
+        real_flush = ExpenseImporter.flush
+
+        def flush_failing_on_the_last_batch(self, batch):
+            real_flush(self, batch)
+            if batch[-1].description == 'Last':
+                raise RuntimeError("Database went away")
+
+        with mock.patch.object(ExpenseImporter, 'flush', flush_failing_on_the_last_batch):
+            with self.assertRaises(RuntimeError):
+                importer.run(reader(rows))
+
+        # Lines 2-3 and 4-5 were committed; the failed batch left nothing
+        self.assertEqual(importer.checkpoints, [(3, 1, [3]), (5, 3, [])])
+        self.assertEqual(
+            sorted(Expense.objects.values_list('description', flat=True)),
+            ['Item 0', 'Item 1', 'Item 2'],
+        )
+        self.assertFalse(Vendor.objects.filter(name='Vendor 3').exists())
+
+        # Resuming after the checkpoint imports the rest exactly once
+        resumed = RecordingImporter(self.user, batch_size=2).run(reader(rows), start_line=5)
+        self.assertEqual(resumed.checkpoints, [(7, 2, [])])
+        self.assertEqual(Expense.objects.count(), 5)
+
+
+class ExpenseImportApiTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user('owner', password='secret')
+        self.client.force_login(self.user)
+
+    def csv_file(self, rows, header=HEADER, prefix=''):
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(header)
+        writer.writerows(rows)
+        return SimpleUploadedFile('expenses.csv', (prefix + out.getvalue()).encode('utf-8'), content_type='text/csv')
+
+    def post(self, upload):
+        return self.client.post(reverse('expense-import-csv'), {'file': upload})
+
+    def read_report(self, job_id):
+        response = self.client.get(reverse('importjob-errors', args=[job_id]))
+        self.assertEqual(response.status_code, 200)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+
+    @override_settings(FINANCE_IMPORT_RUN_INLINE=True)
+    def test_rejected_rows_go_to_a_downloadable_report(self):
+        rows = [
+            ['2024-01-15', 'Paper', '12.50', 'Office Depot', 'Office', ''],
+            ['15/01/2024', 'Ink', 'abc', 'Office Depot', 'Office', 'bad amount'],
+            ['', 'No date', '3.00', 'Office Depot', 'Office', ''],
+            ['2024-01-16', 'Café', '4,20', 'Bakery', 'Food', 'comma decimal'],
+        ]
+        # A byte order mark is accepted
+        response = self.post(self.csv_file(rows, prefix='\ufeff'))
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['status'], 'SUCCESS')
+        self.assertEqual((data['created_count'], data['skipped_count'], data['rows_processed']), (2, 2, 4))
+        self.assertEqual(data['errors'], ['Row 3: Invalid amount', 'Row 4: Missing required fields'])
+        self.assertEqual(
+            sorted(Expense.objects.filter(owner=self.user).values_list('description', 'amount')),
+            [('Café', Decimal('4.20')), ('Paper', Decimal('12.50'))],
+        )
+        # The upload is only kept for resuming
+        self.assertFalse(ImportJob.objects.get(pk=data['id']).file)
+
+        self.assertEqual(self.read_report(data['id']), [
+            ['line', 'error', *HEADER],
+            ['3', 'Invalid amount', *rows[1]],
+            ['4', 'Missing required fields', *rows[2]],
+        ])
+
+        # Jobs are private to their owner
+        other = User.objects.create_user('other', password='secret')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse('importjob-errors', args=[data['id']])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('importjob-list')).json()['results'], [])
+
+    def test_queued_until_a_worker_runs_it(self):
+        response = self.post(self.csv_file([['2024-01-15', 'Paper', '12.50', 'Office Depot', 'Office', '']]))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'QUEUED')
+        self.assertFalse(Expense.objects.exists())
+
+        self.assertEqual(worker.run_worker(stop_when_idle=True), 1)
+        job = self.client.get(reverse('importjob-detail', args=[response.json()['id']])).json()
+        self.assertEqual((job['status'], job['created_count'], job['checkpoint_line']), ('SUCCESS', 1, 2))
+        self.assertEqual(self.read_report(job['id']), [['line', 'error', *HEADER]])
+
+    @override_settings(FINANCE_IMPORT_RUN_INLINE=True)
+    def test_resume_continues_after_the_checkpoint(self):
+        rows = [[f'2024-01-{day:02}', f'Item {day}', '1.00', 'Vendor', 'Office', ''] for day in range(1, 6)]
+        response = self.post(self.csv_file(rows))
+        job = ImportJob.objects.get(pk=response.json()['id'])
+        self.assertEqual(self.client.post(reverse('importjob-resume', args=[job.pk])).status_code, 409)
+
+        # As if the run had died after committing the first three rows
+        Expense.objects.filter(description__in=['Item 4', 'Item 5']).delete()
+        job.file.save('again.csv', self.csv_file(rows), save=False)
+        ImportJob.objects.filter(pk=job.pk).update(
+            file=job.file.name, status='ERROR', checkpoint_line=4, rows_processed=3, created_count=3,
+        )
+
+        response = self.client.post(reverse('importjob-resume', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['status'], response.json()['created_count']), ('SUCCESS', 5))
+        self.assertEqual(
+            sorted(Expense.objects.values_list('description', flat=True)),
+            [f'Item {day}' for day in range(1, 6)],
+        )
+
+
+class SplitFileTests(SimpleTestCase):
+    def write_csv(self, rows, header=HEADER):
+        return write_csv(self, rows, header)
+
+    def rows(self, count):
+        return [
+            [
+                '2024-01-15', f'Invoice {index}', f'{index}.50', f'Vendor {index % 7}', 'Office',
+                # Quoted fields with embedded newlines, commas and "" escapes
+                'Split over\ntwo lines, "quoted"\n\n' if index % 3 == 0 else '',
+            ]
+            for index in range(count)
+        ]
+
+    def test_chunks_end_on_record_boundaries(self):
+        rows = self.rows(40)
+        path = self.write_csv(rows)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        for chunk_size in (1, 7, 64, 100, 10 ** 6):
+            with self.subTest(chunk_size=chunk_size):
+                header, chunks = split_file(path, chunk_size)
+                self.assertEqual(header, HEADER)
+                self.assertGreaterEqual(len(chunks), 1)
+
+                parsed = []
+                expected_start = data.index(b'\n') + 1
+                for start, end, line_offset in chunks:
+                    # Contiguous, and each one cut after a newline that
+                    # has an even number of quotes before it
+                    self.assertEqual(start, expected_start)
+                    chunk = data[start:end]
+                    self.assertTrue(chunk.endswith(b'\n'))
+                    self.assertEqual(data[:end].count(b'"') % 2, 0)
+                    self.assertEqual(line_offset, data[:start].count(b'\n'))
+                    parsed += list(csv.reader(io.StringIO(chunk.decode('utf-8'), newline='')))
+                    expected_start = end
+                self.assertEqual(expected_start, len(data))
+                self.assertEqual(parsed, rows)
+
+    def test_line_numbers_match_a_serial_read(self):
+        path = self.write_csv(self.rows(12) + [['not a date', 'Bad', '1', 'Vendor', 'Office', '']])
+        with open(path, encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader)
+            last_lines = [reader.line_num for _ in reader]
+
+        header, chunks = split_file(path, 32)
+        self.assertGreater(len(chunks), 1)
+        rejected = []
+        for start, end, line_offset in chunks:
+            _, chunk_rejected, last_line = parse_chunk(path, start, end, line_offset, header, MAX_AMOUNT_DIGITS)
+            rejected += chunk_rejected
+        self.assertEqual(last_line, last_lines[-1])
+        self.assertEqual([line for line, _, _ in rejected], [last_lines[-1]])
+
+    def test_no_trailing_newline(self):
+        path = self.write_csv([])
+        with open(path, 'a', encoding='utf-8', newline='') as f:
+            f.write('2024-01-15,Last,1.00,Vendor,Office,"open\nquote"')
+        header, chunks = split_file(path, 4)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0][1], os.path.getsize(path))
+
+    def test_empty_and_header_only_files(self):
+        self.assertEqual(split_file(self.write_csv([], header=None)), (None, []))
+        self.assertEqual(split_file(self.write_csv([])), (HEADER, []))
+
+
+class ImportQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner')
+
+    def create_job(self, minutes_ago=0, **fields):
+        job = ImportJob.objects.create(owner=self.user, filename='expenses.csv', **fields)
+        ImportJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return job
+
+    def test_claims_oldest_queued_job_once(self):
+        newer = self.create_job(minutes_ago=1)
+        older = self.create_job(minutes_ago=5)
+        self.create_job(minutes_ago=10, status='ERROR')
+
+        self.assertEqual(worker.claim_next_job('worker-a'), older.pk)
+        self.assertEqual(worker.claim_next_job('worker-b'), newer.pk)
+        self.assertIsNone(worker.claim_next_job('worker-c'))
+        older.refresh_from_db()
+        self.assertEqual((older.status, older.claimed_by), ('RUNNING', 'worker-a'))
+
+    @override_settings(FINANCE_IMPORT_JOB_STALE_AFTER=60)
+    def test_requeues_jobs_without_a_recent_batch(self):
+        stale = self.create_job(status='RUNNING', claimed_by='gone', checkpoint_line=2000)
+        alive = self.create_job(status='RUNNING', claimed_by='busy')
+        # A batch moves updated_at, however long ago the job was claimed
+        ImportJob.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(minutes=5))
+        ImportJob.objects.filter(pk=alive.pk).update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(worker.requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.claimed_by, stale.checkpoint_line), ('QUEUED', '', 2000))
+        self.assertEqual((alive.status, alive.claimed_by), ('RUNNING', 'busy'))
+
+    def test_worker_survives_a_failing_runner(self):
+        jobs = [self.create_job(minutes_ago=minutes) for minutes in (2, 1)]
+        with mock.patch.object(worker, 'run_import', side_effect=[RuntimeError('boom'), True]) as run_import:
+            self.assertEqual(worker.run_worker(stop_when_idle=True), 2)
+        self.assertEqual([call.args[0] for call in run_import.call_args_list], [job.pk for job in jobs])
+
+    def test_inline_run_leaves_a_claimed_job_alone(self):
+        job = self.create_job(status='RUNNING', claimed_by='worker-a')
+        with mock.patch.object(worker, 'run_import') as run_import:
+            self.assertFalse(worker.run_job_inline(job.pk))
+        run_import.assert_not_called()
+
+
+class ParallelImportTests(TestCase):
+    def test_same_result_as_a_serial_import(self):
+        rows = [
+            [f'2024-01-{index % 28 + 1:02}', f'Item {index}', 'oops' if index % 9 == 0 else f'{index}.25',
+             f'Vendor {index % 4}', f'Category {index % 3}', 'Two\nlines' if index % 5 == 0 else '']
+            for index in range(60)
+        ]
+        path = write_csv(self, rows)
+
+        serial_owner = User.objects.create_user('serial')
+        with open(path, encoding='utf-8', newline='') as f:
+            serial = ExpenseImporter(serial_owner, batch_size=7).run(csv.reader(f))
+        parallel_owner = User.objects.create_user('parallel')
+        parallel = ExpenseImporter(parallel_owner).run_parallel(path, 2, chunk_size=200)
+
+        def imported(owner):
+            return list(
+                Expense.objects.filter(owner=owner).order_by('pk')
+                .values_list('date', 'description', 'amount', 'vendor__name', 'category__name', 'note')
+            )
+
+        self.assertEqual((parallel.created, parallel.skipped), (serial.created, serial.skipped))
+        self.assertEqual(parallel.errors, serial.errors)
+        self.assertEqual(imported(parallel_owner), imported(serial_owner))
+        self.assertEqual(len(imported(parallel_owner)), 53)
+
+
+
+class ExpenseExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='secret')
+        self.client.force_login(self.user)
+        self.office = Category.objects.create(owner=self.user, name='Office')
+        self.food = Category.objects.create(owner=self.user, name='Food')
+        self.vendor = Vendor.objects.create(owner=self.user, name='Office Depot')
+        card = PaymentMethod.objects.create(owner=self.user, name='Visa')
+        self.paper = self.create_expense(date(2024, 1, 15), 'Paper', '12.50', self.office, payment_method=card, paid_date=date(2024, 1, 20), note='A4, "bright"')
+        self.lunch = self.create_expense(date(2024, 2, 1), 'Lunch', '8.00', self.food)
+
+        other = User.objects.create_user('other')
+        Expense.objects.create(
+            owner=other, date=date(2024, 1, 15), description='Not mine', amount='1.00',
+            vendor=Vendor.objects.create(owner=other, name='Elsewhere'),
+            category=Category.objects.create(owner=other, name='Office'),
+        )
+
+    def create_expense(self, day, description, amount, category, **fields):
+        return Expense.objects.create(
+            owner=self.user, date=day, description=description, amount=Decimal(amount),
+            vendor=self.vendor, category=category, **fields,
+        )
+
+    def get_export(self, **params):
+        return self.client.get(reverse('expense-export'), params)
+
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode('utf-8'))))
+
+    def test_csv_has_the_owners_expenses(self):
+        rows = self.read_csv(self.get_export())
+        self.assertEqual(rows[0], [header for header, _ in export.EXPORT_COLUMNS])
+        self.assertEqual(sorted(rows[1:]), [
+            [str(self.paper.pk), '2024-01-15', 'Paper', '12.50', 'EUR', 'Office Depot', 'Office', 'Visa', '2024-01-20', 'A4, "bright"'],
+            [str(self.lunch.pk), '2024-02-01', 'Lunch', '8.00', 'EUR', 'Office Depot', 'Food', '', '', ''],
+        ])
+
+    def test_csv_takes_the_list_filters(self):
+        for params, expected in (
+            ({'from': '2024-02-01'}, ['Lunch']),
+            ({'to': '2024-01-31'}, ['Paper']),
+            ({'category_id': self.office.pk}, ['Paper']),
+            ({'paid': 'false'}, ['Lunch']),
+        ):
+            with self.subTest(params=params):
+                rows = self.read_csv(self.get_export(**params))
+                self.assertEqual([row[2] for row in rows[1:]], expected)
+
+    def test_csv_blocks_join_up(self):
+        for index in range(30):
+            self.create_expense(date(2024, 3, 1), f'Item {index}', '1.00', self.office)
+        expected = self.read_csv(self.get_export())
+        with mock.patch.object(export, 'EXPORT_BUFFER_SIZE', 100):
+            response = self.get_export()
+            blocks = list(response.streaming_content)
+        self.assertGreater(len(blocks), 10)
+        self.assertEqual(list(csv.reader(io.StringIO(b''.join(blocks).decode('utf-8')))), expected)
+
+    def test_export_imports_back_unchanged(self):
+        path = write_csv(self, self.read_csv(self.get_export()), header=None)
+        copy_owner = User.objects.create_user('copy')
+        with open(path, encoding='utf-8', newline='') as f:
+            result = ExpenseImporter(copy_owner).run(csv.reader(f))
+        self.assertEqual((result.created, result.skipped), (2, 0))
+
+        def imported(owner):
+            rows = Expense.objects.filter(owner=owner).values_list(
+                'date', 'description', 'amount', 'vendor__name', 'category__name', 'payment_method__name', 'paid_date', 'note',
+            )
+            # No note is exported as empty, and read back as an empty note
+            return sorted(row[:-1] + (row[-1] or '',) for row in rows)
+        self.assertEqual(imported(copy_owner), imported(self.user))
+
+    def test_invalid_type(self):
+        self.assertEqual(self.get_export(type='pdf').status_code, 400)
+
+    def test_xlsx_without_openpyxl(self):
+        with mock.patch.object(export, 'Workbook', None):
+            response = self.get_export(type='xlsx')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('openpyxl', response.json()['error'])
+
+    @unittest.skipUnless(export.Workbook, "openpyxl is not installed")
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+
+        response = self.get_export(type='xlsx', category_id=self.office.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], export.XLSX_CONTENT_TYPE)
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)['Expenses']
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], tuple(header for header, _ in export.EXPORT_COLUMNS))
+        self.assertEqual(rows[1][1:4], (date(2024, 1, 15), 'Paper', 12.5))
+        self.assertEqual(len(rows), 2)
@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import VendorViewSet, CategoryViewSet, PaymentMethodViewSet, ExpenseViewSet
+from .views import VendorViewSet, CategoryViewSet, PaymentMethodViewSet, ExpenseViewSet, ImportJobViewSet
 
 router = DefaultRouter()
 router.register(r'vendors', VendorViewSet, basename='vendor')
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'methods', PaymentMethodViewSet, basename='paymentmethod')
 router.register(r'expenses', ExpenseViewSet, basename='expense')
+router.register(r'imports', ImportJobViewSet, basename='importjob')
 
 urlpatterns = [
     path('', include(router.urls)),
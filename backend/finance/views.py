@@ -1,18 +1,20 @@
-import csv
-import io
-from datetime import date, datetime, timedelta
-from decimal import Decimal, InvalidOperation
+from datetime import date, timedelta
+from decimal import Decimal
 from django.db.models import Sum, Q, Count
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Vendor, Category, PaymentMethod, Expense
+from .models import Vendor, Category, PaymentMethod, Expense, ImportJob
+from .export import stream_csv, xlsx_response
+from .jobs import resume_job, iter_error_report
+from .worker import run_job_inline
 from .serializers import (
     VendorSerializer, CategorySerializer, PaymentMethodSerializer,
-    ExpenseSerializer, MarkPaidSerializer, SummarySerializer
+    ExpenseSerializer, MarkPaidSerializer, SummarySerializer, ImportJobSerializer
 )
 
 
@@ -111,116 +113,35 @@ class ExpenseViewSet(viewsets.ModelViewSet):
         if not csv_file.name.endswith('.csv'):
             return Response({'error': 'File must be a CSV'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            # Decode the file
-            csv_data = csv_file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(csv_data))
-            
-            created_count = 0
-            skipped_count = 0
-            errors = []
-            
-            for row_num, row in enumerate(csv_reader, start=2):  # Start at 2 because row 1 is headers
-                try:
-                    # Case-insensitive column mapping
-                    row_lower = {k.lower().strip(): v.strip() for k, v in row.items()}
-                    
-                    # Required fields
-                    date_str = row_lower.get('date', '').strip()
-                    description = row_lower.get('description', '').strip()
-                    amount_str = row_lower.get('amount', '').strip()
-                    vendor_name = row_lower.get('vendor', '').strip()
-                    category_name = row_lower.get('category', '').strip()
-                    
-                    if not all([date_str, description, amount_str, vendor_name, category_name]):
-                        errors.append(f"Row {row_num}: Missing required fields")
-                        skipped_count += 1
-                        continue
-                    
-                    # Parse date
-                    try:
-                        expense_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                    except ValueError:
-                        try:
-                            expense_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-                        except ValueError:
-                            errors.append(f"Row {row_num}: Invalid date format")
-                            skipped_count += 1
-                            continue
-                    
-                    # Parse amount
-                    try:
-                        amount = Decimal(amount_str.replace(',', '.'))
-                    except (InvalidOperation, ValueError):
-                        errors.append(f"Row {row_num}: Invalid amount")
-                        skipped_count += 1
-                        continue
-                    
-                    # Get or create vendor
-                    vendor, _ = Vendor.objects.get_or_create(
-                        owner=request.user,
-                        name=vendor_name,
-                        defaults={'name': vendor_name}
-                    )
-                    
-                    # Get or create category
-                    category, _ = Category.objects.get_or_create(
-                        owner=request.user,
-                        name=category_name,
-                        defaults={'name': category_name, 'type': 'expense'}
-                    )
-                    
-                    # Get payment method if specified
-                    payment_method = None
-                    payment_method_name = row_lower.get('payment_method', '').strip()
-                    if payment_method_name:
-                        payment_method, _ = PaymentMethod.objects.get_or_create(
-                            owner=request.user,
-                            name=payment_method_name,
-                            defaults={'name': payment_method_name}
-                        )
-                    
-                    # Parse paid_date if specified
-                    paid_date = None
-                    paid_date_str = row_lower.get('paid_date', '').strip()
-                    if paid_date_str:
-                        try:
-                            paid_date = datetime.strptime(paid_date_str, '%Y-%m-%d').date()
-                        except ValueError:
-                            try:
-                                paid_date = datetime.strptime(paid_date_str, '%d/%m/%Y').date()
-                            except ValueError:
-                                pass  # Just skip paid_date if invalid
-                    
-                    # Create expense
-                    expense = Expense.objects.create(
-                        owner=request.user,
-                        date=expense_date,
-                        vendor=vendor,
-                        category=category,
-                        description=description,
-                        amount=amount,
-                        currency='EUR',  # Default currency
-                        payment_method=payment_method,
-                        paid_date=paid_date,
-                        note=row_lower.get('note', '')
-                    )
-                    
-                    created_count += 1
-                    
-                except Exception as e:
-                    errors.append(f"Row {row_num}: {str(e)}")
-                    skipped_count += 1
-            
-            return Response({
-                'message': 'CSV import completed',
-                'created_count': created_count,
-                'skipped_count': skipped_count,
-                'errors': errors[:10]  # Limit errors to first 10
-            })
-            
-        except Exception as e:
-            return Response({'error': f'Failed to process CSV: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+        job = ImportJob.objects.create(owner=request.user, filename=csv_file.name, file=csv_file)
+        
+        # Jobs are picked up by `manage.py import_worker`; inline mode is
+        # only meant for local development without a worker running.
+        if not settings.FINANCE_IMPORT_RUN_INLINE:
+            return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        
+        run_job_inline(job.pk)
+        job.refresh_from_db()
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        The filtered list (same query parameters) as a file: `?type=csv`
+        (default, streamed) or `?type=xlsx` (needs openpyxl).
+        """
+        queryset = self.get_queryset()
+        export_type = request.query_params.get('type', 'csv')
+        filename = f'expenses-{date.today().isoformat()}.{export_type}'
+        
+        if export_type == 'csv':
+            return stream_csv(request, queryset, filename)
+        if export_type == 'xlsx':
+            try:
+                return xlsx_response(queryset, filename)
+            except RuntimeError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'error': 'Invalid type. Use "csv" or "xlsx"'}, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
     def summary(self, request):
@@ -254,3 +175,34 @@ class ExpenseViewSet(viewsets.ModelViewSet):
             'to_date': to_date,
             'period': period
         })
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """CSV import jobs started with `expenses/import_csv/`, and their progress."""
+    serializer_class = ImportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ImportJob.objects.filter(owner=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        job = self.get_object()
+        if not resume_job(job):
+            return Response({'error': f'Only failed imports can be resumed (status is {job.status})'}, status=status.HTTP_409_CONFLICT)
+        
+        job.refresh_from_db()
+        if not settings.FINANCE_IMPORT_RUN_INLINE:
+            return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+        
+        run_job_inline(job.pk)
+        job.refresh_from_db()
+        return Response(ImportJobSerializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def errors(self, request, pk=None):
+        """Every row the import rejected, as a CSV file."""
+        job = self.get_object()
+        response = StreamingHttpResponse(iter_error_report(job), content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="import-errors-{job.pk}.csv"'
+        return response
@@ -0,0 +1,61 @@
+"""
+Database-backed runner for ImportJob.
+
+`python manage.py import_worker` polls for QUEUED jobs and runs them one
+at a time, through the queue loop it shares with the conversion worker
+(templates_app/utils/job_queue.py). A RUNNING job that hasn't committed
+a batch for FINANCE_IMPORT_JOB_STALE_AFTER seconds goes back in the
+queue and resumes from its checkpoint.
+"""
+from django.conf import settings
+
+from templates_app.utils import job_queue
+
+from .jobs import run_import
+from .models import ImportJob
+
+STALE_AFTER_SETTING = 'FINANCE_IMPORT_JOB_STALE_AFTER'
+
+
+def claim_next_job(worker_id):
+    """Claim the oldest QUEUED job for `worker_id` and return its id, or None."""
+    return job_queue.claim_next_job(ImportJob, worker_id)
+
+
+def run_job_inline(job_id):
+    """Claim a QUEUED job for this process and run it right away."""
+    worker_id = job_queue.get_worker_id()
+    return job_queue.claim_job(ImportJob, job_id, worker_id) and run_import(job_id, worker_id)
+
+
+def requeue_stale_jobs():
+    """Put RUNNING jobs that stopped making progress back in the queue."""
+    # updated_at moves with every committed batch
+    return job_queue.requeue_stale_jobs(ImportJob, STALE_AFTER_SETTING, heartbeat_field='updated_at')
+
+
+def run_claimed_job(job_id, worker_id):
+    print(f"Worker {worker_id} claimed import job {job_id}")
+    # run_import records its own failures on the job
+    run_import(job_id, worker_id)
+    return 1
+
+
+def run_worker(poll_interval=None, max_jobs=None, stop_when_idle=False):
+    """
+    Claim and run import jobs until stopped.
+
+    Args:
+        poll_interval (float): Seconds to sleep when the queue is empty
+        max_jobs (int): Exit after running this many jobs (None = no limit)
+        stop_when_idle (bool): Exit as soon as the queue is empty
+
+    Returns:
+        int: Number of jobs run
+    """
+    if poll_interval is None:
+        poll_interval = settings.FINANCE_IMPORT_WORKER_POLL_INTERVAL
+    return job_queue.run_worker(
+        ImportJob, run_claimed_job, STALE_AFTER_SETTING, poll_interval, heartbeat_field='updated_at',
+        max_jobs=max_jobs, stop_when_idle=stop_when_idle, name='Import',
+    )
@@ -0,0 +1,125 @@
+"""
+Single-pass analysis of an uploaded screenshot.
+
+The image is decoded once and everything the generators need is put in
+a plain, JSON-serializable record, which is stored on the TemplateUpload
+(see templates_app.analysis) so later conversions for any target never
+decode the image again:
+
+    {
+        "version": 5,
+        "width": 1440, "height": 900, "aspect_ratio": 1.6,
+        "layout": "wide",                 # wide | standard | tall
+        "dominant_colors": ["#1f2937", ...],
+        "palette": {"colors": [{"color": "#1f2937", "weight": 0.62}, ...], "transparent": 0.0},
+        "theme": {"primary_color": ..., "secondary_color": ..., ...},  # or None
+        "bands": [{"name": "hero", "top": 0.04, "bottom": 0.31, "columns": 1}, ...],
+        "sections": ["hero", "features-grid", "cta"],
+        "feature_columns": 3,             # or None
+        "detector": "projection",         # or "aspect-ratio"
+    }
+
+`bands` come from layout_detection (empty without NumPy or when nothing
+was found). `sections` are the detected body bands when there are at
+least two of them, otherwise the fixed list for the layout class.
+`theme` holds the palette's brand colors (see palette.assign_roles) when
+the screenshot has at least two distinct non-neutral colors; generators
+keep their default colors otherwise.
+
+Bump ANALYSIS_VERSION whenever the record changes shape or meaning;
+stored records with another version are recomputed on next use.
+"""
+from PIL import Image
+
+from . import layout_detection, palette as palette_module
+
+ANALYSIS_VERSION = 5
+
+# Used when the image can't be read
+DEFAULT_WIDTH = 1200
+DEFAULT_HEIGHT = 800
+
+LAYOUT_SECTIONS = {
+    'wide': ['hero', 'features-grid', 'cta'],
+    'tall': ['hero', 'features-list', 'testimonials', 'cta'],
+    'standard': ['hero', 'features-grid', 'cta'],
+}
+
+
+def classify_layout(aspect_ratio: float) -> str:
+    if aspect_ratio > 1.5:
+        return 'wide'
+    if aspect_ratio < 0.8:
+        return 'tall'
+    return 'standard'
+
+
+def brand_theme(palette: dict):
+    """
+    Brand colors of a screenshot palette, or None without at least two
+    distinct non-neutral colors. Neutrals (page background, text) only
+    ever fill the background role here.
+    """
+    chromatic = [entry for entry in palette.get('colors', []) if not palette_module.is_neutral(entry['color'])]
+    if len(chromatic) < 2:
+        return None
+    theme = palette_module.assign_roles({'colors': chromatic})
+    theme['background_color'] = palette_module.assign_roles(palette)['background_color']
+    return theme
+
+
+def build_record(width: int, height: int, colors: list = None, bands: list = None,
+                 palette: dict = None) -> dict:
+    aspect_ratio = width / height
+    layout = classify_layout(aspect_ratio)
+    bands = bands or []
+    body = [band for band in bands if band['name'] not in ('header', 'footer')]
+    grids = [band['columns'] for band in body if band['name'] == 'features-grid']
+    detected = len(body) >= 2
+    return {
+        'version': ANALYSIS_VERSION,
+        'width': width,
+        'height': height,
+        'aspect_ratio': aspect_ratio,
+        'layout': layout,
+        'dominant_colors': colors or [],
+        'palette': palette,
+        'theme': brand_theme(palette) if palette else None,
+        'bands': bands,
+        'sections': [band['name'] for band in body] if detected else list(LAYOUT_SECTIONS[layout]),
+        'feature_columns': min(max(grids), 4) if grids else None,
+        'detector': 'projection' if detected else 'aspect-ratio',
+    }
+
+
+def default_record() -> dict:
+    """Record used when the image can't be analyzed. Never stored."""
+    record = build_record(DEFAULT_WIDTH, DEFAULT_HEIGHT)
+    record['fallback'] = True
+    return record
+
+
+def analyze(image_path: str) -> dict:
+    """
+    Decode the image once and return its analysis record.
+
+    Falls back to default_record() (marked with "fallback": True) when the
+    image can't be read, like the converter always has.
+    """
+    try:
+        with Image.open(image_path) as img:
+            width, height = img.size
+            # JPEGs can be decoded straight at a fraction of their size;
+            # nothing below needs more than a few hundred pixels across
+            draft_width = layout_detection.ANALYSIS_WIDTH * 2
+            img.draft('RGB', (draft_width, max(1, height * draft_width // width)))
+            rgb = img.convert('RGB')
+        palette = palette_module.extract_palette(rgb)
+        colors = [entry['color'] for entry in palette['colors']]
+        bands = layout_detection.detect_bands(rgb)
+    except Exception as e:
+        print(f"Warning: Could not analyze image ({e}), using defaults")
+        return default_record()
+
+    print(f"Image dimensions: {width}x{height}, aspect ratio: {width / height:.2f}")
+    return build_record(width, height, colors, bands, palette)
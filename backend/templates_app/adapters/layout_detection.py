@@ -0,0 +1,272 @@
+"""
+Layout detection for page screenshots.
+
+The screenshot is reduced to grayscale and RGB arrays ANALYSIS_WIDTH
+pixels wide and scanned with row projections (per-row contrast plus
+horizontal edge density) to find horizontal bands of content:
+
+- a band boundary is either a run of visually flat rows in the page's
+  background color (whitespace between sections) or a row where most of
+  the width changes brightness or color at once (a background change or
+  a divider line), except around a short block with the same background
+  above and below it (a photo strip inside a hero);
+- flat rows in any other color are a solid band (a colored banner or
+  spacer) rather than whitespace, so they are kept;
+- each band's column projection tells how many side-by-side blocks it
+  holds, which separates feature grids from single-column content;
+- bands are then labelled header, hero, features-grid, content, cta and
+  footer from their position, height and column count.
+
+Everything is vectorized NumPy, so the cost is dominated by decoding and
+downsampling the image (well under 100ms for a decoded 4K screenshot). NumPy is
+optional: without it detect_bands() returns None and callers fall back
+to the aspect-ratio layouts.
+"""
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+ANALYSIS_WIDTH = 256
+
+# Rows whose contrast + edge density stays below this are whitespace
+FLAT_THRESHOLD = 0.02
+# Brightness change counted as an edge between two neighbouring rows
+STEP_THRESHOLD = 0.12
+# Change in any RGB channel counted as a color edge between two rows;
+# catches backgrounds of about the same brightness as their neighbours
+COLOR_STEP_THRESHOLD = 0.06
+# Share of the width that must change at once to mark a band boundary
+STEP_COVERAGE = 0.6
+# Whitespace taller than this share of the page width separates sections
+MIN_GAP_RATIO = 0.05
+# A band between two brightness/color steps must be at least this share of
+# the page width tall; a shorter block with the same background above and
+# below (a photo strip, a noisy banner) is part of the band around it
+MIN_STEP_BAND_RATIO = 0.1
+# Columns with less contrast than this inside a band are empty
+COLUMN_THRESHOLD = 0.03
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def to_arrays(img: Image.Image):
+    """
+    Downsample `img` to ANALYSIS_WIDTH wide grayscale and RGB floats in
+    0..1, as (rows x width) and (rows x width x 3) arrays.
+    """
+    width, height = img.size
+    size = (min(ANALYSIS_WIDTH, width), max(1, round(height * min(ANALYSIS_WIDTH, width) / width)))
+    small = img.convert('RGB').resize(size, Image.BILINEAR, reducing_gap=2.0)
+    gray = np.asarray(small.convert('L'), dtype=np.float32) / 255.0
+    return gray, np.asarray(small, dtype=np.float32) / 255.0
+
+
+def _runs(mask):
+    """(start, end) index pairs of the True runs in a 1-D boolean array."""
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return changes[0::2], changes[1::2]
+
+
+def _smooth(values, window):
+    if window <= 1:
+        return values
+    return np.convolve(values, np.ones(window, dtype=np.float32) / window, mode='same')
+
+
+def _same_color(a, b):
+    return bool(np.abs(a - b).max() < COLOR_STEP_THRESHOLD)
+
+
+def page_background(flat, rgb, min_gap):
+    """
+    The page's background color: of the colors of flat rows, the one that
+    separates the most sections, i.e. that is the median color of the
+    runs of rows at least `min_gap` tall (text on a colored hero leaves
+    its median color alone, so the hero is one run; whitespace recurs
+    between sections), then the one with the most flat rows. None without
+    flat rows.
+    """
+    if not flat.any():
+        return None
+    medians = np.round(np.median(rgb, axis=1) / COLOR_STEP_THRESHOLD).astype(np.int32)
+    changed = np.concatenate(([True], (medians[1:] != medians[:-1]).any(axis=1)))
+    # Run ids rise down the page, so each run's first row is where its id first appears
+    _, first_rows, sizes = np.unique(np.cumsum(changed), return_index=True, return_counts=True)
+    run_levels = medians[first_rows[sizes >= min_gap]]
+    # Shorter runs in between (a button, a line of text) don't end a run
+    if len(run_levels):
+        run_levels = run_levels[np.concatenate(([True], (run_levels[1:] != run_levels[:-1]).any(axis=1)))]
+
+    levels = np.round(rgb.mean(axis=1) / COLOR_STEP_THRESHOLD).astype(np.int32)
+    candidates, counts = np.unique(levels[flat], axis=0, return_counts=True)
+    runs = np.array([(run_levels == level).all(axis=1).sum() for level in candidates])
+    return candidates[np.lexsort((counts, runs))[-1]] * COLOR_STEP_THRESHOLD
+
+
+def _drop_inner_blocks(step_cuts, row_colors, min_band, min_height):
+    """
+    `step_cuts` without the steps around a block shorter than `min_height`
+    that has the same background on both sides. Steps closer than
+    `min_band` are one boundary (the two edges of a divider line, or a
+    blurred edge) and are left alone.
+    """
+    if len(step_cuts) < 2:
+        return step_cuts
+    groups = np.split(step_cuts, np.flatnonzero(np.diff(step_cuts) >= min_band) + 1)
+    dropped = set()
+    for i, (above, below) in enumerate(zip(groups[:-1], groups[1:])):
+        top, bottom = above[-1], below[0]
+        if (min_band <= bottom - top < min_height
+                and _same_color(row_colors[above[0] - 1], row_colors[below[-1]])):
+            dropped.update((i, i + 1))
+    return np.concatenate([group for i, group in enumerate(groups) if i not in dropped] or [step_cuts[:0]])
+
+
+def find_cuts(arr, rgb):
+    """
+    Row indices where one band ends and the next begins, the flat rows,
+    and the page's background color (None when no row is flat).
+    """
+    rows, width = arr.shape
+    activity = arr.std(axis=1) + np.abs(np.diff(arr, axis=1)).mean(axis=1)
+    flat = _smooth(activity, max(1, rows // 200)) < FLAT_THRESHOLD
+    min_gap = max(2, int(width * MIN_GAP_RATIO))
+    row_colors = rgb.mean(axis=1)
+    background = page_background(flat, rgb, min_gap)
+    whitespace = flat.copy()
+    if background is not None:
+        whitespace &= np.abs(row_colors - background).max(axis=1) < COLOR_STEP_THRESHOLD
+
+    # Full-width brightness or color steps: background changes and divider
+    # lines. A real one has a uniform row on at least one side, which
+    # tells it apart from a row of wide content blocks (e.g. a grid of
+    # cards).
+    brightness = np.abs(np.diff(arr, axis=0)) > STEP_THRESHOLD
+    color = np.abs(np.diff(rgb, axis=0)).max(axis=2) > COLOR_STEP_THRESHOLD
+    coverage = (brightness | color).mean(axis=1)
+    uniform_side = flat[:-1] | flat[1:]
+    step_cuts = np.flatnonzero((coverage > STEP_COVERAGE) & uniform_side) + 1
+    min_band = max(4, rows // 30)
+    step_cuts = _drop_inner_blocks(
+        step_cuts, row_colors, min_band, max(min_band, int(width * MIN_STEP_BAND_RATIO)),
+    )
+
+    # Whitespace gaps: cut in the middle of every run of background rows
+    # that is tall enough to separate sections rather than lines of text.
+    # Spacing scales with the page width, not its length. A run never
+    # spans a background step.
+    gaps = whitespace.copy()
+    gaps[step_cuts] = False
+    starts, ends = _runs(gaps)
+    keep = (ends - starts) >= min_gap
+    gap_cuts = (starts[keep] + ends[keep]) // 2
+
+    # Steps are the more reliable boundary, so they go in first; a gap cut
+    # is only added when it isn't right next to one. Either way cuts
+    # closer together than the smallest useful band are merged.
+    cuts = []
+    for candidates in (step_cuts, gap_cuts):
+        for cut in candidates.tolist():
+            if 0 < cut < rows and all(abs(cut - other) >= min_band for other in cuts):
+                cuts.append(cut)
+    return sorted(cuts), flat, background
+
+
+def count_columns(band, flat_rows):
+    """Number of side-by-side content blocks in a band."""
+    width = band.shape[1]
+    # Uniform rows (padding, or a stray row of the neighbouring band's
+    # background) say nothing about columns, so only rows with content
+    # are looked at
+    content = band[~flat_rows]
+    if content.shape[0] == 0:
+        return 0
+    active = content.std(axis=0) > COLUMN_THRESHOLD
+    if not active.any():
+        return 0
+    # Close gaps narrower than ~1.5% of the width so text inside one block
+    # doesn't count as several columns (grid gutters are wider)
+    gap = max(1, width // 64)
+    closed = np.convolve(active.astype(np.float32), np.ones(gap, dtype=np.float32), mode='same') > 0
+    starts, ends = _runs(closed)
+    # Ignore specks narrower than a gap
+    return int(((ends - starts) > gap).sum())
+
+
+def label_bands(bands, rows):
+    """Give each (top, bottom, columns) band a section name."""
+    labelled = [
+        {'name': 'content', 'top': top / rows, 'bottom': bottom / rows, 'columns': columns}
+        for top, bottom, columns in bands
+    ]
+    if not labelled:
+        return labelled
+
+    body = labelled
+    if len(body) > 1 and body[0]['bottom'] - body[0]['top'] < 0.15:
+        body[0]['name'] = 'header'
+        body = body[1:]
+    if len(body) > 1 and body[-1]['bottom'] - body[-1]['top'] < 0.25:
+        body[-1]['name'] = 'footer'
+        body = body[:-1]
+
+    body[0]['name'] = 'hero'
+    for band in body[1:]:
+        if band['columns'] >= 3:
+            band['name'] = 'features-grid'
+    if len(body) > 2 and body[-1]['name'] == 'content' and body[-1]['columns'] <= 1:
+        body[-1]['name'] = 'cta'
+    return labelled
+
+
+def detect_bands(img: Image.Image):
+    """
+    Detect the horizontal sections of a page screenshot.
+
+    Returns:
+        list: Bands top to bottom as dicts with `name`, `top` and `bottom`
+        (fractions of the image height) and `columns`; an empty list when
+        the image shows no structure, or None when NumPy isn't installed
+    """
+    if np is None:
+        return None
+
+    arr, rgb = to_arrays(img)
+    rows = arr.shape[0]
+    cuts, flat, background = find_cuts(arr, rgb)
+    row_colors = rgb.mean(axis=1)
+    edges = [0, *cuts, rows]
+
+    # [top, bottom, solid, color]
+    spans = []
+    for top, bottom in zip(edges[:-1], edges[1:]):
+        band_flat = flat[top:bottom]
+        solid = band_flat.mean() > 0.9
+        # Background color of the band: that of its flat rows, if any
+        colors = row_colors[top:bottom][band_flat] if band_flat.any() else row_colors[top:bottom]
+        color = np.median(colors, axis=0)
+        # Pure whitespace between sections is not a band of its own; a
+        # solid band in another color is
+        if solid and _same_color(color, background):
+            continue
+        previous = spans[-1] if spans else None
+        if (previous and previous[1] == top and (solid or previous[2])
+                and _same_color(color, previous[3])):
+            # Solid rows cut off from a band of the same color (e.g. the
+            # padding below a footer's text) belong to that band
+            previous[1] = bottom
+            previous[2] = previous[2] and solid
+            continue
+        spans.append([top, bottom, solid, color])
+
+    bands = [
+        (top, bottom, count_columns(arr[top:bottom], flat[top:bottom]))
+        for top, bottom, _, _ in spans
+    ]
+    return label_bands(bands, rows)
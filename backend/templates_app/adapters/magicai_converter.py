@@ -4,25 +4,12 @@ import io
 import re
 import pathlib
 import traceback
-from PIL import Image
-
-# Safe replacements for common Unicode characters and problematic emojis
-SAFE_REPLACEMENTS = {
-    "\u2013": "-",    # en-dash
-    "\u2014": "-",    # em-dash
-    "\u00A0": " ",    # nbsp
-    "\u26A1": "[!]",  # lightning bolt emoji (causing the encoding error)
-    "\u1F680": "[rocket]",  # rocket emoji
-    "\u1F44B": "[wave]",    # waving hand emoji
-    "\u2728": "[sparkles]", # sparkles emoji
-    "\u1F4A5": "[boom]",    # boom emoji
-    "\u1F525": "[fire]",    # fire emoji
-    "\u2B50": "[star]",     # star emoji
-    "\u1F31F": "[glowing-star]", # glowing star emoji
-}
+from contextlib import nullcontext
+from . import image_analysis
+from ..utils import sanitize
 
-# Control characters that should be removed
-UNSAFE_CONTROL_CHARS = re.compile(r"[\u0000-\u0008\u000B\u000C\u000E-\u001F]")
+# Bump whenever generated output changes, so cached builds are not reused
+CONVERTER_VERSION = "6"
 
 # Flag to sanitize emojis if needed (default: keep them, UTF-8 handles it)
 SANITIZE_EMOJIS = False
@@ -31,6 +18,8 @@ def sanitize_text(s: str, aggressive: bool = False) -> str:
     """
     Sanitize text for safe file writing on Windows systems.
     
+    See templates_app.utils.sanitize for the rules of each mode.
+    
     Args:
         s: Input string to sanitize
         aggressive: If True, replace all non-ASCII characters
@@ -38,35 +27,7 @@ def sanitize_text(s: str, aggressive: bool = False) -> str:
     Returns:
         Sanitized string safe for Windows cp1252 encoding
     """
-    if not isinstance(s, str):
-        s = str(s)
-    
-    # Replace specific problematic Unicode characters with ASCII equivalents
-    for k, v in SAFE_REPLACEMENTS.items():
-        s = s.replace(k, v)
-    
-    # Remove unsafe control characters
-    s = UNSAFE_CONTROL_CHARS.sub("", s)
-    
-    # Handle remaining emojis and high Unicode characters
-    if SANITIZE_EMOJIS or aggressive:
-        # Replace any non-ASCII character with safe equivalent
-        def replace_unicode(match):
-            char = match.group(0)
-            # Try to find a descriptive replacement
-            if ord(char) > 0x1F600:  # Emoji range
-                return "[emoji]"
-            elif ord(char) > 0x007F:  # Non-ASCII
-                return "?"
-            return char
-        
-        s = re.sub(r"[^\x00-\x7F]", replace_unicode, s)
-    
-    if aggressive:
-        # Replace any char that isn't basic printable with space
-        s = "".join(ch if ord(ch) >= 32 and ord(ch) <= 126 else " " for ch in s)
-    
-    return s
+    return sanitize.sanitize_text(s, aggressive=aggressive, ascii_only=SANITIZE_EMOJIS)
 
 def write_text_file(path: str, content: str) -> None:
     """
@@ -102,53 +63,61 @@ def write_text_file(path: str, content: str) -> None:
         raise IOError(f"Cannot write file {path}: {e}") from e
 
 
-def convert(image_path: str, target: str) -> str:
+# Folder name of each pack when it is written out as a directory tree
+PACK_DIRNAMES = {
+    'DJANGO': 'django_pack',
+    'NEXTJS': 'next_pack',
+}
+
+
+def _stage(timer, name):
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+def build_pack(image_path: str, target: str, timer=None, analysis: dict | None = None) -> list:
     """
-    Convert an image to a template pack with comprehensive error handling.
+    Convert an image to the files of a template pack, without touching disk.
     
     Args:
         image_path (str): Path to the uploaded image
         target (str): Either 'DJANGO' or 'NEXTJS'
+        timer: Optional object whose `stage(name)` context manager times
+            the 'analyze' and 'generate' steps
+        analysis (dict): Stored image_analysis record for this image, to
+            skip decoding it again
     
     Returns:
-        str: Path to the generated template folder
+        list: (arcname, content) tuples, arcnames relative to the pack root
         
     Raises:
         ValueError: For invalid target values
-        IOError: For file system errors
-        UnicodeError: For encoding issues (now handled internally)
+        IOError: For conversion errors
     """
     print(f"Starting conversion for image: {image_path}, target: {target}")
     
     try:
-        # Analyze image for basic properties
-        try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                aspect_ratio = width / height
-                print(f"Image dimensions: {width}x{height}, aspect ratio: {aspect_ratio:.2f}")
-        except Exception as e:
-            print(f"Warning: Could not analyze image ({e}), using defaults")
-            width, height = 1200, 800
-            aspect_ratio = 1.5
+        if analysis is None:
+            with _stage(timer, 'analyze'):
+                analysis = image_analysis.analyze(image_path)
+        width, height, aspect_ratio = analysis['width'], analysis['height'], analysis['aspect_ratio']
         
-        # Create temp directory
-        temp_dir = tempfile.mkdtemp()
-        print(f"Created temp directory: {temp_dir}")
+        with _stage(timer, 'generate'):
+            layout = {
+                'sections': analysis.get('sections'),
+                'feature_columns': analysis.get('feature_columns'),
+                'theme': analysis.get('theme'),
+            }
+            if target == 'DJANGO':
+                members = _generate_django_pack(width, height, aspect_ratio, **layout)
+            elif target == 'NEXTJS':
+                members = _generate_nextjs_pack(width, height, aspect_ratio, **layout)
+            else:
+                error_msg = f"Unknown target: {target}. Must be 'DJANGO' or 'NEXTJS'"
+                print(f"Error: {error_msg}")
+                raise ValueError(error_msg)
         
-        # Generate template pack with error handling
-        if target == 'DJANGO':
-            result = _generate_django_pack(temp_dir, width, height, aspect_ratio)
-            print(f"Successfully generated Django pack at: {result}")
-            return result
-        elif target == 'NEXTJS':
-            result = _generate_nextjs_pack(temp_dir, width, height, aspect_ratio)
-            print(f"Successfully generated Next.js pack at: {result}")
-            return result
-        else:
-            error_msg = f"Unknown target: {target}. Must be 'DJANGO' or 'NEXTJS'"
-            print(f"Error: {error_msg}")
-            raise ValueError(error_msg)
+        print(f"Successfully generated {target} pack ({len(members)} files)")
+        return members
             
     except UnicodeEncodeError as e:
         error_msg = f"Unicode encoding error during conversion: {e}. Character '{e.object[e.start:e.end]}' cannot be encoded in {e.encoding}"
@@ -169,71 +138,172 @@ def convert(image_path: str, target: str) -> str:
         raise IOError(error_msg) from e
 
 
-def _generate_django_pack(base_dir: str, width: int, height: int, aspect_ratio: float) -> str:
-    """Generate Django template pack"""
-    pack_dir = os.path.join(base_dir, 'django_pack')
-    
-    # Create directory structure
-    templates_dir = os.path.join(pack_dir, 'templates', 'main')
-    partials_dir = os.path.join(templates_dir, 'partials')
-    static_dir = os.path.join(pack_dir, 'static', 'main', 'css')
-    
-    os.makedirs(templates_dir, exist_ok=True)
-    os.makedirs(partials_dir, exist_ok=True)
-    os.makedirs(static_dir, exist_ok=True)
+def write_pack_tree(members: list, target: str, base_dir: str) -> str:
+    """Write pack members out as a directory tree and return the pack folder."""
+    pack_dir = os.path.join(base_dir, PACK_DIRNAMES[target])
+    for arcname, content in members:
+        write_text_file(os.path.join(pack_dir, *arcname.split('/')), content)
+    return pack_dir
+
+
+def convert(image_path: str, target: str) -> str:
+    """
+    Convert an image to a template pack written to a temp folder.
     
-    # Determine grid layout based on aspect ratio
-    if aspect_ratio > 1.5:  # Wide layout
-        sections = ['hero', 'features-grid', 'cta']
-    elif aspect_ratio < 0.8:  # Tall layout
-        sections = ['hero', 'features-list', 'testimonials', 'cta']
-    else:  # Standard layout
-        sections = ['hero', 'features-grid', 'cta']
+    The API builds zips straight from build_pack(); this is kept for
+    debugging the generated files on disk.
     
-    # Generate index.html
-    index_html = f'''<!DOCTYPE html>
+    Returns:
+        str: Path to the generated template folder
+    """
+    members = build_pack(image_path, target)
+    temp_dir = tempfile.mkdtemp()
+    print(f"Created temp directory: {temp_dir}")
+    return write_pack_tree(members, target, temp_dir)
+
+
+# Slots in pack fragments are written ${name}; nothing else in the
+# generated files uses that syntax
+FRAGMENT_SLOT = re.compile(r'\$\{(\w+)\}')
+
+
+class Fragment:
+    """
+    A pack file compiled once into its static text and `${name}` slots.
+
+    The static text is sanitized when the module is imported, so a job
+    only sanitizes and joins in its own slot values.
+    """
+
+    def __init__(self, source: str):
+        parts = FRAGMENT_SLOT.split(source)
+        self.static = [sanitize_text(part) for part in parts[0::2]]
+        self.slots = parts[1::2]
+
+    def render(self, **values) -> str:
+        out = [self.static[0]]
+        for slot, text in zip(self.slots, self.static[1:]):
+            out.append(sanitize_text(values[slot]))
+            out.append(text)
+        return ''.join(out)
+
+
+def _theme_classes(theme: dict = None) -> dict:
+    """
+    Tailwind classes for the colored parts of a pack: the built-in blue
+    and purple, or arbitrary-value classes with the screenshot's brand
+    colors when image_analysis found some.
+    """
+    if not theme:
+        return {
+            'hero': 'from-blue-600 to-purple-600',
+            'hero_button': 'text-blue-600',
+            'icon': 'text-blue-600',
+            'cta_button': 'bg-blue-600 px-8 py-3 rounded-lg font-semibold hover:bg-blue-700',
+        }
+    primary, secondary, accent = theme['primary_color'], theme['secondary_color'], theme['accent_color']
+    return {
+        'hero': f'from-[{primary}] to-[{secondary}]',
+        'hero_button': f'text-[{primary}]',
+        'icon': f'text-[{accent}]',
+        'cta_button': f'bg-[{primary}] px-8 py-3 rounded-lg font-semibold hover:opacity-90',
+    }
+
+
+# Generated block for each section name image_analysis reports
+SECTION_BLOCKS = {
+    'hero': 'hero',
+    'features-grid': 'features',
+    'features-list': 'features',
+    'testimonials': 'testimonials',
+    'content': 'content',
+    'cta': 'cta',
+}
+
+# Blocks are separated by a blank line
+SECTION_SEPARATOR = '\n        \n'
+
+
+def _render_sections(blocks: dict, sections: list, feature_columns: int = None, **values) -> str:
+    """
+    The block of each section in `sections`, in page order. Sections
+    without a block are left out; feature grids get `feature_columns`
+    columns (3 when unknown), feature lists one.
+    """
+    rendered = []
+    for section in sections:
+        block = blocks.get(SECTION_BLOCKS.get(section))
+        if block is None:
+            continue
+        if section == 'features-list':
+            features_classes = 'grid gap-6 max-w-3xl mx-auto'
+        else:
+            features_classes = f'grid md:grid-cols-{feature_columns or 3} gap-8'
+        rendered.append(block.render(features_classes=features_classes, **values))
+    return SECTION_SEPARATOR.join(rendered)
+
+
+def _default_sections(aspect_ratio: float) -> list:
+    """Sections by aspect ratio, for screenshots without detected ones."""
+    return image_analysis.LAYOUT_SECTIONS[image_analysis.classify_layout(aspect_ratio)]
+
+
+# Django pack files
+
+# The page around its sections, see DJANGO_SECTIONS
+DJANGO_INDEX_HEAD = sanitize_text('''<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{{{ title|default:"Main Template" }}}}</title>
+    <title>{{ title|default:"Main Template" }}</title>
     <script src="https://cdn.tailwindcss.com"></script>
-    <link rel="stylesheet" href="{{{{ STATIC_URL }}}}main/css/custom.css">
+    <link rel="stylesheet" href="{{ STATIC_URL }}main/css/custom.css">
 </head>
 <body class="bg-gray-50">
-    {{% include 'main/partials/header.html' %}}
+    {% include 'main/partials/header.html' %}
     
     <main>
-        <!-- TODO: map to JCW section IDs: jcw-main-hero1 -->
-        <section class="hero bg-gradient-to-r from-blue-600 to-purple-600 text-white py-20">
+''')
+
+DJANGO_INDEX_TAIL = sanitize_text('''
+    </main>
+    
+    {% include 'main/partials/footer.html' %}
+</body>
+</html>''')
+
+# One block per section name (see SECTION_BLOCKS)
+DJANGO_SECTIONS = {
+    'hero': Fragment('''        <!-- TODO: map to JCW section IDs: jcw-main-hero1 -->
+        <section class="hero bg-gradient-to-r ${hero_classes} text-white py-20">
             <div class="container mx-auto px-4 text-center">
-                <h1 class="text-4xl md:text-6xl font-bold mb-6">{{{{ hero_title|default:"Welcome to Our Platform" }}}}</h1>
-                <p class="text-xl mb-8">{{{{ hero_subtitle|default:"Build amazing experiences with our cutting-edge technology" }}}}</p>
-                <a href="#" class="bg-white text-blue-600 px-8 py-3 rounded-lg font-semibold hover:bg-gray-100 transition-colors">
-                    {{{{ cta_text|default:"Get Started" }}}}
+                <h1 class="text-4xl md:text-6xl font-bold mb-6">{{ hero_title|default:"Welcome to Our Platform" }}</h1>
+                <p class="text-xl mb-8">{{ hero_subtitle|default:"Build amazing experiences with our cutting-edge technology" }}</p>
+                <a href="#" class="bg-white ${hero_button_classes} px-8 py-3 rounded-lg font-semibold hover:bg-gray-100 transition-colors">
+                    {{ cta_text|default:"Get Started" }}
                 </a>
             </div>
-        </section>
-        
-        <!-- TODO: map to JCW section IDs: jcw-main-features1 -->
+        </section>'''),
+    'features': Fragment('''        <!-- TODO: map to JCW section IDs: jcw-main-features1 -->
         <section class="features py-16">
             <div class="container mx-auto px-4">
-                <h2 class="text-3xl font-bold text-center mb-12">{{{{ features_title|default:"Our Features" }}}}</h2>
-                <div class="grid md:grid-cols-{len(sections)} gap-8">
-                    {{% for feature in features %}}
+                <h2 class="text-3xl font-bold text-center mb-12">{{ features_title|default:"Our Features" }}</h2>
+                <div class="${features_classes}">
+                    {% for feature in features %}
                     <div class="text-center p-6 bg-white rounded-lg shadow-md">
                         <div class="w-16 h-16 bg-blue-100 rounded-full mx-auto mb-4 flex items-center justify-center">
-                            <svg class="w-8 h-8 text-blue-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                            <svg class="w-8 h-8 ${icon_classes}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                                 <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 10V3L4 14h7v7l9-11h-7z"></path>
                             </svg>
                         </div>
-                        <h3 class="text-xl font-semibold mb-2">{{{{ feature.title }}}}</h3>
-                        <p class="text-gray-600">{{{{ feature.description }}}}</p>
+                        <h3 class="text-xl font-semibold mb-2">{{ feature.title }}</h3>
+                        <p class="text-gray-600">{{ feature.description }}</p>
                     </div>
-                    {{% empty %}}
+                    {% empty %}
                     <div class="text-center p-6 bg-white rounded-lg shadow-md">
                         <div class="w-16 h-16 bg-blue-100 rounded-full mx-auto mb-4 flex items-center justify-center">
-                            <svg class="w-8 h-8 text-blue-600" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                            <svg class="w-8 h-8 ${icon_classes}" fill="none" stroke="currentColor" viewBox="0 0 24 24">
                                 <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 10V3L4 14h7v7l9-11h-7z"></path>
                             </svg>
                         </div>
@@ -258,29 +328,53 @@ def _generate_django_pack(base_dir: str, width: int, height: int, aspect_ratio:
                         <h3 class="text-xl font-semibold mb-2">Secure</h3>
                         <p class="text-gray-600">Enterprise-grade security to protect your data</p>
                     </div>
-                    {{% endfor %}}
+                    {% endfor %}
                 </div>
             </div>
-        </section>
-        
-        <!-- TODO: map to JCW section IDs: jcw-main-cta1 -->
+        </section>'''),
+    'testimonials': Fragment('''        <!-- TODO: map to JCW section IDs: jcw-main-testimonials1 -->
+        <section class="testimonials bg-white py-16">
+            <div class="container mx-auto px-4">
+                <h2 class="text-3xl font-bold text-center mb-12">{{ testimonials_title|default:"What Our Customers Say" }}</h2>
+                <div class="grid md:grid-cols-2 gap-8">
+                    {% for testimonial in testimonials %}
+                    <blockquote class="p-6 bg-gray-50 rounded-lg shadow-md">
+                        <p class="text-gray-700 mb-4">{{ testimonial.quote }}</p>
+                        <footer class="font-semibold">{{ testimonial.author }}</footer>
+                    </blockquote>
+                    {% empty %}
+                    <blockquote class="p-6 bg-gray-50 rounded-lg shadow-md">
+                        <p class="text-gray-700 mb-4">The platform made our launch faster than we thought possible.</p>
+                        <footer class="font-semibold">Alex, Product Lead</footer>
+                    </blockquote>
+                    <blockquote class="p-6 bg-gray-50 rounded-lg shadow-md">
+                        <p class="text-gray-700 mb-4">Support was quick and our site has never been more reliable.</p>
+                        <footer class="font-semibold">Sam, Founder</footer>
+                    </blockquote>
+                    {% endfor %}
+                </div>
+            </div>
+        </section>'''),
+    'content': Fragment('''        <!-- TODO: map to JCW section IDs: jcw-main-content1 -->
+        <section class="content py-16">
+            <div class="container mx-auto px-4 max-w-3xl">
+                <h2 class="text-3xl font-bold mb-4">{{ content_title|default:"About Us" }}</h2>
+                <p class="text-gray-600">{{ content_text|default:"Tell your visitors who you are and what you do." }}</p>
+            </div>
+        </section>'''),
+    'cta': Fragment('''        <!-- TODO: map to JCW section IDs: jcw-main-cta1 -->
         <section class="cta bg-gray-800 text-white py-16">
             <div class="container mx-auto px-4 text-center">
-                <h2 class="text-3xl font-bold mb-4">{{{{ cta_title|default:"Ready to Get Started?" }}}}</h2>
-                <p class="text-xl mb-8">{{{{ cta_subtitle|default:"Join thousands of satisfied customers today" }}}}</p>
-                <a href="#" class="bg-blue-600 px-8 py-3 rounded-lg font-semibold hover:bg-blue-700 transition-colors">
-                    {{{{ cta_button|default:"Start Free Trial" }}}}
+                <h2 class="text-3xl font-bold mb-4">{{ cta_title|default:"Ready to Get Started?" }}</h2>
+                <p class="text-xl mb-8">{{ cta_subtitle|default:"Join thousands of satisfied customers today" }}</p>
+                <a href="#" class="${cta_button_classes} transition-colors">
+                    {{ cta_button|default:"Start Free Trial" }}
                 </a>
             </div>
-        </section>
-    </main>
-    
-    {{% include 'main/partials/footer.html' %}}
-</body>
-</html>'''
-    
-    # Generate header partial
-    header_html = '''<header class="bg-white shadow-sm">
+        </section>'''),
+}
+
+DJANGO_HEADER_HTML = '''<header class="bg-white shadow-sm">
     <div class="container mx-auto px-4 py-4">
         <nav class="flex items-center justify-between">
             <div class="flex items-center">
@@ -302,9 +396,8 @@ def _generate_django_pack(base_dir: str, width: int, height: int, aspect_ratio:
         </nav>
     </div>
 </header>'''
-    
-    # Generate footer partial
-    footer_html = '''<footer class="bg-gray-800 text-white py-8">
+
+DJANGO_FOOTER_HTML = '''<footer class="bg-gray-800 text-white py-8">
     <div class="container mx-auto px-4">
         <div class="grid md:grid-cols-3 gap-8">
             <div>
@@ -331,9 +424,8 @@ def _generate_django_pack(base_dir: str, width: int, height: int, aspect_ratio:
         </div>
     </div>
 </footer>'''
-    
-    # Generate custom CSS
-    custom_css = '''/* Custom styles for main template */
+
+DJANGO_CUSTOM_CSS = '''/* Custom styles for main template */
 .hero {
     background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
 }
@@ -360,9 +452,8 @@ def _generate_django_pack(base_dir: str, width: int, height: int, aspect_ratio:
         padding: 2rem 0;
     }
 }'''
-    
-    # Generate views.py
-    views_py = '''from django.shortcuts import render
+
+DJANGO_VIEWS_PY = '''from django.shortcuts import render
 
 
 def main_index(request):
@@ -379,9 +470,8 @@ def main_index(request):
         'contact_phone': '+1 (555) 123-4567',
     }
     return render(request, 'main/index.html', context)'''
-    
-    # Generate urls.py
-    urls_py = '''from django.urls import path
+
+DJANGO_URLS_PY = '''from django.urls import path
 from . import views
 
 app_name = 'main'
@@ -389,11 +479,10 @@ app_name = 'main'
 urlpatterns = [
     path('', views.main_index, name='main_index'),
 ]'''
-    
-    # Generate README.md
-    readme_md = f'''# Django Template Pack
 
-Generated from uploaded image with dimensions: {width}x{height}
+DJANGO_README_MD = Fragment('''# Django Template Pack
+
+Generated from uploaded image with dimensions: ${width}x${height}
 
 ## Installation
 
@@ -419,14 +508,14 @@ Generated from uploaded image with dimensions: {width}x{height}
 4. Update TEMPLATES setting to include this template directory:
    ```python
    TEMPLATES = [
-       {{
+       {
            'BACKEND': 'django.template.backends.django.DjangoTemplates',
            'DIRS': [
                # ... other dirs
                os.path.join(BASE_DIR, 'templates'),
            ],
            # ... rest of config
-       }},
+       },
    ]
    ```
 
@@ -452,35 +541,49 @@ Context variables you can pass to customize content:
 - `site_name` - Site name in header/footer
 - `contact_email` - Footer contact email
 - `contact_phone` - Footer contact phone
-'''
-    
-    # Write files with UTF-8 encoding using helper function
-    write_text_file(os.path.join(templates_dir, 'index.html'), sanitize_text(index_html))
-    write_text_file(os.path.join(partials_dir, 'header.html'), sanitize_text(header_html))
-    write_text_file(os.path.join(partials_dir, 'footer.html'), sanitize_text(footer_html))
-    write_text_file(os.path.join(static_dir, 'custom.css'), sanitize_text(custom_css))
-    write_text_file(os.path.join(pack_dir, 'views.py'), sanitize_text(views_py))
-    write_text_file(os.path.join(pack_dir, 'urls.py'), sanitize_text(urls_py))
-    write_text_file(os.path.join(pack_dir, 'README.md'), sanitize_text(readme_md))
-    
-    return pack_dir
-
-
-def _generate_nextjs_pack(base_dir: str, width: int, height: int, aspect_ratio: float) -> str:
-    """Generate Next.js template pack"""
-    pack_dir = os.path.join(base_dir, 'next_pack')
-    
-    # Create directory structure
-    app_dir = os.path.join(pack_dir, 'app', '(main)')
-    components_dir = os.path.join(pack_dir, 'components', 'Main')
-    public_dir = os.path.join(pack_dir, 'public', 'main')
-    
-    os.makedirs(app_dir, exist_ok=True)
-    os.makedirs(components_dir, exist_ok=True)
-    os.makedirs(public_dir, exist_ok=True)
-    
-    # Generate page.tsx
-    page_tsx = '''import { Header } from '@/components/Main/Header'
+''')
+
+# Files that are the same in every Django pack, sanitized once
+DJANGO_STATIC_MEMBERS = [
+    ('templates/main/partials/header.html', sanitize_text(DJANGO_HEADER_HTML)),
+    ('templates/main/partials/footer.html', sanitize_text(DJANGO_FOOTER_HTML)),
+    ('static/main/css/custom.css', sanitize_text(DJANGO_CUSTOM_CSS)),
+    ('views.py', sanitize_text(DJANGO_VIEWS_PY)),
+    ('urls.py', sanitize_text(DJANGO_URLS_PY)),
+]
+
+
+def _generate_django_pack(width: int, height: int, aspect_ratio: float,
+                          sections: list = None, feature_columns: int = None,
+                          theme: dict = None) -> list:
+    """Generate Django template pack as (arcname, content) members"""
+    # Lay the page out by aspect ratio, unless the sections were detected
+    # from the screenshot
+    if sections is None:
+        sections = _default_sections(aspect_ratio)
+    colors = _theme_classes(theme)
+
+    body = _render_sections(
+        DJANGO_SECTIONS, sections, feature_columns,
+        hero_classes=colors['hero'],
+        hero_button_classes=colors['hero_button'],
+        icon_classes=colors['icon'],
+        cta_button_classes=colors['cta_button'],
+    )
+    index_html = DJANGO_INDEX_HEAD + body + DJANGO_INDEX_TAIL
+    readme_md = DJANGO_README_MD.render(width=width, height=height)
+
+    return [
+        ('templates/main/index.html', index_html),
+        *DJANGO_STATIC_MEMBERS,
+        ('README.md', readme_md),
+    ]
+
+
+# Next.js pack files
+
+# The page around its sections, see NEXTJS_SECTIONS
+NEXTJS_PAGE_HEAD = sanitize_text('''import { Header } from '@/components/Main/Header'
 import { Footer } from '@/components/Main/Footer'
 
 export default function MainPage() {
@@ -507,8 +610,20 @@ export default function MainPage() {
       <Header />
       
       <main>
-        {/* Hero Section */}
-        <section className="bg-gradient-to-r from-blue-600 to-purple-600 text-white py-20">
+''')
+
+NEXTJS_PAGE_TAIL = sanitize_text('''
+      </main>
+      
+      <Footer />
+    </div>
+  )
+}''')
+
+# One block per section name (see SECTION_BLOCKS)
+NEXTJS_SECTIONS = {
+    'hero': Fragment('''        {/* Hero Section */}
+        <section className="bg-gradient-to-r ${hero_classes} text-white py-20">
           <div className="container mx-auto px-4 text-center">
             <h1 className="text-4xl md:text-6xl font-bold mb-6">
               Welcome to Our Platform
@@ -516,17 +631,16 @@ export default function MainPage() {
             <p className="text-xl mb-8">
               Build amazing experiences with our cutting-edge technology
             </p>
-            <button className="bg-white text-blue-600 px-8 py-3 rounded-lg font-semibold hover:bg-gray-100 transition-colors">
+            <button className="bg-white ${hero_button_classes} px-8 py-3 rounded-lg font-semibold hover:bg-gray-100 transition-colors">
               Get Started
             </button>
           </div>
-        </section>
-        
-        {/* Features Section */}
+        </section>'''),
+    'features': Fragment('''        {/* Features Section */}
         <section className="py-16">
           <div className="container mx-auto px-4">
             <h2 className="text-3xl font-bold text-center mb-12">Our Features</h2>
-            <div className="grid md:grid-cols-3 gap-8">
+            <div className="${features_classes}">
               {features.map((feature, index) => (
                 <div key={index} className="text-center p-6 bg-white rounded-lg shadow-md">
                   <div className="text-4xl mb-4">{feature.icon}</div>
@@ -536,27 +650,43 @@ export default function MainPage() {
               ))}
             </div>
           </div>
-        </section>
-        
-        {/* CTA Section */}
+        </section>'''),
+    'testimonials': Fragment('''        {/* Testimonials Section */}
+        <section className="bg-white py-16">
+          <div className="container mx-auto px-4">
+            <h2 className="text-3xl font-bold text-center mb-12">What Our Customers Say</h2>
+            <div className="grid md:grid-cols-2 gap-8">
+              <blockquote className="p-6 bg-gray-50 rounded-lg shadow-md">
+                <p className="text-gray-700 mb-4">The platform made our launch faster than we thought possible.</p>
+                <footer className="font-semibold">Alex, Product Lead</footer>
+              </blockquote>
+              <blockquote className="p-6 bg-gray-50 rounded-lg shadow-md">
+                <p className="text-gray-700 mb-4">Support was quick and our site has never been more reliable.</p>
+                <footer className="font-semibold">Sam, Founder</footer>
+              </blockquote>
+            </div>
+          </div>
+        </section>'''),
+    'content': Fragment('''        {/* Content Section */}
+        <section className="py-16">
+          <div className="container mx-auto px-4 max-w-3xl">
+            <h2 className="text-3xl font-bold mb-4">About Us</h2>
+            <p className="text-gray-600">Tell your visitors who you are and what you do.</p>
+          </div>
+        </section>'''),
+    'cta': Fragment('''        {/* CTA Section */}
         <section className="bg-gray-800 text-white py-16">
           <div className="container mx-auto px-4 text-center">
             <h2 className="text-3xl font-bold mb-4">Ready to Get Started?</h2>
             <p className="text-xl mb-8">Join thousands of satisfied customers today</p>
-            <button className="bg-blue-600 px-8 py-3 rounded-lg font-semibold hover:bg-blue-700 transition-colors">
+            <button className="${cta_button_classes} transition-colors">
               Start Free Trial
             </button>
           </div>
-        </section>
-      </main>
-      
-      <Footer />
-    </div>
-  )
-}'''
-    
-    # Generate layout.tsx
-    layout_tsx = '''export default function MainLayout({
+        </section>'''),
+}
+
+NEXTJS_LAYOUT_TSX = '''export default function MainLayout({
   children,
 }: {
   children: React.ReactNode
@@ -567,9 +697,8 @@ export default function MainPage() {
     </div>
   )
 }'''
-    
-    # Generate Header component
-    header_tsx = '''export function Header() {
+
+NEXTJS_HEADER_TSX = '''export function Header() {
   return (
     <header className="bg-white shadow-sm">
       <div className="container mx-auto px-4 py-4">
@@ -595,9 +724,8 @@ export default function MainPage() {
     </header>
   )
 }'''
-    
-    # Generate Footer component
-    footer_tsx = '''export function Footer() {
+
+NEXTJS_FOOTER_TSX = '''export function Footer() {
   return (
     <footer className="bg-gray-800 text-white py-8">
       <div className="container mx-auto px-4">
@@ -632,11 +760,10 @@ export default function MainPage() {
     </footer>
   )
 }'''
-    
-    # Generate README.md
-    readme_md = f'''# Next.js Template Pack
 
-Generated from uploaded image with dimensions: {width}x{height}
+NEXTJS_README_MD = Fragment('''# Next.js Template Pack
+
+Generated from uploaded image with dimensions: ${width}x${height}
 
 ## Installation
 
@@ -645,16 +772,16 @@ Generated from uploaded image with dimensions: {width}x{height}
 3. Update your `tailwind.config.js` to include the new paths:
 
 ```javascript
-module.exports = {{
+module.exports = {
   content: [
-    './pages/**/*.{{js,ts,jsx,tsx,mdx}}',
-    './components/**/*.{{js,ts,jsx,tsx,mdx}}',
-    './app/**/*.{{js,ts,jsx,tsx,mdx}}',
+    './pages/**/*.{js,ts,jsx,tsx,mdx}',
+    './components/**/*.{js,ts,jsx,tsx,mdx}',
+    './app/**/*.{js,ts,jsx,tsx,mdx}',
     // Add if you moved files to different locations:
-    './components/Main/**/*.{{js,ts,jsx,tsx,mdx}}',
+    './components/Main/**/*.{js,ts,jsx,tsx,mdx}',
   ],
   // ... rest of config
-}}
+}
 ```
 
 4. Copy files to your project:
@@ -687,21 +814,44 @@ To test the template:
 1. Copy files into a fresh Next.js project
 2. Run `npm run build` to ensure everything compiles
 3. Run `npm run dev` to see it in action
-'''
-    
-    # Create a placeholder preview image
-    preview_content = '''# Preview Image Placeholder
+''')
+
+# Placeholder for a preview screenshot of the generated template
+NEXTJS_PREVIEW_TXT = Fragment('''# Preview Image Placeholder
 This would contain a preview screenshot of the generated template.
-Image dimensions: {width}x{height}
-Aspect ratio: {aspect_ratio:.2f}
-'''.format(width=width, height=height, aspect_ratio=aspect_ratio)
-    
-    # Write files with UTF-8 encoding using helper function
-    write_text_file(os.path.join(app_dir, 'page.tsx'), sanitize_text(page_tsx))
-    write_text_file(os.path.join(app_dir, 'layout.tsx'), sanitize_text(layout_tsx))
-    write_text_file(os.path.join(components_dir, 'Header.tsx'), sanitize_text(header_tsx))
-    write_text_file(os.path.join(components_dir, 'Footer.tsx'), sanitize_text(footer_tsx))
-    write_text_file(os.path.join(public_dir, 'preview.txt'), sanitize_text(preview_content))
-    write_text_file(os.path.join(pack_dir, 'README.md'), sanitize_text(readme_md))
-    
-    return pack_dir
\ No newline at end of file
+Image dimensions: ${width}x${height}
+Aspect ratio: ${aspect_ratio}
+''')
+
+# Files that are the same in every Next.js pack, sanitized once
+NEXTJS_STATIC_MEMBERS = [
+    ('app/(main)/layout.tsx', sanitize_text(NEXTJS_LAYOUT_TSX)),
+    ('components/Main/Header.tsx', sanitize_text(NEXTJS_HEADER_TSX)),
+    ('components/Main/Footer.tsx', sanitize_text(NEXTJS_FOOTER_TSX)),
+]
+
+
+def _generate_nextjs_pack(width: int, height: int, aspect_ratio: float,
+                          sections: list = None, feature_columns: int = None,
+                          theme: dict = None) -> list:
+    """Generate Next.js template pack as (arcname, content) members"""
+    if sections is None:
+        sections = _default_sections(aspect_ratio)
+    colors = _theme_classes(theme)
+
+    body = _render_sections(
+        NEXTJS_SECTIONS, sections, feature_columns,
+        hero_classes=colors['hero'],
+        hero_button_classes=colors['hero_button'],
+        cta_button_classes=colors['cta_button'],
+    )
+    page_tsx = NEXTJS_PAGE_HEAD + body + NEXTJS_PAGE_TAIL
+    preview_txt = NEXTJS_PREVIEW_TXT.render(width=width, height=height, aspect_ratio=f'{aspect_ratio:.2f}')
+    readme_md = NEXTJS_README_MD.render(width=width, height=height)
+
+    return [
+        ('app/(main)/page.tsx', page_tsx),
+        *NEXTJS_STATIC_MEMBERS,
+        ('public/main/preview.txt', preview_txt),
+        ('README.md', readme_md),
+    ]
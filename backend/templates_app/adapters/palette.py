@@ -0,0 +1,208 @@
+"""
+Color palette extraction for screenshots and logos.
+
+The image is shrunk to at most SAMPLE_SIZE pixels a side and its opaque
+pixels are clustered with k-means in RGB. The clustering runs on the
+image's unique colors weighted by how often they occur, so flat artwork
+like a logo (a few hundred distinct colors at most) costs next to
+nothing; every step is a vectorized NumPy operation over the whole
+sample. Seeding is k-means++ with a fixed RNG seed, so the same image
+always gives the same palette.
+
+Without NumPy, extract_palette() falls back to Pillow's median-cut
+quantizer, which gives a similar if slightly coarser result.
+
+assign_roles() turns a palette into the four BrandProfile colors.
+"""
+import math
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Bump when the output of extract_palette/assign_roles changes, so cached
+# palettes are recomputed
+PALETTE_VERSION = 1
+
+SAMPLE_SIZE = (96, 96)
+PALETTE_SIZE = 5
+MAX_ITERATIONS = 20
+# Stop once no center moves by more than this (RGB units)
+CONVERGENCE = 0.5
+# Centers closer than this (RGB distance) are reported as one color
+MERGE_DISTANCE = 24
+# Pixels more transparent than this are the logo's background, not a color
+ALPHA_CUTOFF = 128
+# Share of transparent pixels above which the background is taken as white
+TRANSPARENT_BACKGROUND = 0.2
+
+# Colors with less chroma than this are treated as neutrals
+NEUTRAL_CHROMA = 0.2
+
+DEFAULT_BACKGROUND = '#ffffff'
+
+
+def to_hex(rgb) -> str:
+    return '#{:02x}{:02x}{:02x}'.format(*(int(round(min(max(c, 0), 255))) for c in rgb))
+
+
+def from_hex(value: str) -> tuple:
+    value = value.lstrip('#')
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _sample(img: Image.Image) -> Image.Image:
+    sample = img.convert('RGBA')
+    sample.thumbnail(SAMPLE_SIZE)
+    return sample
+
+
+def _kmeans(colors, weights, k: int):
+    """Weighted k-means over `colors` (n x 3 floats). Returns (centers, labels)."""
+    rng = np.random.default_rng(0)
+
+    # k-means++: each next seed is picked with probability proportional to
+    # its (weighted) squared distance from the seeds so far
+    centers = [colors[np.argmax(weights)]]
+    closest = ((colors - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        p = closest * weights
+        if p.sum() <= 0:
+            break
+        centers.append(colors[rng.choice(len(colors), p=p / p.sum())])
+        closest = np.minimum(closest, ((colors - centers[-1]) ** 2).sum(axis=1))
+    centers = np.array(centers)
+
+    for _ in range(MAX_ITERATIONS):
+        distances = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        mass = np.bincount(labels, weights=weights, minlength=len(centers))
+        sums = np.stack([
+            np.bincount(labels, weights=weights * colors[:, channel], minlength=len(centers))
+            for channel in range(3)
+        ], axis=1)
+        # An emptied cluster keeps its old center
+        updated = np.where(mass[:, None] > 0, sums / np.maximum(mass, 1e-9)[:, None], centers)
+        shift = np.abs(updated - centers).max()
+        centers = updated
+        if shift < CONVERGENCE:
+            break
+
+    labels = ((colors[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+    return centers, labels
+
+
+def _merge(entries):
+    """Fold (rgb, weight) entries closer than MERGE_DISTANCE into the heavier one."""
+    merged = []
+    for rgb, weight in sorted(entries, key=lambda entry: -entry[1]):
+        for entry in merged:
+            if math.dist(entry[0], rgb) < MERGE_DISTANCE:
+                entry[1] += weight
+                break
+        else:
+            merged.append([rgb, weight])
+    return [{'color': to_hex(rgb), 'weight': round(float(weight), 4)} for rgb, weight in merged]
+
+
+def _kmeans_palette(sample: Image.Image, count: int):
+    pixels = np.asarray(sample, dtype=np.uint8).reshape(-1, 4)
+    opaque = pixels[pixels[:, 3] >= ALPHA_CUTOFF, :3]
+    transparent = 1 - len(opaque) / max(len(pixels), 1)
+    if len(opaque) == 0:
+        return [], transparent
+
+    colors, counts = np.unique(opaque, axis=0, return_counts=True)
+    colors = colors.astype(np.float64)
+    weights = counts.astype(np.float64)
+    centers, labels = _kmeans(colors, weights, min(count, len(colors)))
+    mass = np.bincount(labels, weights=weights, minlength=len(centers))
+
+    total = weights.sum()
+    return _merge([(tuple(center), m / total) for center, m in zip(centers.tolist(), mass.tolist()) if m > 0]), transparent
+
+
+def _mediancut_palette(sample: Image.Image, count: int):
+    pixels = list(sample.getdata())
+    opaque = [pixel[:3] for pixel in pixels if pixel[3] >= ALPHA_CUTOFF]
+    transparent = 1 - len(opaque) / max(len(pixels), 1)
+    if not opaque:
+        return [], transparent
+
+    rgb = Image.new('RGB', (len(opaque), 1))
+    rgb.putdata(opaque)
+    quantized = rgb.quantize(colors=count, method=Image.Quantize.MEDIANCUT)
+    palette = quantized.getpalette()
+    return _merge([
+        (tuple(palette[index * 3:index * 3 + 3]), n / len(opaque))
+        for n, index in quantized.getcolors()
+    ]), transparent
+
+
+def extract_palette(img: Image.Image, count: int = PALETTE_SIZE) -> dict:
+    """
+    Cluster the colors of `img`.
+
+    Returns:
+        dict: `colors`, a list of {"color": "#rrggbb", "weight": share}
+        heaviest first (weights are shares of the opaque pixels), and
+        `transparent`, the share of pixels left out as transparent
+    """
+    sample = _sample(img)
+    if np is not None:
+        colors, transparent = _kmeans_palette(sample, count)
+    else:
+        colors, transparent = _mediancut_palette(sample, count)
+    return {'colors': colors, 'transparent': round(transparent, 4)}
+
+
+def chroma(color: str) -> float:
+    """Colorfulness in 0..1: the spread between the strongest and weakest channel."""
+    rgb = from_hex(color)
+    return (max(rgb) - min(rgb)) / 255
+
+
+def is_neutral(color: str) -> bool:
+    """White, black and grays, including tinted ones like slate."""
+    return chroma(color) < NEUTRAL_CHROMA
+
+
+def assign_roles(palette: dict) -> dict:
+    """
+    Pick primary/secondary/accent/background colors from a palette.
+
+    The background is white for logos that are mostly transparent,
+    otherwise the heaviest color when it is a neutral (white, black or
+    gray). The remaining colors are ranked by weight and chroma; the
+    accent is the most colorful of the rest, and with too few colors the
+    later roles reuse the earlier ones.
+    Returns an empty dict when the image has no usable colors.
+    """
+    colors = [entry['color'] for entry in palette.get('colors', [])]
+    weights = {entry['color']: entry['weight'] for entry in palette.get('colors', [])}
+    if not colors:
+        return {}
+
+    if palette.get('transparent', 0) > TRANSPARENT_BACKGROUND:
+        background = DEFAULT_BACKGROUND
+    elif is_neutral(colors[0]) and len(colors) > 1:
+        background = colors.pop(0)
+    else:
+        background = DEFAULT_BACKGROUND
+
+    # Prefer saturated colors for the brand roles, but let a dominant
+    # neutral (a black wordmark) still win over a tiny colored speck
+    ranked = sorted(colors, key=lambda c: -weights[c] * (0.25 + chroma(c)))
+    primary = ranked[0]
+    secondary = ranked[1] if len(ranked) > 1 else primary
+    rest = [c for c in ranked[2:] if not is_neutral(c)] or [secondary]
+    accent = max(rest, key=chroma)
+    return {
+        'primary_color': primary,
+        'secondary_color': secondary,
+        'accent_color': accent,
+        'background_color': background,
+    }
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TemplateUpload, ConversionJob, LibraryItem
+from .models import TemplateUpload, ConversionBatch, ConversionJob, ConversionJobLogChunk, ConversionCacheEntry, LibraryItem, LibraryTag
 
 
 @admin.register(TemplateUpload)
@@ -10,12 +10,35 @@ class TemplateUploadAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'created_at']
 
 
+@admin.register(ConversionBatch)
+class ConversionBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'created_at']
+    readonly_fields = ['id', 'created_at']
+
+
+class ConversionJobLogChunkInline(admin.TabularInline):
+    model = ConversionJobLogChunk
+    fields = ['offset', 'text', 'created_at']
+    readonly_fields = ['offset', 'text', 'created_at']
+    extra = 0
+    can_delete = False
+
+
 @admin.register(ConversionJob)
 class ConversionJobAdmin(admin.ModelAdmin):
     list_display = ['upload', 'target', 'status', 'created_at', 'updated_at']
     list_filter = ['target', 'status', 'created_at']
-    search_fields = ['upload__title', 'log']
-    readonly_fields = ['id', 'created_at', 'updated_at']
+    search_fields = ['upload__title', 'claimed_by', 'batch__id']
+    readonly_fields = ['id', 'timings', 'created_at', 'updated_at']
+    inlines = [ConversionJobLogChunkInline]
+
+
+@admin.register(ConversionCacheEntry)
+class ConversionCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ['image_sha256', 'target', 'converter_version', 'size', 'hit_count', 'last_used_at']
+    list_filter = ['target', 'converter_version']
+    search_fields = ['image_sha256', 'key']
+    readonly_fields = ['created_at', 'last_used_at']
 
 
 @admin.register(LibraryItem)
@@ -24,3 +47,9 @@ class LibraryItemAdmin(admin.ModelAdmin):
     list_filter = ['target', 'created_at']
     search_fields = ['name']
     readonly_fields = ['id', 'created_at']
+
+
+@admin.register(LibraryTag)
+class LibraryTagAdmin(admin.ModelAdmin):
+    list_display = ['name']
+    search_fields = ['name']
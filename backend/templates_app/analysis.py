@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from PIL import Image
+
+from . import blobs
+from .adapters import image_analysis, palette
+
+
+def get_analysis(upload, analyze=image_analysis.analyze):
+    """
+    Return the analysis record of an upload's image, decoding the image
+    only the first time (or after ANALYSIS_VERSION changes). The record is
+    kept on TemplateUpload.analysis and shared by every conversion target.
+    `analyze(path)` does the decoding, e.g. in the converter pool.
+    """
+    record = upload.analysis
+    if record and record.get('version') == image_analysis.ANALYSIS_VERSION:
+        return record
+
+    record = analyze(upload.image.path)
+    if record.get('fallback'):
+        # Don't remember a failed read; the file may be readable next time
+        return record
+
+    upload.analysis = record
+    type(upload).objects.filter(pk=upload.pk).update(analysis=record)
+    return record
+
+
+def get_palette(field_file, sha256=None):
+    """
+    Return the palette and brand colors of a stored image as
+    {"colors": [...], "transparent": ..., "roles": {...}}.
+
+    Results are kept in the cache under the image's SHA-256 (pass it in
+    when already known), so uploading the same logo again costs a hash.
+    """
+    if sha256 is None:
+        sha256 = blobs.file_sha256(field_file)
+    key = f'palette:{palette.PALETTE_VERSION}:{sha256}'
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    with field_file.open('rb') as f, Image.open(f) as img:
+        result = palette.extract_palette(img)
+    result['roles'] = palette.assign_roles(result)
+    # Keyed by content, so it never goes stale
+    cache.set(key, result, timeout=None)
+    return result
@@ -0,0 +1,42 @@
+"""
+Batch conversion: one request creates a job per upload × target.
+
+All jobs are inserted with a single bulk_create and run by the usual
+conversion workers, so a batch is spread over every worker process.
+Jobs of the same upload are claimed together by one worker (see
+worker.claim_batch_siblings), which analyzes the image once for all of
+its targets.
+"""
+from django.db import transaction
+from django.db.models import Count
+
+from .models import ConversionBatch, ConversionJob
+
+
+def create_batch(upload_ids, targets):
+    """Create a batch and its QUEUED jobs. Returns (batch, jobs)."""
+    with transaction.atomic():
+        batch = ConversionBatch.objects.create()
+        jobs = ConversionJob.objects.bulk_create([
+            ConversionJob(upload_id=upload_id, batch=batch, target=target, status='QUEUED')
+            for upload_id in upload_ids
+            for target in targets
+        ])
+    return batch, jobs
+
+
+def get_batch_progress(batch):
+    """Per-status job counts of a batch, from one GROUP BY query"""
+    counts = dict.fromkeys(('QUEUED', 'RUNNING', 'SUCCESS', 'ERROR'), 0)
+    for row in batch.jobs.order_by().values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+    total = sum(counts.values())
+    finished = counts['SUCCESS'] + counts['ERROR']
+    return {
+        'id': str(batch.id),
+        'created_at': batch.created_at,
+        'total': total,
+        'counts': counts,
+        'progress': round(finished / total, 4) if total else 1.0,
+        'done': finished == total,
+    }
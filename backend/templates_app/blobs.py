@@ -0,0 +1,49 @@
+"""
+Stored zip files shared between rows.
+
+Conversion jobs, cache entries and library items can all point at the
+same file under MEDIA_ROOT instead of holding their own copy. The rows
+themselves are the reference count: a file is only deleted once no row
+of any of these models refers to it any more.
+"""
+import hashlib
+
+from django.db import transaction
+
+from .models import ConversionJob, ConversionCacheEntry, LibraryItem
+
+REFERRING_MODELS = (ConversionJob, ConversionCacheEntry, LibraryItem)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(field_file):
+    """Hex SHA-256 of a stored file, read in chunks."""
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_referenced(name):
+    """Whether any row still points at the stored file `name`."""
+    return any(model.objects.filter(zip_file=name).exists() for model in REFERRING_MODELS)
+
+
+def release(field_file):
+    """
+    Drop a reference to `field_file` that is going away, deleting the
+    file once the surrounding transaction commits if nothing else uses it.
+    """
+    name = field_file.name
+    storage = field_file.storage
+    if not name:
+        return
+
+    def delete_if_unreferenced():
+        if not is_referenced(name):
+            storage.delete(name)
+            print(f"Deleted unreferenced file {name}")
+
+    transaction.on_commit(delete_if_unreferenced)
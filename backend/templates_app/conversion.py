@@ -0,0 +1,268 @@
+import os
+import uuid
+import tempfile
+import traceback
+from contextlib import contextmanager
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ConversionJob
+from .adapters import magicai_converter
+from . import conversion_cache, converter_pool
+from .analysis import get_analysis
+from .metrics import StageTimer, record_timings
+from .utils import job_queue
+from .utils.job_queue import get_worker_id
+
+
+class JobClaimLost(Exception):
+    """The job was requeued or taken over while this run was busy with it."""
+
+
+def claim_job(job_id, worker_id):
+    """Claim a QUEUED job for `worker_id` (QUEUED -> RUNNING); returns whether it got it."""
+    return job_queue.claim_job(ConversionJob, job_id, worker_id)
+
+
+def refresh_claims(job_ids, worker_id):
+    """Heartbeat for the jobs of a group that are still waiting for their turn."""
+    now = timezone.now()
+    ConversionJob.objects.filter(pk__in=job_ids, status='RUNNING', claimed_by=worker_id).update(
+        claimed_at=now, updated_at=now,
+    )
+
+
+class JobRun:
+    """
+    One job on its way through the pipeline. Every step runs inside
+    guard(), which records any failure on the job instead of raising.
+
+    The job must be claimed by `worker_id`. Each stage refreshes the claim
+    (heartbeat()), which is what worker.requeue_stale_jobs() goes by, and
+    the job row is only written while the claim still holds, so a run that
+    was requeued from under this one never overwrites its result.
+    """
+
+    def __init__(self, job_id, worker_id):
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.job = None
+        self.timer = StageTimer()
+        self.image_hash = None
+        self.task = None
+        self.failed = False
+
+    @contextmanager
+    def guard(self):
+        try:
+            yield
+        except ConversionJob.DoesNotExist:
+            self.failed = True
+            print(f"Error: Conversion job {self.job_id} not found")
+        except JobClaimLost as e:
+            self.failed = True
+            print(f"Error: {e}")
+        except Exception as e:
+            self.failed = True
+            self.fail(e)
+
+    def update_job(self, **fields):
+        """Update the job row and refresh the claim, as long as this run still holds it."""
+        now = timezone.now()
+        updated = ConversionJob.objects.filter(
+            pk=self.job_id, status='RUNNING', claimed_by=self.worker_id,
+        ).update(claimed_at=now, updated_at=now, **fields)
+        if not updated:
+            raise JobClaimLost(f"Conversion job {self.job_id} is no longer claimed by {self.worker_id}")
+
+    def heartbeat(self):
+        self.update_job()
+
+    def start(self):
+        """
+        Load the claimed job and serve it from the conversion cache when
+        possible. Returns True when the pack still has to be built.
+        """
+        job = self.job = ConversionJob.objects.select_related('upload').get(pk=self.job_id)
+        self.heartbeat()
+        job.append_log("Starting template conversion...")
+        
+        print(f"Starting conversion for job {self.job_id}")
+        
+        # Get the image path
+        image_path = job.upload.image.path
+        print(f"Processing image: {image_path}")
+        
+        # Validate image file exists
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Image file not found: {image_path}")
+        
+        # Reuse an identical earlier build if we have one
+        with self.timer.stage('lookup'):
+            self.image_hash = conversion_cache.get_image_hash(job.upload)
+            cached = conversion_cache.lookup(self.image_hash, job.target)
+        if cached is not None:
+            job.zip_file.name = cached.zip_file.name
+            job.cache_hit = True
+            job.status = 'SUCCESS'
+            job.append_log(f"Conversion completed successfully!\n\nGenerated {job.target} template pack (from cache)\nTemplate files: Ready for download\nBased on uploaded image analysis")
+            job.timings = self.timer.finish()
+            self.update_job(zip_file=job.zip_file.name, cache_hit=True, status='SUCCESS', timings=job.timings)
+            record_timings(job.target, job.timings)
+            print(f"Job {self.job_id} served from conversion cache")
+            return False
+        job.cache_hit = False
+        return True
+
+    def analyze(self, analyses):
+        """Analysis record of the job's image, shared through `analyses` by upload."""
+        upload = self.job.upload
+        if upload.pk not in analyses:
+            with self.timer.stage('analyze'):
+                if converter_pool.get_pool() is None:
+                    analyses[upload.pk] = get_analysis(upload)
+                else:
+                    analyses[upload.pk] = get_analysis(
+                        upload, analyze=lambda path: converter_pool.call(converter_pool.analyze_image, path),
+                    )
+        return analyses[upload.pk]
+
+    def build(self, analysis):
+        """Build the pack here, or queue it in the pool when there is one."""
+        self.heartbeat()
+        args = (self.job.upload.image.path, self.job.target, analysis, settings.CONVERSION_DEBUG_TREE)
+        # Fetched per task: a timeout replaces the pool
+        pool = converter_pool.get_pool()
+        if pool is None:
+            with converter_errors():
+                self.finish(*converter_pool.build_archive(*args))
+        else:
+            self.task = converter_pool.Task(pool, converter_pool.build_archive, *args)
+
+    def collect(self):
+        """Wait for the queued build and finish the job with it."""
+        with converter_errors():
+            result = self.task.get()
+        self.finish(*result)
+
+    def finish(self, archive, timings, members):
+        job = self.job
+        # Don't store or cache a pack another run has taken over
+        self.heartbeat()
+        for stage, seconds in timings.items():
+            self.timer.add(stage, seconds)
+        
+        if members is not None:
+            debug_folder = magicai_converter.write_pack_tree(members, job.target, tempfile.mkdtemp())
+            print(f"Debug: generated files written to {debug_folder}")
+        
+        zip_filename = f"{uuid.uuid4()}.zip"
+        try:
+            with self.timer.stage('persist'):
+                job.zip_file.save(zip_filename, ContentFile(archive), save=False)
+            print(f"Zip file saved to job: {job.zip_file.name}")
+        except Exception as e:
+            print(f"Error saving zip file to job: {e}")
+            raise IOError(f"Failed to save zip file: {e}") from e
+        
+        with self.timer.stage('cache_store'):
+            conversion_cache.store(self.image_hash, job.target, job.zip_file)
+        
+        job.status = 'SUCCESS'
+        job.append_log(f"Conversion completed successfully!\n\nGenerated {job.target} template pack\nTemplate files: Ready for download\nBased on uploaded image analysis\n\nThe template pack includes responsive components and styling ready for use.")
+        job.timings = self.timer.finish()
+        self.update_job(zip_file=job.zip_file.name, cache_hit=job.cache_hit, status='SUCCESS', timings=job.timings)
+        record_timings(job.target, job.timings)
+        
+        print(f"Job {self.job_id} completed successfully: {job.timings}")
+
+    def fail(self, e):
+        job = self.job
+        error_msg = str(e)
+        full_traceback = traceback.format_exc()
+        
+        print(f"Conversion failed for job {self.job_id}: {error_msg}")
+        print(f"Full traceback:\n{full_traceback}")
+        
+        if job:
+            # Provide user-friendly error messages
+            if "Unicode" in error_msg or "encode" in error_msg.lower():
+                user_msg = "ENCODING ERROR: The template contains special characters that cannot be processed on Windows. This is typically caused by emoji or special Unicode symbols in the generated content."
+            elif "FileNotFoundError" in error_msg or "not found" in error_msg.lower():
+                user_msg = "FILE ERROR: The uploaded image file could not be found or accessed."
+            elif "Permission" in error_msg or "access" in error_msg.lower():
+                user_msg = "PERMISSION ERROR: Unable to write template files. Check file system permissions."
+            elif isinstance(e, converter_pool.ConverterTimeout):
+                user_msg = f"TIMEOUT: {error_msg}"
+            else:
+                user_msg = f"CONVERSION ERROR: {error_msg}"
+            
+            try:
+                # The log belongs to whoever holds the job now
+                self.heartbeat()
+                job.status = 'ERROR'
+                # Logged before the status changes so anyone tailing the log
+                # has the details by the time they see ERROR
+                job.append_log(f"{user_msg}\n\nTechnical Details:\n{error_msg}\n\nFull Error Log:\n{full_traceback}")
+                job.timings = self.timer.finish()
+                self.update_job(cache_hit=job.cache_hit, status='ERROR', timings=job.timings)
+            except JobClaimLost as lost:
+                print(f"Error: {lost}")
+
+
+@contextmanager
+def converter_errors():
+    """Turn converter exceptions into the IOErrors reported on the job."""
+    try:
+        yield
+    except UnicodeEncodeError as e:
+        error_msg = f"Unicode encoding error: Cannot encode character '{e.object[e.start:e.end]}' in {e.encoding} encoding. This is typically caused by emoji or special Unicode characters in the template content."
+        print(f"Unicode error: {error_msg}")
+        raise IOError(error_msg) from e
+    except (IOError, converter_pool.ConverterTimeout) as e:
+        print(f"Error during conversion: {e}")
+        raise
+    except Exception as e:
+        print(f"Unexpected conversion error: {e}")
+        raise IOError(f"Template conversion failed: {e}") from e
+
+
+def run_conversion(job_id, worker_id=None):
+    """
+    Run the conversion process for a job with enhanced error handling.
+    Called by the conversion worker (see worker.py) once it has claimed
+    the job, or inline by the API when CONVERSION_RUN_INLINE is enabled.
+    """
+    run_conversion_group([job_id], worker_id)
+
+
+def run_conversion_group(job_ids, worker_id=None):
+    """
+    Run several jobs, usually the targets of one upload. Jobs start in
+    order and share one analysis per upload. With the converter pool
+    (CONVERTER_POOL_SIZE > 0) every pack is then built at the same time
+    in the pool; without it they are built here one after another.
+
+    The jobs must be claimed by `worker_id`; without one (inline runs)
+    the QUEUED jobs are claimed here first, and any a worker got to
+    first are left to it.
+    """
+    if worker_id is None:
+        worker_id = get_worker_id()
+        job_ids = [job_id for job_id in job_ids if claim_job(job_id, worker_id)]
+    analyses = {}
+    queued = []
+    for job_id in job_ids:
+        refresh_claims(job_ids, worker_id)
+        run = JobRun(job_id, worker_id)
+        with run.guard():
+            if run.start():
+                run.build(run.analyze(analyses))
+                if run.task is not None:
+                    queued.append(run)
+    
+    for run in queued:
+        refresh_claims(job_ids, worker_id)
+        with run.guard():
+            run.collect()
@@ -0,0 +1,136 @@
+"""
+Content-addressed cache of built template packs.
+
+A pack only depends on the uploaded image bytes, the target and the
+converter code, so jobs that agree on all three can share one zip.
+
+An entry points at the zip of the job that built it (see blobs), so
+dropping it only frees disk once no job or library item uses that zip
+any more. CONVERSION_CACHE_MAX_BYTES therefore bounds the zips only the
+cache still holds: entries are evicted least-recently-used once those go
+over it, and entries whose zip is still shared neither count nor get
+evicted.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from .models import ConversionCacheEntry, ConversionJob, LibraryItem
+from .adapters import magicai_converter
+from .blobs import file_sha256
+
+
+def get_image_hash(upload):
+    """Return the SHA-256 of an upload's image, computing and storing it once."""
+    if upload.image_sha256:
+        return upload.image_sha256
+
+    upload.image_sha256 = file_sha256(upload.image)
+    type(upload).objects.filter(pk=upload.pk).update(image_sha256=upload.image_sha256)
+    return upload.image_sha256
+
+
+def make_key(image_hash, target, version=None):
+    version = version or magicai_converter.CONVERTER_VERSION
+    return hashlib.sha256(f"{image_hash}:{target}:{version}".encode()).hexdigest()
+
+
+def lookup(image_hash, target):
+    """Return the cache entry for this image/target, or None. Counts as a use."""
+    if not settings.CONVERSION_CACHE_ENABLED:
+        return None
+
+    entry = ConversionCacheEntry.objects.filter(key=make_key(image_hash, target)).first()
+    if entry is None:
+        return None
+
+    if not entry.zip_file or not entry.zip_file.storage.exists(entry.zip_file.name):
+        # The blob disappeared underneath us; forget about it
+        entry.delete()
+        return None
+
+    ConversionCacheEntry.objects.filter(pk=entry.pk).update(
+        hit_count=F('hit_count') + 1,
+        last_used_at=timezone.now(),
+    )
+    return entry
+
+
+def store(image_hash, target, zip_field):
+    """
+    Record a freshly built zip as the cached result for this image/target.
+    Best effort: a failure is logged and only costs a future cache miss.
+    """
+    if not settings.CONVERSION_CACHE_ENABLED:
+        return None
+
+    try:
+        entry, _ = ConversionCacheEntry.objects.update_or_create(
+            key=make_key(image_hash, target),
+            defaults={
+                'image_sha256': image_hash,
+                'target': target,
+                'converter_version': magicai_converter.CONVERTER_VERSION,
+                'zip_file': zip_field.name,
+                'size': zip_field.size,
+                'last_used_at': timezone.now(),
+            },
+        )
+        evict()
+    except DatabaseError as e:
+        print(f"Warning: could not store conversion cache entry: {e}")
+        return None
+    return entry
+
+
+def cache_only_entries():
+    """Entries whose zip no job or library item uses; evicting these frees disk."""
+    return ConversionCacheEntry.objects.exclude(
+        Exists(ConversionJob.objects.filter(zip_file=OuterRef('zip_file')))
+    ).exclude(
+        Exists(LibraryItem.objects.filter(zip_file=OuterRef('zip_file')))
+    )
+
+
+def evict(max_bytes=None):
+    """
+    Drop least-recently-used entries until the zips only the cache holds
+    fit in `max_bytes`.
+    """
+    if max_bytes is None:
+        max_bytes = settings.CONVERSION_CACHE_MAX_BYTES
+
+    entries = cache_only_entries()
+    total = entries.aggregate(total=Sum('size'))['total'] or 0
+    evicted = 0
+    for entry in entries.order_by('last_used_at').iterator():
+        if total <= max_bytes:
+            break
+        total -= entry.size
+        # Deletes the zip once the transaction commits (see blobs.release)
+        entry.delete()
+        evicted += 1
+    return evicted
+
+
+def get_stats():
+    totals = ConversionCacheEntry.objects.aggregate(entries=Count('id'), total_bytes=Sum('size'))
+    cache_only_bytes = cache_only_entries().aggregate(total=Sum('size'))['total']
+    lookups = ConversionJob.objects.aggregate(
+        hits=Count('id', filter=Q(cache_hit=True)),
+        misses=Count('id', filter=Q(cache_hit=False)),
+    )
+    return {
+        'enabled': settings.CONVERSION_CACHE_ENABLED,
+        'converter_version': magicai_converter.CONVERTER_VERSION,
+        'entries': totals['entries'],
+        'total_bytes': totals['total_bytes'] or 0,
+        # What CONVERSION_CACHE_MAX_BYTES is measured against
+        'cache_only_bytes': cache_only_bytes or 0,
+        'max_bytes': settings.CONVERSION_CACHE_MAX_BYTES,
+        'hits': lookups['hits'],
+        'misses': lookups['misses'],
+    }
@@ -0,0 +1,147 @@
+"""
+Long-lived pool of converter processes.
+
+Image decoding and pack generation run in a small multiprocessing pool
+instead of the process that handles the job. Each pool process imports
+PIL (with its plugins registered), NumPy and the converter modules,
+whose pack fragments are compiled at import, once when it starts and
+then serves tasks until it has run CONVERTER_POOL_MAX_TASKS_PER_CHILD
+of them. The targets of one upload are built at the same time (see
+conversion.run_conversion_group).
+
+Tasks only get plain data (paths, analysis records) and return bytes,
+so pool processes never touch Django settings or the database.
+
+Settings:
+    CONVERTER_POOL_SIZE                 processes; 0 runs everything in
+                                        the calling process instead
+    CONVERTER_POOL_MAX_TASKS_PER_CHILD  tasks before a process is replaced
+    CONVERTER_POOL_TASK_TIMEOUT         seconds a task may take, counted
+                                        from when it is queued; on timeout
+                                        the pool is terminated and rebuilt
+"""
+import atexit
+import io
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .adapters import image_analysis, magicai_converter
+from .utils.zipstream import write_zip
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class ConverterTimeout(Exception):
+    pass
+
+
+# Pool process side
+
+def _warm_up():
+    from PIL import Image
+    # Register every image plugin now rather than on the first open()
+    Image.init()
+
+
+def analyze_image(image_path):
+    return image_analysis.analyze(image_path)
+
+
+def build_archive(image_path, target, analysis, keep_members=False):
+    """
+    Generate and zip one pack.
+
+    Returns:
+        tuple: (zip bytes, {stage: seconds} for generate and zip, the
+        members when `keep_members` is set, else None)
+    """
+    timer = _Timings()
+    members = magicai_converter.build_pack(image_path, target, timer=timer, analysis=analysis)
+    with timer.stage('zip'):
+        archive = write_zip(members, io.BytesIO()).getvalue()
+    return archive, timer.timings, members if keep_members else None
+
+
+class _Timings:
+    """Minimal stand-in for metrics.StageTimer, which needs Django."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+
+
+# Caller side
+
+def get_pool():
+    """The process pool, started on first use; None when it is disabled."""
+    global _pool
+    if settings.CONVERTER_POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the caller may be a threaded
+            # server, and children must not inherit its DB connections
+            context = multiprocessing.get_context('spawn')
+            _pool = context.Pool(
+                processes=settings.CONVERTER_POOL_SIZE,
+                initializer=_warm_up,
+                maxtasksperchild=settings.CONVERTER_POOL_MAX_TASKS_PER_CHILD or None,
+            )
+            print(f"Converter pool started with {settings.CONVERTER_POOL_SIZE} process(es)")
+        return _pool
+
+
+def shutdown(expected=None):
+    """
+    Terminate the pool; the next get_pool() starts a new one. With
+    `expected`, only when that is still the current pool (it may have
+    been replaced already after another task's timeout).
+    """
+    global _pool
+    with _pool_lock:
+        if expected is not None and _pool is not expected:
+            return
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.terminate()
+        pool.join()
+
+
+atexit.register(shutdown)
+
+
+class Task:
+    """A call queued in the pool, with its timeout deadline."""
+
+    def __init__(self, pool, func, *args):
+        self.pool = pool
+        self.result = pool.apply_async(func, args)
+        self.deadline = time.monotonic() + settings.CONVERTER_POOL_TASK_TIMEOUT
+
+    def get(self):
+        try:
+            return self.result.get(max(0, self.deadline - time.monotonic()))
+        except multiprocessing.TimeoutError:
+            # A stuck process can't be stopped on its own, so the whole
+            # pool goes; tasks still queued in it time out as well
+            shutdown(self.pool)
+            raise ConverterTimeout(
+                f"Conversion did not finish within {settings.CONVERTER_POOL_TASK_TIMEOUT} seconds"
+            ) from None
+
+
+def call(func, *args):
+    """Run `func(*args)` in the pool and wait for the result."""
+    return Task(get_pool(), func, *args).get()
@@ -0,0 +1,128 @@
+"""
+Server-Sent Events stream of a ConversionJob's progress.
+
+Nothing notifies the stream when a job changes: each open stream polls its
+job row every CONVERSION_EVENTS_POLL_INTERVAL seconds (a primary-key lookup
+of a few columns plus any new log chunks) and sends only what changed:
+
+    event: status   the serialized job on every status change
+    event: log      {"text": ..., "offset": ...} with the log text appended
+                    since the previous event; `offset` is the log size so far
+                    and works as `?since=` on the job detail endpoint
+    event: end      the job finished (SUCCESS/ERROR), was deleted, or the
+                    stream hit CONVERSION_EVENTS_MAX_DURATION
+
+job_event_stream() is an async generator, so under ASGI (uvicorn/daphne
+serving dashboard_backend.asgi) a waiting client costs no worker thread.
+Its polls run in the default executor rather than the single thread Django
+shares between sync_to_async calls, so many open streams don't queue up
+behind each other (or behind sync views). Under WSGI (runserver, gunicorn)
+Django would read an async stream to the end before sending any of it, so
+iter_job_events() serves the same events from a plain generator, holding
+one thread per open stream.
+"""
+import json
+import time
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import ConversionJob
+from .serializers import ConversionJobSerializer
+
+TERMINAL_STATUSES = ('SUCCESS', 'ERROR')
+
+# Send a comment line when nothing happened for this long so proxies keep
+# the connection open
+KEEPALIVE_INTERVAL = 15
+
+
+def format_event(event, data):
+    payload = json.dumps(data, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _serialize_job(job):
+    return ConversionJobSerializer(job).data
+
+
+def _load_job(pk):
+    return ConversionJob.objects.select_related('upload').filter(pk=pk).first()
+
+
+class JobEvents:
+    """The events of one stream; poll() returns what changed since its last call."""
+
+    def __init__(self, pk, poll_interval, max_duration):
+        self.pk = pk
+        self.poll_interval = poll_interval
+        self.max_duration = max_duration
+        self.started = self.last_sent = time.monotonic()
+        self.last_status = None
+        self.log_offset = 0
+        self.finished = False
+
+    def retry(self):
+        return f"retry: {int(self.poll_interval * 1000) or 1000}\n\n"
+
+    def poll(self):
+        job = _load_job(self.pk)
+        if job is None:
+            self.finished = True
+            return [format_event('end', {'reason': 'deleted'})]
+
+        messages = []
+        if job.status != self.last_status:
+            self.last_status = job.status
+            messages.append(format_event('status', _serialize_job(job)))
+
+        text, self.log_offset = job.read_log(self.log_offset)
+        if text:
+            messages.append(format_event('log', {'text': text, 'offset': self.log_offset}))
+
+        now = time.monotonic()
+        if job.status in TERMINAL_STATUSES:
+            self.finished = True
+            messages.append(format_event('end', {'reason': 'finished', 'status': job.status}))
+        elif now - self.started > self.max_duration:
+            self.finished = True
+            messages.append(format_event('end', {'reason': 'timeout'}))
+        elif messages:
+            self.last_sent = now
+        elif now - self.last_sent > KEEPALIVE_INTERVAL:
+            messages.append(": keepalive\n\n")
+            self.last_sent = now
+        return messages
+
+
+def _job_events(pk, poll_interval, max_duration):
+    if poll_interval is None:
+        poll_interval = settings.CONVERSION_EVENTS_POLL_INTERVAL
+    if max_duration is None:
+        max_duration = settings.CONVERSION_EVENTS_MAX_DURATION
+    return JobEvents(pk, poll_interval, max_duration)
+
+
+async def job_event_stream(pk, poll_interval=None, max_duration=None):
+    """Yield SSE messages for job `pk` until it finishes."""
+    events = _job_events(pk, poll_interval, max_duration)
+    yield events.retry()
+    while True:
+        # The poll only reads, so it needn't wait for the shared sync thread
+        for message in await sync_to_async(events.poll, thread_sensitive=False)():
+            yield message
+        if events.finished:
+            return
+        await asyncio.sleep(events.poll_interval)
+
+
+def iter_job_events(pk, poll_interval=None, max_duration=None):
+    """job_event_stream() as a plain generator, for WSGI."""
+    events = _job_events(pk, poll_interval, max_duration)
+    yield events.retry()
+    while True:
+        yield from events.poll()
+        if events.finished:
+            return
+        time.sleep(events.poll_interval)
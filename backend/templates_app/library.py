@@ -0,0 +1,57 @@
+"""
+Category tree for the template library.
+
+The tree only carries per-subcategory item counts; clients fetch the
+items of a subcategory separately. It is built with a single GROUP BY
+query and cached until a LibraryItem is saved or deleted.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import LibraryItem
+
+CATEGORY_TREE_CACHE_KEY = 'templates_app:library:category_tree'
+
+CATEGORY_DISPLAY = dict(LibraryItem.CATEGORY_CHOICES)
+SUBCATEGORY_DISPLAY = dict(LibraryItem.SUBCATEGORY_CHOICES)
+
+
+def build_category_tree():
+    rows = (
+        LibraryItem.objects.order_by()
+        .values('category', 'subcategory')
+        .annotate(item_count=Count('id'))
+        .order_by('category', 'subcategory')
+    )
+
+    tree = []
+    current = None
+    for row in rows:
+        if current is None or current['category'] != row['category']:
+            current = {
+                'category': row['category'],
+                'category_display': CATEGORY_DISPLAY.get(row['category'], row['category']),
+                'item_count': 0,
+                'subcategories': [],
+            }
+            tree.append(current)
+        current['item_count'] += row['item_count']
+        current['subcategories'].append({
+            'subcategory': row['subcategory'],
+            'subcategory_display': SUBCATEGORY_DISPLAY.get(row['subcategory'], row['subcategory']),
+            'item_count': row['item_count'],
+        })
+    return tree
+
+
+def get_category_tree():
+    tree = cache.get(CATEGORY_TREE_CACHE_KEY)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(CATEGORY_TREE_CACHE_KEY, tree, settings.LIBRARY_CATEGORY_TREE_TIMEOUT)
+    return tree
+
+
+def invalidate_category_tree():
+    cache.delete(CATEGORY_TREE_CACHE_KEY)
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from templates_app.utils.sanitize import sanitize_text
+
+# Repeated to build each input; roughly what generated packs and user
+# supplied copy look like
+SAMPLES = {
+    'ascii': '<div class="text-center p-6 bg-white rounded-lg shadow-md">{{ feature.title }}</div>\n',
+    'unicode': 'Café – crème brûlée à la carte 中文 über\n',
+    'emoji': 'Launch \U0001F680 fast ⚡ with ✨ and \U0001F525 \U0001F600\x07\n',
+}
+
+MODES = {
+    'default': {},
+    'ascii_only': {'ascii_only': True},
+    'aggressive': {'aggressive': True},
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure sanitize_text throughput on large generated inputs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=float, default=8, help='Input size in MB (default: 8)')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per case; the best is reported')
+
+    def handle(self, *args, **options):
+        size = int(options['size'] * 1024 * 1024)
+        self.stdout.write(f"{'input':<10} {'mode':<12} {'MB/s':>10} {'best ms':>10}")
+        for name, sample in SAMPLES.items():
+            text = (sample * (size // len(sample) + 1))[:size]
+            megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+            for mode, kwargs in MODES.items():
+                best = min(self._time(text, kwargs) for _ in range(options['repeat']))
+                self.stdout.write(f"{name:<10} {mode:<12} {megabytes / best:>10.1f} {best * 1000:>10.1f}")
+
+    def _time(self, text, kwargs):
+        start = time.perf_counter()
+        sanitize_text(text, **kwargs)
+        return time.perf_counter() - start
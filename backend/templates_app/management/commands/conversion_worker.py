@@ -0,0 +1,69 @@
+import multiprocessing
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+def _worker_process(poll_interval, max_jobs, stop_when_idle):
+    # Needed when children are spawned rather than forked (e.g. Windows)
+    django.setup()
+    from templates_app.worker import run_worker
+    run_worker(poll_interval=poll_interval, max_jobs=max_jobs, stop_when_idle=stop_when_idle)
+
+
+class Command(BaseCommand):
+    help = 'Run template conversion jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.CONVERSION_WORKER_PROCESSES,
+            help='Number of worker processes (default: CONVERSION_WORKER_PROCESSES)',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.CONVERSION_WORKER_POLL_INTERVAL,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+        parser.add_argument(
+            '--max-jobs', type=int, default=None,
+            help='Exit each process after running this many jobs',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Drain the queue and exit instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        from templates_app.worker import requeue_stale_jobs, run_worker
+
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale job(s)'))
+
+        processes = max(1, options['processes'])
+        worker_args = (options['poll_interval'], options['max_jobs'], options['once'])
+
+        if processes == 1:
+            run_worker(*worker_args)
+            return
+
+        # Children must not inherit the parent's open database connection
+        connections.close_all()
+        children = [
+            multiprocessing.Process(target=_worker_process, args=worker_args, name=f'conversion-worker-{i}')
+            for i in range(processes)
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(self.style.SUCCESS(f'Started {processes} conversion worker processes'))
+
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping conversion workers...')
+            for child in children:
+                child.terminate()
+            for child in children:
+                child.join()
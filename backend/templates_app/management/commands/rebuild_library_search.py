@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from templates_app.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite full-text index for library items'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Indexed {count} library items')
+        )
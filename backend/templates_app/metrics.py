@@ -0,0 +1,107 @@
+"""
+Per-stage timing of the conversion pipeline.
+
+run_conversion times each stage with a StageTimer and stores the result
+on ConversionJob.timings. Successful jobs are also added to histograms
+kept in the database (ConversionStageMetric/ConversionStageBucket), so
+counts from every worker process end up in one place. GET
+/api/templates/metrics/ renders them in the Prometheus text format.
+
+Stages:
+    lookup       hashing the image and checking the conversion cache
+    analyze      opening the image and reading its properties
+    generate     rendering the pack files (in a converter pool process when enabled)
+    zip          compressing the pack
+    persist      saving the zip to storage
+    cache_store  recording the build in the conversion cache (and eviction)
+    total        the whole job
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import DatabaseError, transaction
+from django.db.models import Count, F
+
+from .models import ConversionJob, ConversionStageBucket, ConversionStageMetric
+
+# Upper bounds in seconds; the +Inf bucket is the metric's count
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class StageTimer:
+    """Collects wall-clock seconds per named stage."""
+
+    def __init__(self):
+        self.timings = {}
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0) + time.perf_counter() - start
+
+    def add(self, name, seconds):
+        """Count time measured elsewhere (e.g. in a converter pool process)."""
+        self.timings[name] = self.timings.get(name, 0) + seconds
+
+    def finish(self):
+        """Record the total and return all timings, rounded to microseconds."""
+        self.timings['total'] = time.perf_counter() - self.started
+        return {name: round(seconds, 6) for name, seconds in self.timings.items()}
+
+
+def record_timings(target, timings):
+    """Add one job's stage timings to the histograms. Never raises."""
+    try:
+        with transaction.atomic():
+            for stage, seconds in timings.items():
+                metric, created = ConversionStageMetric.objects.get_or_create(stage=stage, target=target)
+                if created:
+                    ConversionStageBucket.objects.bulk_create(
+                        [ConversionStageBucket(metric=metric, le=le) for le in BUCKETS],
+                        ignore_conflicts=True,
+                    )
+                ConversionStageMetric.objects.filter(pk=metric.pk).update(
+                    count=F('count') + 1,
+                    total_seconds=F('total_seconds') + seconds,
+                )
+                ConversionStageBucket.objects.filter(metric=metric, le__gte=seconds).update(count=F('count') + 1)
+    except DatabaseError as e:
+        # Losing a sample is better than failing a finished job
+        print(f"Warning: could not record conversion timings: {e}")
+
+
+def _format_float(value):
+    return repr(float(value))
+
+
+def render_prometheus():
+    """Return the conversion metrics in the Prometheus text exposition format."""
+    lines = [
+        '# HELP conversion_stage_seconds Time spent in each stage of successful conversion jobs.',
+        '# TYPE conversion_stage_seconds histogram',
+    ]
+    buckets = {}
+    for metric_id, le, count in ConversionStageBucket.objects.order_by('metric', 'le').values_list('metric_id', 'le', 'count'):
+        buckets.setdefault(metric_id, []).append((le, count))
+
+    for metric in ConversionStageMetric.objects.order_by('stage', 'target'):
+        labels = f'stage="{metric.stage}",target="{metric.target}"'
+        for le, count in buckets.get(metric.pk, []):
+            lines.append(f'conversion_stage_seconds_bucket{{{labels},le="{_format_float(le)}"}} {count}')
+        lines.append(f'conversion_stage_seconds_bucket{{{labels},le="+Inf"}} {metric.count}')
+        lines.append(f'conversion_stage_seconds_sum{{{labels}}} {_format_float(metric.total_seconds)}')
+        lines.append(f'conversion_stage_seconds_count{{{labels}}} {metric.count}')
+
+    lines += [
+        '# HELP conversion_jobs Conversion jobs currently in the database, by target and status.',
+        '# TYPE conversion_jobs gauge',
+    ]
+    jobs = ConversionJob.objects.order_by().values('target', 'status').annotate(n=Count('id'))
+    for row in sorted(jobs, key=lambda row: (row['target'], row['status'])):
+        lines.append(f'conversion_jobs{{target="{row["target"]}",status="{row["status"]}"}} {row["n"]}')
+
+    return '\n'.join(lines) + '\n'
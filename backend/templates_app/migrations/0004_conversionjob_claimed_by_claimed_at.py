@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2025-11-03 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0003_websitetemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversionjob',
+            name='claimed_by',
+            field=models.CharField(blank=True, help_text='Worker that is running this job', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='conversionjob',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='conversionjob',
+            index=models.Index(fields=['status', 'created_at'], name='templates_a_status_dca981_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2025-11-04 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0004_conversionjob_claimed_by_claimed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateupload',
+            name='image_sha256',
+            field=models.CharField(blank=True, db_index=True, help_text='SHA-256 of the image bytes', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='conversionjob',
+            name='cache_hit',
+            field=models.BooleanField(blank=True, help_text='Whether the zip came from the conversion cache', null=True),
+        ),
+        migrations.CreateModel(
+            name='ConversionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('image_sha256', models.CharField(max_length=64)),
+                ('target', models.CharField(choices=[('DJANGO', 'Django'), ('NEXTJS', 'Next.js')], max_length=10)),
+                ('converter_version', models.CharField(max_length=20)),
+                ('zip_file', models.FileField(upload_to='templates/builds/')),
+                ('size', models.BigIntegerField(default=0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['last_used_at'],
+                'verbose_name_plural': 'Conversion cache entries',
+            },
+        ),
+    ]
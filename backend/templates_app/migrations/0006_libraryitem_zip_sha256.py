@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2025-11-06 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0005_conversion_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='libraryitem',
+            name='zip_sha256',
+            field=models.CharField(blank=True, help_text='SHA-256 of the zip, used as download ETag', max_length=64),
+        ),
+    ]
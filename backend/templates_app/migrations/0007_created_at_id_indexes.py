@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2025-11-07 16:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0006_libraryitem_zip_sha256'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='templateupload',
+            index=models.Index(fields=['created_at', 'id'], name='templates_a_created_864775_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='conversionjob',
+            index=models.Index(fields=['created_at', 'id'], name='templates_a_created_9a4a9c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['created_at', 'id'], name='templates_a_created_42072e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='websitetemplate',
+            index=models.Index(fields=['created_at', 'id'], name='templates_a_created_7be048_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2025-11-10 11:20
+
+from django.db import migrations
+
+
+FTS_TABLE = 'templates_app_libraryitem_fts'
+PG_INDEX = 'templates_app_libraryitem_search_idx'
+PG_DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(tags, ''))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "item_id UNINDEXED, name, description, tags, "
+                "tokenize = 'unicode61', prefix = '2 3')"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (item_id, name, description, tags) "
+                "SELECT id, name, description, tags FROM templates_app_libraryitem"
+            )
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_INDEX} ON templates_app_libraryitem "
+            f"USING GIN ({PG_DOCUMENT_SQL})"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0007_created_at_id_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2025-11-11 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0008_libraryitem_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='libraryitem',
+            name='tag_index',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='items', to='templates_app.librarytag'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2025-11-11 09:41
+
+from django.db import migrations
+
+
+def backfill_tags(apps, schema_editor):
+    LibraryItem = apps.get_model('templates_app', 'LibraryItem')
+    LibraryTag = apps.get_model('templates_app', 'LibraryTag')
+    Through = LibraryItem.tag_index.through
+
+    names_by_item = {}
+    for pk, tags in LibraryItem.objects.values_list('pk', 'tags').iterator():
+        names = []
+        for raw in (tags or '').split(','):
+            name = raw.strip().lower()[:50]
+            if name and name not in names:
+                names.append(name)
+        if names:
+            names_by_item[pk] = names
+
+    all_names = {name for names in names_by_item.values() for name in names}
+    LibraryTag.objects.bulk_create([LibraryTag(name=name) for name in all_names], ignore_conflicts=True)
+    tag_ids = dict(LibraryTag.objects.filter(name__in=all_names).values_list('name', 'pk'))
+
+    Through.objects.bulk_create(
+        [
+            Through(libraryitem_id=pk, librarytag_id=tag_ids[name])
+            for pk, names in names_by_item.items()
+            for name in names
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0009_librarytag_libraryitem_tag_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
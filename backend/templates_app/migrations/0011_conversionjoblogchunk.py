@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2025-11-12 10:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def copy_logs_to_chunks(apps, schema_editor):
+    ConversionJob = apps.get_model('templates_app', 'ConversionJob')
+    ConversionJobLogChunk = apps.get_model('templates_app', 'ConversionJobLogChunk')
+
+    jobs = ConversionJob.objects.exclude(log='').values_list('pk', 'log').iterator()
+    ConversionJobLogChunk.objects.bulk_create(
+        (ConversionJobLogChunk(job_id=pk, offset=0, text=f"{log}\n") for pk, log in jobs),
+        batch_size=500,
+    )
+
+
+def copy_chunks_to_logs(apps, schema_editor):
+    ConversionJob = apps.get_model('templates_app', 'ConversionJob')
+    ConversionJobLogChunk = apps.get_model('templates_app', 'ConversionJobLogChunk')
+
+    logs = {}
+    for job_id, text in ConversionJobLogChunk.objects.order_by('job', 'offset').values_list('job_id', 'text').iterator():
+        logs[job_id] = logs.get(job_id, '') + text
+    for job_id, log in logs.items():
+        ConversionJob.objects.filter(pk=job_id).update(log=log.rstrip('\n'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0010_backfill_library_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversionJobLogChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveIntegerField()),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='log_chunks', to='templates_app.conversionjob')),
+            ],
+            options={
+                'ordering': ['job', 'offset'],
+                'unique_together': {('job', 'offset')},
+            },
+        ),
+        migrations.RunPython(copy_logs_to_chunks, copy_chunks_to_logs),
+        migrations.RemoveField(
+            model_name='conversionjob',
+            name='log',
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2025-11-12 15:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0011_conversionjoblogchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversionjob',
+            name='timings',
+            field=models.JSONField(blank=True, default=dict, help_text='Seconds spent in each conversion stage'),
+        ),
+        migrations.CreateModel(
+            name='ConversionStageMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=20)),
+                ('target', models.CharField(choices=[('DJANGO', 'Django'), ('NEXTJS', 'Next.js')], max_length=10)),
+                ('count', models.BigIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['stage', 'target'],
+                'unique_together': {('stage', 'target')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ConversionStageBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('le', models.FloatField()),
+                ('count', models.BigIntegerField(default=0)),
+                ('metric', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='templates_app.conversionstagemetric')),
+            ],
+            options={
+                'ordering': ['metric', 'le'],
+                'unique_together': {('metric', 'le')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2025-11-13 16:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0013_conversionbatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateupload',
+            name='analysis',
+            field=models.JSONField(blank=True, editable=False, help_text='Stored image analysis (see adapters/image_analysis.py)', null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2025-11-14 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0014_templateupload_analysis'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='libraryitem',
+            name='templates_a_created_42072e_idx',
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['category', 'subcategory', 'name', 'id'], name='templates_a_categor_0aa120_idx'),
+        ),
+    ]
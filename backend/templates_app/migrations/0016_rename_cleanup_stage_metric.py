@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2025-11-15 10:05
+
+from django.db import migrations
+
+
+def rename_stage(old, new):
+    def rename(apps, schema_editor):
+        ConversionStageMetric = apps.get_model('templates_app', 'ConversionStageMetric')
+        ConversionStageMetric.objects.filter(stage=old).update(stage=new)
+    return rename
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('templates_app', '0015_libraryitem_order_index'),
+    ]
+
+    operations = [
+        # The conversion cache write is timed as 'cache_store', not 'cleanup'
+        migrations.RunPython(rename_stage('cleanup', 'cache_store'), rename_stage('cache_store', 'cleanup')),
+    ]
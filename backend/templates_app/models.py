@@ -15,6 +15,8 @@ class TemplateUpload(models.Model):
     image = models.ImageField(upload_to='templates/uploads/')
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='PENDING')
     notes = models.TextField(blank=True)
+    image_sha256 = models.CharField(max_length=64, blank=True, db_index=True, help_text="SHA-256 of the image bytes")
+    analysis = models.JSONField(null=True, blank=True, editable=False, help_text="Stored image analysis (see adapters/image_analysis.py)")
     
     def save(self, *args, **kwargs):
         if not self.title and self.image:
@@ -29,6 +31,22 @@ class TemplateUpload(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+
+class ConversionBatch(models.Model):
+    """A group of conversion jobs created together (uploads × targets)"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Batch {self.id} ({self.created_at:%Y-%m-%d %H:%M})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name_plural = 'Conversion batches'
 
 
 class ConversionJob(models.Model):
@@ -46,18 +64,146 @@ class ConversionJob(models.Model):
     
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     upload = models.ForeignKey(TemplateUpload, on_delete=models.CASCADE, related_name='conversion_jobs')
+    batch = models.ForeignKey(ConversionBatch, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')
     target = models.CharField(max_length=10, choices=TARGET_CHOICES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='QUEUED')
-    log = models.TextField(blank=True)
     zip_file = models.FileField(upload_to='templates/builds/', blank=True, null=True)
+    claimed_by = models.CharField(max_length=255, blank=True, help_text="Worker that is running this job")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    cache_hit = models.BooleanField(null=True, blank=True, help_text="Whether the zip came from the conversion cache")
+    timings = models.JSONField(default=dict, blank=True, help_text="Seconds spent in each conversion stage")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.upload.title} → {self.target} ({self.status})"
     
+    def append_log(self, text):
+        """
+        Append a line to the job log.
+        
+        The log is stored as insert-only chunks (ConversionJobLogChunk), so
+        writing never touches the job row or rewrites earlier output.
+        
+        Returns:
+            int: Size of the log after the append, usable as `since`
+        """
+        last = self.log_chunks.order_by('-offset').only('offset', 'text').first()
+        offset = last.offset + len(last.text) if last else 0
+        chunk = ConversionJobLogChunk.objects.create(job=self, offset=offset, text=f"{text}\n")
+        return offset + len(chunk.text)
+    
+    def read_log(self, since=0):
+        """
+        Read the job log from character offset `since` onwards.
+        
+        Returns:
+            tuple: (text, offset) where `offset` is the log size to pass as
+            `since` on the next read
+        """
+        chunks = self.log_chunks.order_by('offset')
+        if since:
+            # Start from the chunk that contains `since`
+            start = (
+                self.log_chunks.filter(offset__lte=since)
+                .order_by('-offset')
+                .values_list('offset', flat=True)
+                .first()
+            )
+            if start is not None:
+                chunks = chunks.filter(offset__gte=start)
+        
+        chunks = list(chunks.values_list('offset', 'text'))
+        if not chunks:
+            return '', 0
+        base = chunks[0][0]
+        text = ''.join(chunk_text for _, chunk_text in chunks)
+        return text[max(since - base, 0):], base + len(text)
+    
+    def get_log(self):
+        return self.read_log()[0]
+    
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id']),
+        ]
+
+
+class ConversionJobLogChunk(models.Model):
+    """One appended piece of a conversion job's log, starting at `offset` characters"""
+    job = models.ForeignKey(ConversionJob, on_delete=models.CASCADE, related_name='log_chunks')
+    offset = models.PositiveIntegerField()
+    text = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.job_id} @{self.offset}"
+    
+    class Meta:
+        ordering = ['job', 'offset']
+        unique_together = ['job', 'offset']
+
+
+class ConversionStageMetric(models.Model):
+    """Running count and total duration of one conversion stage, per target"""
+    stage = models.CharField(max_length=20)
+    target = models.CharField(max_length=10, choices=ConversionJob.TARGET_CHOICES)
+    count = models.BigIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    
+    def __str__(self):
+        return f"{self.stage} ({self.target})"
+    
+    class Meta:
+        ordering = ['stage', 'target']
+        unique_together = ['stage', 'target']
+
+
+class ConversionStageBucket(models.Model):
+    """Cumulative histogram bucket: runs of the stage that took at most `le` seconds"""
+    metric = models.ForeignKey(ConversionStageMetric, on_delete=models.CASCADE, related_name='buckets')
+    le = models.FloatField()
+    count = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.metric} <= {self.le}s"
+    
+    class Meta:
+        ordering = ['metric', 'le']
+        unique_together = ['metric', 'le']
+
+
+class ConversionCacheEntry(models.Model):
+    """A built template pack keyed by image content, target and converter version"""
+    key = models.CharField(max_length=64, unique=True)
+    image_sha256 = models.CharField(max_length=64)
+    target = models.CharField(max_length=10, choices=ConversionJob.TARGET_CHOICES)
+    converter_version = models.CharField(max_length=20)
+    zip_file = models.FileField(upload_to='templates/builds/')
+    size = models.BigIntegerField(default=0)
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.image_sha256[:12]} → {self.target} (v{self.converter_version})"
+    
+    class Meta:
+        ordering = ['last_used_at']
+        verbose_name_plural = "Conversion cache entries"
+
+
+class LibraryTag(models.Model):
+    """Normalized tag, kept in sync with LibraryItem.tags"""
+    name = models.CharField(max_length=50, unique=True)
+    
+    def __str__(self):
+        return self.name
+    
+    class Meta:
+        ordering = ['name']
 
 
 class LibraryItem(models.Model):
@@ -117,7 +263,9 @@ class LibraryItem(models.Model):
     subcategory = models.CharField(max_length=50, choices=SUBCATEGORY_CHOICES, default='homepage')
     description = models.TextField(blank=True, help_text="Description of the template")
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    tag_index = models.ManyToManyField(LibraryTag, related_name='items', blank=True, editable=False)
     zip_file = models.FileField(upload_to='templates/library/')
+    zip_sha256 = models.CharField(max_length=64, blank=True, help_text="SHA-256 of the zip, used as download ETag")
     preview_image = models.ImageField(upload_to='templates/previews/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -131,6 +279,10 @@ class LibraryItem(models.Model):
     class Meta:
         ordering = ['category', 'subcategory', 'name']
         unique_together = ['category', 'subcategory', 'name', 'target']
+        indexes = [
+            # Pages of the library list (pagination.LibraryPagination)
+            models.Index(fields=['category', 'subcategory', 'name', 'id']),
+        ]
 
 
 class WebsiteTemplate(models.Model):
@@ -158,3 +310,6 @@ class WebsiteTemplate(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
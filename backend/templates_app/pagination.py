@@ -0,0 +1,105 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination, newest-first over (created_at, id) by default.
+
+    The cursor holds the `ordering` values of the last row on the page and
+    the next page is fetched with a "comes after the cursor" filter, so
+    with an index on the ordering columns every page costs the same no
+    matter how deep it is. `ordering` must end with a unique column (id)
+    to break ties, which keeps the order stable while rows are being added.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = [queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor))
+
+        # Fetch one extra row to know whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def after(self, values):
+        """Filter for the rows that come after `values` in `ordering`."""
+        condition = None
+        for name, value in reversed(list(zip(self.ordering, values))):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            name = name.lstrip('-')
+            beyond = Q(**{f'{name}__{lookup}': value})
+            condition = beyond if condition is None else beyond | (Q(**{name: value}) & condition)
+        return condition
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def encode_cursor(self, row):
+        raw = json.dumps([field.value_to_string(row) for field in self.fields])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, UnicodeDecodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class LibraryPagination(KeysetPagination):
+    """The library in its browsing order: category, subcategory, name."""
+    ordering = ('category', 'subcategory', 'name', 'id')
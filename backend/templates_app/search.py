@@ -0,0 +1,138 @@
+"""
+Full-text search over LibraryItem name, description and tags.
+
+SQLite keeps a separate FTS5 table (created in migration 0008) that is
+updated from the LibraryItem post_save/post_delete signals. PostgreSQL
+uses a GIN expression index over a tsvector of the same columns, which
+the database maintains on its own. Other backends fall back to
+icontains filters.
+
+Every word of the query is matched as a prefix, so "land pa" finds
+"Landing Page".
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import LibraryItem
+
+FTS_TABLE = 'templates_app_libraryitem_fts'
+
+# Must match the expression of the index created in migration 0008
+PG_DOCUMENT_SQL = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(tags, ''))"
+)
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+_fts5_available = None
+
+
+def _uses_fts5():
+    global _fts5_available
+    if connection.vendor != 'sqlite':
+        return False
+    if _fts5_available is None:
+        _fts5_available = FTS_TABLE in connection.introspection.table_names()
+    return _fts5_available
+
+
+def _filter_sql(filters, column_prefix):
+    clauses = []
+    params = []
+    for field in ('category', 'subcategory', 'target'):
+        value = filters.get(field)
+        if value:
+            clauses.append(f"{column_prefix}{field} = %s")
+            params.append(value)
+    return ''.join(f" AND {clause}" for clause in clauses), params
+
+
+def index_item(item):
+    """Add or refresh one item in the FTS5 table."""
+    if not _uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE item_id = %s", [item.pk.hex])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (item_id, name, description, tags) VALUES (%s, %s, %s, %s)",
+            [item.pk.hex, item.name, item.description, item.tags],
+        )
+
+
+def remove_item(pk):
+    """Drop one item from the FTS5 table."""
+    if not _uses_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE item_id = %s", [pk.hex])
+
+
+def rebuild_index():
+    """Re-index every LibraryItem. Returns the number of indexed rows."""
+    if not _uses_fts5():
+        return 0
+    table = LibraryItem._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (item_id, name, description, tags) "
+            f"SELECT id, name, description, tags FROM {table}"
+        )
+        return cursor.rowcount
+
+
+def search_library(query, limit=DEFAULT_LIMIT, **filters):
+    """
+    Search library items, best matches first.
+
+    Args:
+        query (str): Free text; every word is matched as a prefix
+        limit (int): Maximum number of items to return
+        **filters: Optional exact `category`, `subcategory` and `target`
+
+    Returns:
+        list: Matching LibraryItem instances
+    """
+    words = WORD_RE.findall(query.lower())
+    if not words:
+        return []
+    limit = min(max(int(limit), 1), MAX_LIMIT)
+    table = LibraryItem._meta.db_table
+
+    if _uses_fts5():
+        match = ' '.join(f'"{word}"*' for word in words)
+        filter_sql, filter_params = _filter_sql(filters, 'li.')
+        sql = (
+            f"SELECT f.item_id FROM {FTS_TABLE} f "
+            f"JOIN {table} li ON li.id = f.item_id "
+            f"WHERE {FTS_TABLE} MATCH %s{filter_sql} "
+            f"ORDER BY f.rank LIMIT %s"
+        )
+        params = [match, *filter_params, limit]
+    elif connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f"{word}:*" for word in words)
+        filter_sql, filter_params = _filter_sql(filters, '')
+        sql = (
+            f"SELECT id FROM {table} "
+            f"WHERE {PG_DOCUMENT_SQL} @@ to_tsquery('simple', %s){filter_sql} "
+            f"ORDER BY ts_rank({PG_DOCUMENT_SQL}, to_tsquery('simple', %s)) DESC LIMIT %s"
+        )
+        params = [tsquery, *filter_params, tsquery, limit]
+    else:
+        items = LibraryItem.objects.filter(**{k: v for k, v in filters.items() if v})
+        for word in words:
+            items = items.filter(Q(name__icontains=word) | Q(description__icontains=word) | Q(tags__icontains=word))
+        return list(items[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        ids = [row[0] for row in cursor.fetchall()]
+
+    items = LibraryItem.objects.in_bulk(ids)
+    return [items[pk] for pk in map(LibraryItem._meta.pk.to_python, ids) if pk in items]
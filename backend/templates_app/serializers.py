@@ -6,8 +6,8 @@ from .models import TemplateUpload, ConversionJob, LibraryItem, WebsiteTemplate
 class TemplateUploadSerializer(serializers.ModelSerializer):
     class Meta:
         model = TemplateUpload
-        fields = ['id', 'created_at', 'title', 'image', 'status', 'notes']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'created_at', 'title', 'image', 'status', 'notes', 'analysis']
+        read_only_fields = ['id', 'created_at', 'analysis']
 
 
 class ConversionJobSerializer(serializers.ModelSerializer):
@@ -15,8 +15,8 @@ class ConversionJobSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = ConversionJob
-        fields = ['id', 'upload', 'upload_title', 'target', 'status', 'log', 'zip_file', 'created_at', 'updated_at']
-        read_only_fields = ['id', 'status', 'log', 'zip_file', 'created_at', 'updated_at']
+        fields = ['id', 'upload', 'upload_title', 'target', 'status', 'zip_file', 'cache_hit', 'timings', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'status', 'zip_file', 'cache_hit', 'timings', 'created_at', 'updated_at']
 
 
 class LibraryItemSerializer(serializers.ModelSerializer):
@@ -53,6 +53,22 @@ class CreateConversionJobSerializer(serializers.Serializer):
         return attrs
 
 
+class CreateConversionBatchSerializer(serializers.Serializer):
+    uploads = serializers.ListField(child=serializers.UUIDField(), min_length=1)
+    targets = serializers.ListField(child=serializers.ChoiceField(choices=["DJANGO", "NEXTJS"]), min_length=1)
+
+    # uploads × targets jobs are created in one request
+    max_jobs = 500
+
+    def validate(self, attrs):
+        # Keep the request order but drop duplicates
+        attrs["uploads"] = list(dict.fromkeys(attrs["uploads"]))
+        attrs["targets"] = list(dict.fromkeys(attrs["targets"]))
+        if len(attrs["uploads"]) * len(attrs["targets"]) > self.max_jobs:
+            raise serializers.ValidationError(f"A batch can create at most {self.max_jobs} jobs.")
+        return attrs
+
+
 class WebsiteTemplateSerializer(serializers.ModelSerializer):
     class Meta:
         model = WebsiteTemplate
@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ConversionJob, ConversionCacheEntry, LibraryItem
+from . import blobs
+from .library import invalidate_category_tree
+from . import search
+from .tags import sync_item_tags
+
+
+@receiver(post_delete, sender=ConversionJob)
+@receiver(post_delete, sender=ConversionCacheEntry)
+@receiver(post_delete, sender=LibraryItem)
+def release_zip_file(sender, instance, **kwargs):
+    """Delete the shared zip file once its last referencing row is gone"""
+    if instance.zip_file:
+        blobs.release(instance.zip_file)
+
+
+@receiver(post_save, sender=LibraryItem)
+@receiver(post_delete, sender=LibraryItem)
+def library_item_changed(sender, instance, **kwargs):
+    """Drop the cached category tree once the change is committed"""
+    transaction.on_commit(invalidate_category_tree)
+
+
+@receiver(post_save, sender=LibraryItem)
+def index_library_item(sender, instance, **kwargs):
+    search.index_item(instance)
+    sync_item_tags(instance)
+
+
+@receiver(post_delete, sender=LibraryItem)
+def unindex_library_item(sender, instance, **kwargs):
+    search.remove_item(instance.pk)
@@ -0,0 +1,55 @@
+"""
+Normalized tags for LibraryItem.
+
+`LibraryItem.tags` stays the comma-separated field clients read and
+write; on every save it is parsed into LibraryTag rows linked through
+`LibraryItem.tag_index`, which is what tag filters and facets query.
+"""
+from django.db.models import Count
+
+from .models import LibraryItem, LibraryTag
+
+MAX_TAG_LENGTH = LibraryTag._meta.get_field('name').max_length
+
+
+def parse_tags(value):
+    """Split a comma-separated tag string into unique, lowercased names."""
+    names = []
+    for raw in (value or '').split(','):
+        name = raw.strip().lower()[:MAX_TAG_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_item_tags(item):
+    """Point `item.tag_index` at the tags currently listed in `item.tags`."""
+    names = parse_tags(item.tags)
+    if names:
+        LibraryTag.objects.bulk_create([LibraryTag(name=name) for name in names], ignore_conflicts=True)
+    item.tag_index.set(LibraryTag.objects.filter(name__in=names))
+
+
+def tag_facets(category=None, subcategory=None, target=None):
+    """
+    Per-tag item counts within the given filters, most used first.
+    
+    Returns:
+        list: {'tag': name, 'count': n} dicts
+    """
+    items = LibraryItem.objects.all()
+    if category:
+        items = items.filter(category=category)
+    if subcategory:
+        items = items.filter(subcategory=subcategory)
+    if target:
+        items = items.filter(target=target)
+
+    through = LibraryItem.tag_index.through
+    rows = (
+        through.objects.filter(libraryitem__in=items)
+        .values('librarytag__name')
+        .annotate(count=Count('libraryitem'))
+        .order_by('-count', 'librarytag__name')
+    )
+    return [{'tag': row['librarytag__name'], 'count': row['count']} for row in rows]
@@ -1,3 +1,1108 @@
-from django.test import TestCase
+import hashlib
+import importlib
+import io
+import json
+import random
+import shutil
+import tempfile
+import zipfile
+import zlib
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from . import analysis, conversion, conversion_cache, converter_pool, events, search, worker
+from .adapters import image_analysis, layout_detection, magicai_converter, palette
+from .models import ConversionBatch, ConversionCacheEntry, ConversionJob, LibraryItem, LibraryTag, TemplateUpload
+from .tags import parse_tags
+from .utils import sanitize, zipstream
+from .utils.http_range import RangeNotSatisfiable, iter_file_range, parse_range_header
+
+
+def png_bytes(size=(120, 80), color=(37, 99, 235)):
+    output = io.BytesIO()
+    Image.new('RGB', size, color).save(output, 'PNG')
+    return output.getvalue()
+
+
+class MediaTestCase(TestCase):
+    """TestCase with MEDIA_ROOT in a temporary directory."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def create_upload(self, title='Landing', **image_options):
+        upload = TemplateUpload(title=title, status='READY')
+        upload.image.save(f'{title}.png', ContentFile(png_bytes(**image_options)), save=False)
+        upload.save()
+        return upload
+
+
+class ConversionQueueTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.upload = self.create_upload()
+
+    def create_job(self, minutes_ago=0, **fields):
+        job = ConversionJob.objects.create(upload=self.upload, target='DJANGO', **fields)
+        ConversionJob.objects.filter(pk=job.pk).update(created_at=timezone.now() - timedelta(minutes=minutes_ago))
+        return job
+
+    def test_claims_oldest_queued_job_once(self):
+        newer = self.create_job(minutes_ago=1)
+        older = self.create_job(minutes_ago=5)
+        self.create_job(minutes_ago=10, status='SUCCESS')
+
+        self.assertEqual(worker.claim_next_job('worker-a'), older.pk)
+        self.assertEqual(worker.claim_next_job('worker-b'), newer.pk)
+        self.assertIsNone(worker.claim_next_job('worker-c'))
+
+        older.refresh_from_db()
+        self.assertEqual((older.status, older.claimed_by), ('RUNNING', 'worker-a'))
+        self.assertIsNotNone(older.claimed_at)
+
+    def test_lost_claim_race_moves_on_to_the_next_job(self):
+        first = self.create_job(minutes_ago=5)
+        second = self.create_job(minutes_ago=1)
+        real_filter = ConversionJob.objects.filter
+
+        def filter_after_other_worker(*args, **kwargs):
+            # Another worker claims `first` between the SELECT and the UPDATE
+            if kwargs.get('pk') == first.pk and kwargs.get('status') == 'QUEUED':
+                real_filter(pk=first.pk).update(status='RUNNING', claimed_by='other')
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(ConversionJob.objects, 'filter', side_effect=filter_after_other_worker):
+            self.assertEqual(worker.claim_next_job('worker-a'), second.pk)
+        first.refresh_from_db()
+        self.assertEqual(first.claimed_by, 'other')
+
+    @override_settings(CONVERSION_JOB_STALE_AFTER=60)
+    def test_requeues_only_stale_running_jobs(self):
+        now = timezone.now()
+        stale = self.create_job(status='RUNNING', claimed_by='gone', claimed_at=now - timedelta(minutes=5))
+        alive = self.create_job(status='RUNNING', claimed_by='busy', claimed_at=now)
+
+        self.assertEqual(worker.requeue_stale_jobs(), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual((stale.status, stale.claimed_by, stale.claimed_at), ('QUEUED', '', None))
+        self.assertEqual((alive.status, alive.claimed_by), ('RUNNING', 'busy'))
+
+    def test_worker_runs_queued_jobs_until_idle(self):
+        jobs = [self.create_job(minutes_ago=minutes) for minutes in (2, 1)]
+
+        self.assertEqual(worker.run_worker(stop_when_idle=True), 2)
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'SUCCESS', job.get_log())
+            self.assertTrue(job.zip_file)
+
+    @override_settings(CONVERSION_JOB_STALE_AFTER=60, CONVERTER_POOL_SIZE=0)
+    def test_running_job_heartbeats_its_claim(self):
+        job = self.create_job(status='RUNNING', claimed_by='worker-a', claimed_at=timezone.now() - timedelta(minutes=5))
+
+        def analyze_during_requeue(upload):
+            # The claim was refreshed when the run started, so it isn't stale
+            self.assertEqual(worker.requeue_stale_jobs(), 0)
+            return analysis.get_analysis(upload)
+
+        with mock.patch.object(conversion, 'get_analysis', side_effect=analyze_during_requeue):
+            conversion.run_conversion_group([job.pk], 'worker-a')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.claimed_by), ('SUCCESS', 'worker-a'))
+
+    @override_settings(CONVERTER_POOL_SIZE=0)
+    def test_run_that_lost_its_claim_leaves_the_job_alone(self):
+        job = self.create_job(status='RUNNING', claimed_by='worker-a', claimed_at=timezone.now())
+
+        def analyze_after_takeover(upload):
+            # Requeued and claimed by another worker mid-run
+            ConversionJob.objects.filter(pk=job.pk).update(claimed_by='worker-b')
+            return analysis.get_analysis(upload)
+
+        with mock.patch.object(conversion, 'get_analysis', side_effect=analyze_after_takeover):
+            conversion.run_conversion_group([job.pk], 'worker-a')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.claimed_by), ('RUNNING', 'worker-b'))
+        self.assertFalse(job.zip_file)
+        self.assertNotIn('Conversion completed', job.get_log())
+
+    @override_settings(CONVERSION_RUN_INLINE=False)
+    def test_api_only_queues_the_job(self):
+        response = self.client.post(
+            reverse('job-list-create'), {'upload': str(self.upload.pk), 'target': 'NEXTJS'},
+        )
+        self.assertEqual(response.status_code, 202)
+        job = ConversionJob.objects.get(pk=response.json()['id'])
+        self.assertEqual((job.status, job.claimed_by), ('QUEUED', ''))
+
+
+class ConversionCacheTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.upload = self.create_upload()
+
+    def run_job(self, upload, target='DJANGO'):
+        job = ConversionJob.objects.create(upload=upload, target=target)
+        worker.run_worker(stop_when_idle=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCESS', job.get_log())
+        return job
+
+    def create_entry(self, key, size, minutes_ago):
+        name = default_storage.save(f'templates/builds/{key}.zip', ContentFile(b'x' * size))
+        return ConversionCacheEntry.objects.create(
+            key=conversion_cache.make_key(key, 'DJANGO'), image_sha256=key, target='DJANGO',
+            converter_version=magicai_converter.CONVERTER_VERSION,
+            zip_file=name, size=size, last_used_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    def test_identical_image_and_target_reuses_the_build(self):
+        first = self.run_job(self.upload)
+        # Same bytes under another upload
+        second = self.run_job(self.create_upload('Copy'))
+
+        self.assertFalse(first.cache_hit)
+        self.assertTrue(second.cache_hit)
+        self.assertEqual(second.zip_file.name, first.zip_file.name)
+        entry = ConversionCacheEntry.objects.get()
+        self.assertEqual(entry.hit_count, 1)
+        self.assertEqual(entry.size, first.zip_file.size)
+
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.image_sha256, conversion_cache.get_image_hash(self.upload))
+
+    def test_other_target_image_or_converter_version_misses(self):
+        self.run_job(self.upload)
+        self.assertFalse(self.run_job(self.upload, target='NEXTJS').cache_hit)
+        self.assertFalse(self.run_job(self.create_upload('Other', color=(200, 30, 30))).cache_hit)
+        with mock.patch.object(magicai_converter, 'CONVERTER_VERSION', 'next'):
+            self.assertFalse(self.run_job(self.upload).cache_hit)
+        self.assertEqual(ConversionCacheEntry.objects.count(), 4)
+
+    @override_settings(CONVERSION_CACHE_ENABLED=False)
+    def test_disabled_cache(self):
+        self.run_job(self.upload)
+        self.assertFalse(self.run_job(self.upload).cache_hit)
+        self.assertFalse(ConversionCacheEntry.objects.exists())
+
+    def test_entry_without_its_file_is_dropped(self):
+        entry = self.create_entry('gone', 10, 0)
+        default_storage.delete(entry.zip_file.name)
+        self.assertIsNone(conversion_cache.lookup('gone', 'DJANGO'))
+        self.assertFalse(ConversionCacheEntry.objects.exists())
+
+    def test_evicts_least_recently_used_entries(self):
+        oldest = self.create_entry('oldest', 100, 30)
+        older = self.create_entry('older', 100, 20)
+        recent = self.create_entry('recent', 100, 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(conversion_cache.evict(max_bytes=150), 2)
+        self.assertEqual(list(ConversionCacheEntry.objects.values_list('image_sha256', flat=True)), ['recent'])
+        self.assertFalse(default_storage.exists(oldest.zip_file.name))
+        self.assertFalse(default_storage.exists(older.zip_file.name))
+        self.assertTrue(default_storage.exists(recent.zip_file.name))
+
+    def test_entries_whose_zip_is_still_used_are_not_evicted(self):
+        shared = self.create_entry('served', 100, 30)
+        ConversionJob.objects.create(upload=self.upload, target='DJANGO', status='SUCCESS', zip_file=shared.zip_file.name)
+        cache_only = self.create_entry('unused', 100, 20)
+
+        self.assertEqual(conversion_cache.get_stats()['cache_only_bytes'], 100)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(conversion_cache.evict(max_bytes=0), 1)
+        self.assertEqual(list(ConversionCacheEntry.objects.values_list('image_sha256', flat=True)), ['served'])
+        self.assertTrue(default_storage.exists(shared.zip_file.name))
+        self.assertFalse(default_storage.exists(cache_only.zip_file.name))
+        self.assertEqual(conversion_cache.get_stats()['cache_only_bytes'], 0)
+
+    def test_stats(self):
+        self.run_job(self.upload)
+        self.run_job(self.upload)
+        stats = self.client.get(reverse('job-cache-stats')).json()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(stats['converter_version'], magicai_converter.CONVERTER_VERSION)
+
+
+class WriteZipTests(SimpleTestCase):
+    def write(self, members):
+        return zipfile.ZipFile(zipstream.write_zip(members, io.BytesIO()))
+
+    def test_members_read_back_with_zipfile(self):
+        members = [
+            ('index.html', '<h1>Hello</h1>\n' * 50),
+            ('static/app.js', 'console.log("hi");'),
+            ('static/logo.bin', bytes(range(256)) * 4),
+            ('empty.txt', ''),
+        ]
+        with self.write(members) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), [name for name, _ in members])
+            for name, data in members:
+                expected = data.encode('utf-8') if isinstance(data, str) else data
+                info = archive.getinfo(name)
+                self.assertEqual(info.compress_type, zipfile.ZIP_DEFLATED)
+                self.assertEqual(info.file_size, len(expected))
+                self.assertEqual(info.CRC, zlib.crc32(expected))
+                self.assertEqual(archive.read(name), expected)
+
+    def test_cached_member_is_written_identically(self):
+        text = 'body { margin: 0; }\n' * 100
+        with self.write([('a.css', text), ('b.css', text)]) as archive:
+            self.assertEqual(archive.getinfo('a.css').CRC, archive.getinfo('b.css').CRC)
+            self.assertEqual(archive.read('a.css'), archive.read('b.css'))
+        self.assertIs(zipstream.deflate_member(text), zipstream.deflate_member(text))
+
+    def test_large_text_is_not_cached(self):
+        text = 'x' * (zipstream.MAX_CACHED_MEMBER_SIZE + 1)
+        self.assertIsNot(zipstream.deflate_member(text), zipstream.deflate_member(text))
+        with self.write([('big.txt', text)]) as archive:
+            self.assertEqual(archive.read('big.txt'), text.encode('utf-8'))
+
+    def test_unseekable_output(self):
+        class WriteOnly(io.RawIOBase):
+            def __init__(self):
+                self.buffer = bytearray()
+
+            def writable(self):
+                return True
+
+            def write(self, data):
+                self.buffer += data
+                return len(data)
+
+        out = zipstream.write_zip([('index.html', '<p>Hi</p>')], WriteOnly())
+        with zipfile.ZipFile(io.BytesIO(bytes(out.buffer))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.read('index.html'), b'<p>Hi</p>')
+
+    def test_non_ascii_name_and_content(self):
+        with self.write([('pages/café.html', 'Crème brûlée 🍮')]) as archive:
+            info = archive.getinfo('pages/café.html')
+            self.assertTrue(info.flag_bits & zipstream.UTF8_NAME_FLAG)
+            self.assertEqual(archive.read(info).decode('utf-8'), 'Crème brûlée 🍮')
+
+    def test_empty_archive(self):
+        with self.write([]) as archive:
+            self.assertEqual(archive.namelist(), [])
+
+
+class ConversionZipTests(MediaTestCase):
+    def test_job_zip_holds_the_generated_pack(self):
+        upload = self.create_upload()
+        job = ConversionJob.objects.create(upload=upload, target='NEXTJS')
+        worker.run_worker(stop_when_idle=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'SUCCESS', job.get_log())
+
+        members = magicai_converter.build_pack(upload.image.path, 'NEXTJS')
+        with job.zip_file.open('rb') as f, zipfile.ZipFile(f) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(sorted(archive.namelist()), sorted(name for name, _ in members))
+            for name, data in members:
+                expected = data.encode('utf-8') if isinstance(data, str) else data
+                self.assertEqual(archive.read(name), expected)
+        # The archive is the only file written under builds/
+        self.assertEqual(default_storage.listdir('templates/builds')[1], [job.zip_file.name.rsplit('/', 1)[1]])
+
+
+class SharedZipTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = ConversionJob.objects.create(upload=self.create_upload(), target='DJANGO')
+        worker.run_worker(stop_when_idle=True)
+        self.job.refresh_from_db()
+        self.name = self.job.zip_file.name
+        # Only the job and the library item share it in these tests
+        ConversionCacheEntry.objects.all().delete()
+
+    def promote(self):
+        response = self.client.post(reverse('library-list-create'), {'job_id': str(self.job.pk), 'name': 'Promoted'})
+        self.assertEqual(response.status_code, 201)
+        return LibraryItem.objects.get(pk=response.json()['id'])
+
+    def test_promotion_shares_the_job_zip(self):
+        item = self.promote()
+        self.assertEqual(item.zip_file.name, self.name)
+        self.assertEqual(len(default_storage.listdir('templates/builds')[1]), 1)
+        self.assertFalse(default_storage.exists('templates/library'))
+
+    def test_file_outlives_all_but_its_last_user(self):
+        item = self.promote()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(reverse('job-detail', args=[self.job.pk])).status_code, 204)
+        self.assertTrue(default_storage.exists(self.name))
+        self.assertEqual(self.client.get(reverse('library-download', args=[item.pk])).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.delete(reverse('library-detail', args=[item.pk])).status_code, 204)
+        self.assertFalse(default_storage.exists(self.name))
+
+    def test_unshared_file_is_deleted_only_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.job.delete()
+            self.assertTrue(default_storage.exists(self.name))
+        for callback in callbacks:
+            callback()
+        self.assertFalse(default_storage.exists(self.name))
+
+
+class ParseRangeHeaderTests(SimpleTestCase):
+    def test_closed_range(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), (0, 99))
+        self.assertEqual(parse_range_header('bytes=500-2000', 1000), (500, 999))
+
+    def test_open_ended_range(self):
+        self.assertEqual(parse_range_header('bytes=900-', 1000), (900, 999))
+        self.assertEqual(parse_range_header('bytes=0-', 1000), (0, 999))
+
+    def test_suffix_range(self):
+        self.assertEqual(parse_range_header('bytes=-100', 1000), (900, 999))
+        # Longer than the file: the whole file
+        self.assertEqual(parse_range_header('bytes=-5000', 1000), (0, 999))
+
+    def test_unsatisfiable(self):
+        for header, size in (('bytes=1000-', 1000), ('bytes=1500-1600', 1000), ('bytes=-0', 1000), ('bytes=-10', 0)):
+            with self.subTest(header=header, size=size), self.assertRaises(RangeNotSatisfiable):
+                parse_range_header(header, size)
+
+    def test_ignored_headers(self):
+        for header in ('', None, 'bytes=-', 'bytes=10-5', 'bytes=0-1,5-6', 'items=0-5', 'bytes=a-b'):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range_header(header, 1000))
+
+    def test_iter_file_range(self):
+        fileobj = io.BytesIO(bytes(range(200)))
+        self.assertEqual(b''.join(iter_file_range(fileobj, 10, 149, chunk_size=16)), bytes(range(10, 150)))
+        self.assertTrue(fileobj.closed)
+
+
+@override_settings(LIBRARY_DOWNLOAD_OFFLOAD='')
+class LibraryDownloadTests(MediaTestCase):
+    content = bytes(range(256)) * 8
+
+    def setUp(self):
+        super().setUp()
+        self.item = LibraryItem(name='Range test', target='DJANGO')
+        self.item.zip_file.save('range-test.zip', ContentFile(self.content), save=False)
+        self.item.save()
+        self.url = reverse('library-download', args=[self.item.pk])
+
+    def get(self, **headers):
+        response = self.client.get(self.url, **headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_download(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.content).hexdigest()}"')
+        self.assertEqual(body, self.content)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.zip_sha256, hashlib.sha256(self.content).hexdigest())
+
+    def test_conditional_get(self):
+        response, _ = self.get()
+        for headers in ({'HTTP_IF_NONE_MATCH': response['ETag']}, {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}):
+            with self.subTest(headers=headers):
+                not_modified, body = self.get(**headers)
+                self.assertEqual(not_modified.status_code, 304)
+                self.assertEqual(not_modified['ETag'], response['ETag'])
+                self.assertEqual(body, b'')
+        self.assertEqual(self.get(HTTP_IF_NONE_MATCH='"other"')[0].status_code, 200)
+
+    def test_suffix_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=-100')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {len(self.content) - 100}-{len(self.content) - 1}/{len(self.content)}')
+        self.assertEqual(body, self.content[-100:])
+
+    def test_open_ended_range(self):
+        response, body = self.get(HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], str(len(self.content) - 1000))
+        self.assertEqual(body, self.content[1000:])
+
+    def test_range_not_satisfiable(self):
+        response, _ = self.get(HTTP_RANGE=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_if_range(self):
+        etag = self.get()[0]['ETag']
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag)
+        self.assertEqual((response.status_code, body), (206, self.content[:10]))
+        # A stale validator gets the whole file
+        response, body = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+    @override_settings(LIBRARY_DOWNLOAD_OFFLOAD='x-accel', LIBRARY_DOWNLOAD_ACCEL_PREFIX='/protected-media/')
+    def test_offload_to_proxy(self):
+        response, body = self.get(HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.item.zip_file.name}')
+        self.assertEqual(body, b'')
+
+
+class CategoryTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def create_item(self, name, category, subcategory, target='DJANGO'):
+        return LibraryItem.objects.create(
+            name=name, target=target, category=category, subcategory=subcategory,
+            zip_file=f'templates/library/{name}.zip',
+        )
+
+    def test_counts_per_category_and_subcategory(self):
+        self.create_item('Home', 'main-website', 'homepage')
+        self.create_item('Home', 'main-website', 'homepage', target='NEXTJS')
+        self.create_item('About', 'main-website', 'about-page')
+        self.create_item('Posts', 'blog', 'blog-listing')
+
+        tree = self.client.get(reverse('library-categories')).json()
+        self.assertEqual(tree, [
+            {
+                'category': 'blog', 'category_display': 'Blog', 'item_count': 1,
+                'subcategories': [{'subcategory': 'blog-listing', 'subcategory_display': 'Blog Listing', 'item_count': 1}],
+            },
+            {
+                'category': 'main-website', 'category_display': 'Main Website', 'item_count': 3,
+                'subcategories': [
+                    {'subcategory': 'about-page', 'subcategory_display': 'About Page', 'item_count': 1},
+                    {'subcategory': 'homepage', 'subcategory_display': 'Homepage', 'item_count': 2},
+                ],
+            },
+        ])
+
+    def test_cached_until_an_item_changes(self):
+        self.create_item('Home', 'main-website', 'homepage')
+        url = reverse('library-categories')
+        with self.assertNumQueries(1):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item = self.create_item('Posts', 'blog', 'blog-listing')
+        self.assertEqual([row['category'] for row in self.client.get(url).json()], ['blog', 'main-website'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assertEqual([row['category'] for row in self.client.get(url).json()], ['main-website'])
+
+
+class KeysetPaginationTests(MediaTestCase):
+    def walk(self, url, page_size):
+        """Ids of every row, following `next` links from the first page."""
+        ids = []
+        url = f"{url}?page_size={page_size}"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page['results']), page_size)
+            ids += [row['id'] for row in page['results']]
+            url = page['next']
+        return ids
+
+    def test_uploads_round_trip_with_ties_on_created_at(self):
+        now = timezone.now()
+        for index in range(7):
+            upload = TemplateUpload.objects.create(title=f'Upload {index}', image=f'templates/uploads/{index}.png')
+            # Three rows share each timestamp, so pages end inside a tie
+            TemplateUpload.objects.filter(pk=upload.pk).update(created_at=now - timedelta(minutes=index // 3))
+        expected = [str(pk) for pk in TemplateUpload.objects.order_by('-created_at', '-id').values_list('id', flat=True)]
+
+        for page_size in (1, 2, 3, 100):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(reverse('upload-list-create'), page_size), expected)
+
+    def test_jobs_newest_first(self):
+        upload = self.create_upload()
+        now = timezone.now()
+        for minutes in (3, 1, 2):
+            job = ConversionJob.objects.create(upload=upload, target='DJANGO')
+            ConversionJob.objects.filter(pk=job.pk).update(created_at=now - timedelta(minutes=minutes))
+        expected = [str(pk) for pk in ConversionJob.objects.order_by('-created_at').values_list('id', flat=True)]
+        self.assertEqual(self.walk(reverse('job-list-create'), 2), expected)
+
+    def test_library_in_browsing_order(self):
+        for category, subcategory, name in (
+            ('blog', 'blog-post', 'Zebra'),
+            ('blog', 'blog-listing', 'Alpha'),
+            ('main-website', 'homepage', 'Alpha'),
+            ('blog', 'blog-post', 'Alpha'),
+        ):
+            # Same category, subcategory and name for both targets: a tie
+            for target in ('DJANGO', 'NEXTJS'):
+                LibraryItem.objects.create(
+                    name=name, target=target, category=category, subcategory=subcategory,
+                    zip_file=f'templates/library/{name}-{target}.zip',
+                )
+        rows = LibraryItem.objects.order_by('category', 'subcategory', 'name', 'id')
+        self.assertEqual(
+            [(row.subcategory, row.name) for row in rows[::2]],
+            [('blog-listing', 'Alpha'), ('blog-post', 'Alpha'), ('blog-post', 'Zebra'), ('homepage', 'Alpha')],
+        )
+        expected = [str(row.id) for row in rows]
+
+        for page_size in (1, 3, 5):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(reverse('library-list-create'), page_size), expected)
+
+    def test_page_size_is_capped(self):
+        for index in range(3):
+            TemplateUpload.objects.create(title=f'Upload {index}', image=f'templates/uploads/{index}.png')
+        url = reverse('upload-list-create')
+        self.assertEqual(len(self.client.get(url, {'page_size': 0}).json()['results']), 1)
+        with mock.patch('templates_app.pagination.KeysetPagination.max_page_size', 2):
+            page = self.client.get(url, {'page_size': 50}).json()
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNotNone(page['next'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', 'W10', 'eyJhIjogMX0'):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse('upload-list-create'), {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class LibrarySearchTests(TestCase):
+    def setUp(self):
+        self.landing = self.create_item('Landing Page', 'landing-page', 'lead-capture', description='Hero and signup form')
+        self.shop = self.create_item('Shop Front', 'ecommerce', 'product-listing', tags='store, landing')
+        self.blog = self.create_item('Blog Home', 'blog', 'blog-listing', target='NEXTJS', description='Paged list of posts')
+
+    def create_item(self, name, category, subcategory, target='DJANGO', **fields):
+        return LibraryItem.objects.create(
+            name=name, target=target, category=category, subcategory=subcategory,
+            zip_file=f'templates/library/{name}.zip', **fields,
+        )
+
+    def names(self, query, **filters):
+        return [item.name for item in search.search_library(query, **filters)]
+
+    def test_every_word_matches_as_a_prefix(self):
+        self.assertEqual(self.names('land pa'), ['Landing Page'])
+        self.assertEqual(sorted(self.names('land')), ['Landing Page', 'Shop Front'])
+        self.assertEqual(self.names('SIGNUP'), ['Landing Page'])
+        self.assertEqual(self.names('landing posts'), [])
+        self.assertEqual(self.names('  !! '), [])
+
+    def test_filters(self):
+        self.assertEqual(self.names('land', category='ecommerce'), ['Shop Front'])
+        self.assertEqual(self.names('land', subcategory='lead-capture'), ['Landing Page'])
+        self.assertEqual(self.names('pag', target='NEXTJS'), ['Blog Home'])
+        self.assertEqual(self.names('land', target='NEXTJS'), [])
+
+    def test_best_matches_first(self):
+        filler = 'Reusable section with header, body and footer blocks'
+        LibraryItem.objects.bulk_create(
+            LibraryItem(
+                name=f'Section {i}', target='DJANGO', category='blog', description=f'{filler}, landing',
+                zip_file=f'templates/library/section-{i}.zip',
+            )
+            for i in range(520)
+        )
+        best = self.create_item('Landing Landing', 'landing-page', 'lead-capture', tags='landing')
+        search.rebuild_index()
+
+        # Ranked over every match, not just the first rows the index returns
+        results = search.search_library('landing', limit=3)
+        self.assertEqual(results[0], best)
+        self.assertEqual(len(search.search_library('landing', limit=200)), 200)
+
+    def test_index_follows_saves_and_deletes(self):
+        self.landing.name = 'Signup Funnel'
+        self.landing.save()
+        self.assertEqual(self.names('funnel'), ['Signup Funnel'])
+        self.assertEqual(self.names('land pa'), [])
+
+        self.shop.delete()
+        self.assertEqual(self.names('store'), [])
+        self.assertEqual(search.rebuild_index(), 2)
+        self.assertEqual(self.names('blog'), ['Blog Home'])
+
+    def test_endpoint(self):
+        url = reverse('library-search')
+        response = self.client.get(url, {'q': 'land pa', 'limit': 5})
+        self.assertEqual([row['name'] for row in response.json()['results']], ['Landing Page'])
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url, {'q': 'land', 'limit': 'many'}).status_code, 400)
+
+
+class LibraryTagTests(TestCase):
+    def create_item(self, name, tags, category='main-website', target='DJANGO'):
+        return LibraryItem.objects.create(
+            name=name, target=target, category=category, tags=tags,
+            zip_file=f'templates/library/{name}.zip',
+        )
+
+    def tag_names(self, item):
+        return sorted(item.tag_index.values_list('name', flat=True))
+
+    def test_parse_tags(self):
+        self.assertEqual(parse_tags(' Dark, responsive,,dark ,SaaS '), ['dark', 'responsive', 'saas'])
+        self.assertEqual(parse_tags(''), [])
+        self.assertEqual(parse_tags(None), [])
+        self.assertEqual(parse_tags('x' * 80), ['x' * LibraryTag._meta.get_field('name').max_length])
+
+    def test_tags_follow_the_item(self):
+        item = self.create_item('Home', 'Dark, Responsive')
+        self.assertEqual(self.tag_names(item), ['dark', 'responsive'])
+
+        item.tags = 'responsive, minimal'
+        item.save()
+        self.assertEqual(self.tag_names(item), ['minimal', 'responsive'])
+        # Tags are shared, not duplicated per item
+        self.create_item('About', 'minimal')
+        self.assertEqual(LibraryTag.objects.filter(name='minimal').count(), 1)
+
+    def test_facets_and_tag_filter(self):
+        self.create_item('Home', 'dark, responsive')
+        self.create_item('About', 'responsive')
+        self.create_item('Shop', 'responsive, cart', category='ecommerce', target='NEXTJS')
+
+        self.assertEqual(self.client.get(reverse('library-tags')).json(), [
+            {'tag': 'responsive', 'count': 3},
+            {'tag': 'cart', 'count': 1},
+            {'tag': 'dark', 'count': 1},
+        ])
+        self.assertEqual(self.client.get(reverse('library-tags'), {'category': 'main-website'}).json(), [
+            {'tag': 'responsive', 'count': 2},
+            {'tag': 'dark', 'count': 1},
+        ])
+        self.assertEqual(self.client.get(reverse('library-tags'), {'target': 'NEXTJS'}).json()[0], {'tag': 'cart', 'count': 1})
+
+        page = self.client.get(reverse('library-list-create'), {'tag': ' Responsive '}).json()
+        self.assertEqual(sorted(row['name'] for row in page['results']), ['About', 'Home', 'Shop'])
+        page = self.client.get(reverse('library-list-create'), {'tag': 'dark'}).json()
+        self.assertEqual([row['name'] for row in page['results']], ['Home'])
+        page = self.client.get(reverse('library-list-create'), {'target': 'NEXTJS'}).json()
+        self.assertEqual([row['name'] for row in page['results']], ['Shop'])
+
+    def test_backfill_migration(self):
+        home = self.create_item('Home', '')
+        about = self.create_item('About', '')
+        # Tags written before the tag table existed
+        LibraryItem.objects.filter(pk=home.pk).update(tags='Dark, responsive, dark')
+        LibraryItem.objects.filter(pk=about.pk).update(tags='responsive')
+
+        migration = importlib.import_module('templates_app.migrations.0010_backfill_library_tags')
+        migration.backfill_tags(apps, None)
+        # Running it again adds nothing
+        migration.backfill_tags(apps, None)
+
+        self.assertEqual(self.tag_names(home), ['dark', 'responsive'])
+        self.assertEqual(self.tag_names(about), ['responsive'])
+        self.assertEqual(LibraryTag.objects.count(), 2)
+
+
+class ConversionJobLogTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job = ConversionJob.objects.create(upload=self.create_upload(), target='DJANGO')
+
+    def test_appends_and_reads_from_an_offset(self):
+        self.assertEqual(self.job.read_log(), ('', 0))
+        self.assertEqual(self.job.append_log('first'), 6)
+        self.assertEqual(self.job.append_log('second line'), 18)
+        self.assertEqual(list(self.job.log_chunks.values_list('offset', flat=True)), [0, 6])
+
+        self.assertEqual(self.job.read_log(), ('first\nsecond line\n', 18))
+        self.assertEqual(self.job.read_log(6), ('second line\n', 18))
+        # An offset inside a chunk returns the rest of that chunk
+        self.assertEqual(self.job.read_log(3), ('st\nsecond line\n', 18))
+        self.assertEqual(self.job.read_log(18), ('', 18))
+        self.assertEqual(self.job.get_log(), 'first\nsecond line\n')
+
+    def test_detail_endpoint_since(self):
+        url = reverse('job-detail', args=[self.job.pk])
+        self.job.append_log('first')
+        data = self.client.get(url).json()
+        self.assertEqual((data['log'], data['log_offset']), ('first\n', 6))
+
+        self.job.append_log('second')
+        data = self.client.get(url, {'since': data['log_offset']}).json()
+        self.assertEqual((data['log'], data['log_offset']), ('second\n', 13))
+        data = self.client.get(url, {'since': data['log_offset']}).json()
+        self.assertEqual((data['log'], data['log_offset']), ('', 13))
+
+        for since in ('-1', 'abc'):
+            self.assertEqual(self.client.get(url, {'since': since}).status_code, 400)
+
+    def test_conversion_only_appends(self):
+        worker.run_worker(stop_when_idle=True)
+        self.job.refresh_from_db()
+        log = self.job.get_log()
+        self.assertTrue(log.startswith('Starting template conversion...\n'))
+        self.assertIn('Conversion completed successfully!', log)
+        self.assertEqual(self.job.log_chunks.count(), 2)
+
+
+class JobEventStreamTests(TransactionTestCase):
+    """
+    job_event_stream() polls from an executor thread with its own database
+    connection, which can't see rows inside a TestCase's open transaction.
+    """
+
+    def setUp(self):
+        upload = TemplateUpload.objects.create(title='Landing', status='READY', image='templates/uploads/landing.png')
+        self.job = ConversionJob.objects.create(upload=upload, target='DJANGO', status='RUNNING')
+
+    def stream(self, **options):
+        async def collect():
+            return [message async for message in events.job_event_stream(self.job.pk, poll_interval=0, **options)]
+        messages = async_to_sync(collect)()
+        self.assertTrue(messages[0].startswith('retry: '))
+        return [
+            (event.removeprefix('event: '), json.loads(data.removeprefix('data: ')))
+            for event, data, _ in (message.split('\n', 2) for message in messages[1:])
+        ]
+
+    def test_streams_until_the_job_finishes(self):
+        self.job.append_log('Starting template conversion...')
+        ConversionJob.objects.filter(pk=self.job.pk).update(status='SUCCESS')
+
+        (status, job), (log, text), (end, reason) = self.stream(max_duration=60)
+        self.assertEqual((status, job['status']), ('status', 'SUCCESS'))
+        self.assertEqual((log, text), ('log', {'text': 'Starting template conversion...\n', 'offset': 32}))
+        self.assertEqual((end, reason), ('end', {'reason': 'finished', 'status': 'SUCCESS'}))
+
+    def test_ends_on_timeout_and_deletion(self):
+        self.assertEqual(
+            [event for event, _ in self.stream(max_duration=-1)],
+            ['status', 'end'],
+        )
+        self.job.delete()
+        self.assertEqual(self.stream(max_duration=60), [('end', {'reason': 'deleted'})])
+
+
+@override_settings(CONVERSION_RUN_INLINE=False)
+class ConversionBatchTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.uploads = [self.create_upload(f'Page {index}', color=(index * 60, 90, 200)) for index in range(2)]
+
+    def create(self, uploads, targets):
+        return self.client.post(
+            reverse('job-batch-create'), {'uploads': uploads, 'targets': targets}, content_type='application/json',
+        )
+
+    def test_creates_a_queued_job_per_upload_and_target(self):
+        upload_ids = [str(upload.pk) for upload in self.uploads]
+        response = self.create(upload_ids + upload_ids[:1], ['DJANGO', 'NEXTJS', 'DJANGO'])
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        self.assertEqual(data['total'], 4)
+        self.assertEqual(data['counts'], {'QUEUED': 4, 'RUNNING': 0, 'SUCCESS': 0, 'ERROR': 0})
+        self.assertEqual((data['progress'], data['done']), (0.0, False))
+
+        batch = ConversionBatch.objects.get(pk=data['id'])
+        self.assertEqual(
+            sorted(batch.jobs.values_list('upload__title', 'target')),
+            [('Page 0', 'DJANGO'), ('Page 0', 'NEXTJS'), ('Page 1', 'DJANGO'), ('Page 1', 'NEXTJS')],
+        )
+
+    def test_rejects_unknown_uploads_and_oversized_batches(self):
+        missing = '00000000-0000-0000-0000-000000000000'
+        self.assertEqual(self.create([str(self.uploads[0].pk), missing], ['DJANGO']).status_code, 404)
+        with mock.patch('templates_app.serializers.CreateConversionBatchSerializer.max_jobs', 3):
+            self.assertEqual(self.create([str(upload.pk) for upload in self.uploads], ['DJANGO', 'NEXTJS']).status_code, 400)
+        self.assertFalse(ConversionJob.objects.exists())
+
+    def test_targets_of_one_upload_run_together_with_one_analysis(self):
+        batch_id = self.create([str(upload.pk) for upload in self.uploads], ['DJANGO', 'NEXTJS']).json()['id']
+
+        with mock.patch.object(conversion, 'get_analysis', wraps=analysis.get_analysis) as analyze:
+            self.assertEqual(worker.run_worker(max_jobs=1), 2)
+        self.assertEqual(analyze.call_count, 1)
+        first = ConversionJob.objects.filter(status='SUCCESS')
+        self.assertEqual(first.values('upload').distinct().count(), 1)
+        upload = TemplateUpload.objects.get(pk=first[0].upload_id)
+        self.assertEqual(upload.analysis['version'], image_analysis.ANALYSIS_VERSION)
+
+        progress = self.client.get(reverse('job-batch-detail', args=[batch_id])).json()
+        self.assertEqual(progress['counts'], {'QUEUED': 2, 'RUNNING': 0, 'SUCCESS': 2, 'ERROR': 0})
+        self.assertEqual((progress['progress'], progress['done']), (0.5, False))
+
+        worker.run_worker(stop_when_idle=True)
+        progress = self.client.get(reverse('job-batch-detail', args=[batch_id]), {'jobs': 1}).json()
+        self.assertEqual((progress['progress'], progress['done']), (1.0, True))
+        self.assertEqual([job['status'] for job in progress['jobs']], ['SUCCESS'] * 4)
+
+
+def striped_image(stripes, size=(60, 60), mode='RGB'):
+    """An image of vertical stripes, given as (color, width) pairs."""
+    img = Image.new(mode, size)
+    left = 0
+    for color, width in stripes:
+        img.paste(color, (left, 0, left + width, size[1]))
+        left += width
+    return img
+
+
+class PaletteTests(SimpleTestCase):
+    def test_kmeans_finds_the_colors_and_their_shares(self):
+        img = striped_image([((255, 255, 255), 30), ((37, 99, 235), 20), ((234, 88, 12), 10)])
+        result = palette.extract_palette(img)
+        self.assertEqual(
+            [(entry['color'], round(entry['weight'], 2)) for entry in result['colors']],
+            [('#ffffff', 0.5), ('#2563eb', 0.33), ('#ea580c', 0.17)],
+        )
+        self.assertEqual(result['transparent'], 0)
+        # Seeded, so the same image always gives the same palette
+        self.assertEqual(palette.extract_palette(img), result)
+
+    def test_median_cut_fallback_without_numpy(self):
+        img = striped_image([((255, 255, 255), 30), ((37, 99, 235), 30)])
+        with mock.patch.object(palette, 'np', None):
+            result = palette.extract_palette(img)
+        self.assertEqual([entry['color'] for entry in result['colors']], ['#ffffff', '#2563eb'])
+
+    def test_transparent_pixels_are_left_out(self):
+        img = striped_image([((0, 0, 0, 0), 45), ((220, 38, 38, 255), 15)], mode='RGBA')
+        result = palette.extract_palette(img)
+        self.assertEqual([entry['color'] for entry in result['colors']], ['#dc2626'])
+        self.assertEqual(result['transparent'], 0.75)
+        self.assertEqual(palette.assign_roles(result)['background_color'], palette.DEFAULT_BACKGROUND)
+
+    def test_assign_roles(self):
+        roles = palette.assign_roles({'colors': [
+            {'color': '#f8fafc', 'weight': 0.6},
+            {'color': '#1e293b', 'weight': 0.2},
+            {'color': '#2563eb', 'weight': 0.15},
+            {'color': '#f59e0b', 'weight': 0.05},
+        ], 'transparent': 0})
+        self.assertEqual(roles, {
+            'primary_color': '#2563eb',
+            'secondary_color': '#1e293b',
+            'accent_color': '#f59e0b',
+            'background_color': '#f8fafc',
+        })
+        # A single color fills every brand role
+        one = palette.assign_roles({'colors': [{'color': '#2563eb', 'weight': 1.0}]})
+        self.assertEqual(set(one.values()), {'#2563eb', palette.DEFAULT_BACKGROUND})
+        self.assertEqual(palette.assign_roles({'colors': []}), {})
+
+
+def page_image(width=1280, strip=False):
+    """
+    A landing page screenshot: header, hero, three feature cards, a text
+    block and a footer on white. `strip` adds a full-width band of noise
+    (a photo) inside the hero.
+    """
+    scale = width / 1280
+    img = Image.new('RGB', (width, round(2000 * scale)), (255, 255, 255))
+    draw = ImageDraw.Draw(img)
+
+    def box(left, top, right, bottom, fill):
+        draw.rectangle([round(value * scale) for value in (left, top, right, bottom)], fill=fill)
+
+    box(0, 0, 1280, 80, (17, 24, 39))
+    box(66, 30, 200, 50, (255, 255, 255))
+    box(0, 80, 1280, 800, (30, 64, 175))
+    box(200, 166, 1080, 233, (255, 255, 255))
+    if strip:
+        top, bottom = round(400 * scale), round(500 * scale)
+        size = (width, bottom - top)
+        img.paste(Image.frombytes('RGB', size, random.Random(0).randbytes(size[0] * size[1] * 3)), (0, top))
+    for left in (100, 466, 832):
+        box(left, 966, left + 300, 1300, (229, 231, 235))
+        box(left + 33, 1033, left + 266, 1066, (55, 65, 81))
+    box(200, 1466, 1080, 1633, (243, 244, 246))
+    box(266, 1516, 1000, 1550, (55, 65, 81))
+    box(0, 1800, 1280, 2000, (17, 24, 39))
+    box(100, 1866, 500, 1900, (156, 163, 175))
+    return img
+
+
+class LayoutDetectionTests(SimpleTestCase):
+    def bands(self, img):
+        return [
+            (band['name'], round(band['top'], 2), round(band['bottom'], 2), band['columns'])
+            for band in layout_detection.detect_bands(img)
+        ]
+
+    def test_bands_of_a_page(self):
+        expected = [
+            ('header', 0.0, 0.04, 1),
+            ('hero', 0.04, 0.4, 1),
+            ('features-grid', 0.48, 0.69, 3),
+            ('cta', 0.69, 0.85, 1),
+            ('footer', 0.9, 1.0, 1),
+        ]
+        self.assertEqual(self.bands(page_image()), expected)
+        self.assertEqual(self.bands(page_image(width=3840)), expected)
+
+    def test_noisy_strip_stays_inside_a_4k_hero(self):
+        self.assertEqual(self.bands(page_image(width=3840, strip=True)), self.bands(page_image(width=3840)))
+
+    def test_blank_page_and_no_numpy(self):
+        self.assertEqual(layout_detection.detect_bands(Image.new('RGB', (1280, 2000), (255, 255, 255))), [])
+        with mock.patch.object(layout_detection, 'np', None):
+            self.assertIsNone(layout_detection.detect_bands(page_image()))
+
+    def test_labels(self):
+        def names(bands):
+            return [band['name'] for band in layout_detection.label_bands(bands, 100)]
+
+        self.assertEqual(
+            names([(0, 5, 4), (5, 35, 1), (40, 60, 3), (60, 75, 1), (75, 85, 1), (90, 100, 2)]),
+            ['header', 'hero', 'features-grid', 'content', 'cta', 'footer'],
+        )
+        # A tall first band is the hero, and a tall last one isn't a footer
+        self.assertEqual(names([(0, 40, 1), (40, 100, 2)]), ['hero', 'content'])
+        self.assertEqual(names([(0, 100, 1)]), ['hero'])
+        self.assertEqual(names([]), [])
+
+
+class PaletteCacheTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_palette_is_cached_by_content(self):
+        first = self.create_upload(color=(220, 38, 38))
+        second = self.create_upload(color=(220, 38, 38))
+        with mock.patch.object(palette, 'extract_palette', wraps=palette.extract_palette) as extract:
+            roles = analysis.get_palette(first.image)['roles']
+            self.assertEqual(analysis.get_palette(second.image)['roles'], roles)
+        self.assertEqual(extract.call_count, 1)
+        self.assertEqual(roles['primary_color'], '#dc2626')
+
+
+class SanitizeTextTests(SimpleTestCase):
+    def test_astral_replacements_apply(self):
+        text = 'Launch \U0001F680 \U0001F44B \U0001F4A5 \U0001F525 \U0001F31F'
+        expected = 'Launch [rocket] [wave] [boom] [fire] [glowing-star]'
+        self.assertEqual(sanitize.sanitize_text(text), expected)
+        self.assertEqual(sanitize.sanitize_text(text, ascii_only=True), expected)
+        self.assertEqual(sanitize.sanitize_text(text, aggressive=True), expected)
+        # Text that only looks like the old, broken keys is left alone
+        self.assertEqual(sanitize.sanitize_text('\u1F680'), '\u1F680')
+
+    def test_default_keeps_other_characters(self):
+        self.assertEqual(sanitize.sanitize_text('caf\u00e9 \u2014 \U0001F600\x07\tok'), 'caf\u00e9 - \U0001F600\tok')
+
+    def test_ascii_only_emoji_ranges(self):
+        for char in ('\U0001F300', '\U0001F600', '\U0001F64F', '\U0001F923', '\U0001FAFF', '\u2600', '\u2764', '\u27BF', '\U0001F1FA'):
+            self.assertEqual(sanitize.sanitize_text(char, ascii_only=True), '[emoji]', hex(ord(char)))
+        for char in ('\u00e9', '\u25FF', '\u27C0', '\U0001FB00', '\U00020000'):
+            self.assertEqual(sanitize.sanitize_text(char, ascii_only=True), '?', hex(ord(char)))
+        # Control characters are still removed; other whitespace becomes a space
+        self.assertEqual(sanitize.sanitize_text('a\tb\x07\x7f', aggressive=True), 'a b ')
+
+
+class PackFragmentTests(SimpleTestCase):
+    def test_render_fills_slots_and_sanitizes_only_the_values(self):
+        fragment = magicai_converter.Fragment('<h1 class="${classes}">\x01${title}</h1>${classes}')
+        self.assertEqual(fragment.slots, ['classes', 'title', 'classes'])
+        self.assertEqual(
+            fragment.render(classes='hero', title='Caf\u00e9\x02'),
+            '<h1 class="hero">Caf\u00e9</h1>hero',
+        )
+        with self.assertRaises(KeyError):
+            fragment.render(classes='hero')
+
+    def test_packs_reuse_the_precomputed_static_members(self):
+        for target, static_members in (
+            ('DJANGO', magicai_converter.DJANGO_STATIC_MEMBERS),
+            ('NEXTJS', magicai_converter.NEXTJS_STATIC_MEMBERS),
+        ):
+            with self.subTest(target=target):
+                analysis = {'width': 1440, 'height': 900, 'aspect_ratio': 1.6}
+                first = dict(magicai_converter.build_pack('unused.png', target, analysis=analysis))
+                second = dict(magicai_converter.build_pack('unused.png', target, analysis=dict(analysis, width=800)))
+                for name, content in static_members:
+                    self.assertIs(first[name], content)
+                    self.assertIs(second[name], content)
+                self.assertNotEqual(first['README.md'], second['README.md'])
+                for name, content in first.items():
+                    self.assertNotIn('${', content, name)
+
+
+@override_settings(CONVERTER_POOL_SIZE=1)
+class ConverterPoolTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        converter_pool.shutdown()
+        self.addCleanup(converter_pool.shutdown)
+        self.upload = self.create_upload()
+
+    def run_targets(self, targets):
+        jobs = [ConversionJob.objects.create(upload=self.upload, target=target) for target in targets]
+        conversion.run_conversion_group([job.pk for job in jobs])
+        for job in jobs:
+            job.refresh_from_db()
+        return jobs
+
+    def test_pool_builds_the_same_packs(self):
+        jobs = self.run_targets(['DJANGO', 'NEXTJS'])
+        for job in jobs:
+            self.assertEqual(job.status, 'SUCCESS', job.get_log())
+            self.assertLessEqual({'generate', 'zip', 'persist', 'cache_store', 'total'}, set(job.timings))
+            members = magicai_converter.build_pack(self.upload.image.path, job.target)
+            with job.zip_file.open('rb') as f, zipfile.ZipFile(f) as archive:
+                self.assertEqual(
+                    {name: archive.read(name) for name in archive.namelist()},
+                    {name: content.encode('utf-8') for name, content in members},
+                )
+        self.assertIsNotNone(converter_pool._pool)
+
+    @override_settings(CONVERTER_POOL_TASK_TIMEOUT=0)
+    def test_timeout_fails_the_job_and_drops_the_pool(self):
+        pool = converter_pool.get_pool()
+        [job] = self.run_targets(['DJANGO'])
+        self.assertEqual(job.status, 'ERROR')
+        self.assertIn('TIMEOUT: Conversion did not finish within 0 seconds', job.get_log())
+        self.assertIsNone(converter_pool._pool)
+        self.assertIsNot(converter_pool.get_pool(), pool)
+
+    def test_later_jobs_get_a_new_pool_after_a_timeout(self):
+        second_upload = self.create_upload('Second')
+        # Already analyzed, so its job goes straight to the build
+        analysis.get_analysis(second_upload)
+        jobs = [ConversionJob.objects.create(upload=upload, target='DJANGO') for upload in (self.upload, second_upload)]
+        with override_settings(CONVERTER_POOL_TASK_TIMEOUT=0):
+            conversion.run_conversion_group([job.pk for job in jobs])
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'ERROR')
+            self.assertIn('TIMEOUT', job.get_log())
+            self.assertNotIn('Pool not running', job.get_log())
+
+        # The next run has a working pool again
+        [job] = self.run_targets(['NEXTJS'])
+        self.assertEqual(job.status, 'SUCCESS', job.get_log())
+
+    def test_stale_shutdown_keeps_the_current_pool(self):
+        old_pool = converter_pool.get_pool()
+        converter_pool.shutdown()
+        pool = converter_pool.get_pool()
+        converter_pool.shutdown(old_pool)
+        self.assertIs(converter_pool.get_pool(), pool)
+
+    @override_settings(CONVERTER_POOL_SIZE=0)
+    def test_disabled_pool_runs_in_process(self):
+        self.assertIsNone(converter_pool.get_pool())
+        self.assertEqual([job.status for job in self.run_targets(['DJANGO', 'NEXTJS'])], ['SUCCESS', 'SUCCESS'])
@@ -9,9 +9,15 @@ urlpatterns = [
     # Conversion job endpoints
     path('jobs/', views.ConversionJobListCreateView.as_view(), name='job-list-create'),
     path('jobs/<uuid:pk>/', views.ConversionJobDetailView.as_view(), name='job-detail'),
+    path('jobs/<uuid:pk>/events/', views.conversion_job_events, name='job-events'),
+    path('jobs/cache/', views.ConversionCacheStatsView.as_view(), name='job-cache-stats'),
+    path('jobs/batches/', views.ConversionBatchCreateView.as_view(), name='job-batch-create'),
+    path('jobs/batches/<uuid:pk>/', views.ConversionBatchDetailView.as_view(), name='job-batch-detail'),
     
     # Library endpoints
     path('library/', views.LibraryItemListCreateView.as_view(), name='library-list-create'),
+    path('library/search/', views.LibrarySearchView.as_view(), name='library-search'),
+    path('library/tags/', views.LibraryTagFacetsView.as_view(), name='library-tags'),
     path('library/<uuid:pk>/', views.LibraryItemDetailView.as_view(), name='library-detail'),
     path('library/<uuid:pk>/download/', views.LibraryItemDownloadView.as_view(), name='library-download'),
     
@@ -24,7 +30,8 @@ urlpatterns = [
     path('website-templates/', views.WebsiteTemplateListCreateView.as_view(), name='website-template-list-create'),
     path('website-templates/<uuid:pk>/', views.WebsiteTemplateDetailView.as_view(), name='website-template-detail'),
     
-    # Schema and health endpoints
+    # Schema, health and metrics endpoints
     path('jobs/schema/', views.JobSchemaView.as_view(), name='job-schema'),
     path('healthz/', views.HealthzView.as_view(), name='healthz'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
 ]
\ No newline at end of file
@@ -0,0 +1,65 @@
+import re
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single byte range from an HTTP Range header.
+
+    Args:
+        header (str): Value of the Range header (may be empty)
+        size (int): Size of the resource in bytes
+
+    Returns:
+        tuple: Inclusive (start, end) offsets, or None when the header
+        should be ignored and the full body served (missing, malformed
+        or multi-range requests)
+
+    Raises:
+        RangeNotSatisfiable: When the range lies outside the resource
+    """
+    if not header:
+        return None
+
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def iter_file_range(fileobj, start, end, chunk_size=64 * 1024):
+    """Yield bytes start..end (inclusive) of `fileobj`, then close it."""
+    try:
+        fileobj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fileobj.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
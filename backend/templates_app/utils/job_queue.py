@@ -0,0 +1,109 @@
+"""
+Database-backed job queue shared by the conversion and import workers.
+
+A job model needs `status` (QUEUED, RUNNING, ...), `claimed_by`,
+`claimed_at`, `created_at` and `updated_at`. Jobs are claimed with a
+conditional UPDATE (QUEUED -> RUNNING), so several workers, on one or
+many nodes, can share a queue without ever running a job twice. A
+RUNNING job whose heartbeat field hasn't moved for the stale-after
+setting's number of seconds goes back in the queue.
+"""
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+# How many queued ids to look at per claim attempt. Other workers may win
+# the race for the oldest ones, so try a few before going back to sleep.
+CLAIM_BATCH_SIZE = 10
+
+
+def get_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_job(model, job_id, worker_id):
+    """Claim a QUEUED job for `worker_id` (QUEUED -> RUNNING); returns whether it got it."""
+    now = timezone.now()
+    return bool(model.objects.filter(pk=job_id, status='QUEUED').update(
+        status='RUNNING',
+        claimed_by=worker_id,
+        claimed_at=now,
+        updated_at=now,
+    ))
+
+
+def claim_next_job(model, worker_id):
+    """Claim the oldest QUEUED job for `worker_id` and return its id, or None."""
+    candidates = list(
+        model.objects.filter(status='QUEUED')
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:CLAIM_BATCH_SIZE]
+    )
+    for pk in candidates:
+        if claim_job(model, pk, worker_id):
+            return pk
+    return None
+
+
+def requeue_stale_jobs(model, stale_after_setting, heartbeat_field='claimed_at'):
+    """
+    Put RUNNING jobs back in the queue when `heartbeat_field` is older
+    than `settings.<stale_after_setting>` seconds. Returns how many.
+    """
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, stale_after_setting))
+    return model.objects.filter(status='RUNNING', **{f'{heartbeat_field}__lt': cutoff}).update(
+        status='QUEUED',
+        claimed_by='',
+        claimed_at=None,
+        updated_at=timezone.now(),
+    )
+
+
+def run_worker(model, runner, stale_after_setting, poll_interval, heartbeat_field='claimed_at',
+               max_jobs=None, stop_when_idle=False, name='Job'):
+    """
+    Claim and run jobs of `model` until stopped.
+
+    Args:
+        runner: Called as runner(job_id, worker_id) with a claimed job;
+            returns how many jobs it ran (it may claim more on its own).
+            It is expected to record its own failures on the job.
+        stale_after_setting (str): Setting with the seconds after which a
+            RUNNING job counts as abandoned (see requeue_stale_jobs)
+        poll_interval (float): Seconds to sleep when the queue is empty
+        heartbeat_field (str): Field a running job keeps moving
+        max_jobs (int): Exit after running this many jobs (None = no limit)
+        stop_when_idle (bool): Exit as soon as the queue is empty
+        name (str): What the log lines call this worker
+
+    Returns:
+        int: Number of jobs run
+    """
+    worker_id = get_worker_id()
+    processed = 0
+    print(f"{name} worker {worker_id} started")
+
+    while max_jobs is None or processed < max_jobs:
+        close_old_connections()
+        job_id = claim_next_job(model, worker_id)
+        if job_id is None:
+            if stop_when_idle:
+                break
+            requeue_stale_jobs(model, stale_after_setting, heartbeat_field)
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            processed += runner(job_id, worker_id)
+        except Exception as e:
+            # Anything escaping the runner must not take the worker down
+            print(f"Worker {worker_id}: unhandled error in job {job_id}: {e}")
+            processed += 1
+
+    print(f"{name} worker {worker_id} stopped after {processed} job(s)")
+    return processed
@@ -0,0 +1,129 @@
+"""
+Text sanitizer for generated files, built on precompiled translation tables.
+
+Every rule is a code point -> replacement entry in a table, so most calls
+are a single str.translate(). The tables fill in lazily: a code point
+without a fixed entry is worked out once from the mode's rule and
+remembered, and every later occurrence is a plain dict hit.
+
+translate() is fastest on pure-ASCII input, which covers the generated
+packs; it runs at memory speed there. On non-ASCII input it looks up
+every non-ASCII character one by one. The default mode leaves almost all
+of them alone, so for that case it is quicker to replace just the few
+SAFE_REPLACEMENTS keys that occur (`manage.py benchmark_sanitizer` shows
+the numbers).
+
+Modes:
+    default      SAFE_REPLACEMENTS applied, control characters removed,
+                 everything else (emoji included) kept
+    ascii_only   as default, plus any other non-ASCII character becomes
+                 "[emoji]" (in one of the EMOJI_RANGES blocks) or "?"
+    aggressive   as ascii_only, plus anything outside printable ASCII
+                 (tabs and newlines too) becomes a space
+"""
+import re
+
+# Replacements for common Unicode characters and problematic emojis
+SAFE_REPLACEMENTS = {
+    "\u2013": "-",                  # en-dash
+    "\u2014": "-",                  # em-dash
+    "\u00A0": " ",                  # nbsp
+    "\u26A1": "[!]",                # lightning bolt
+    "\U0001F680": "[rocket]",       # rocket
+    "\U0001F44B": "[wave]",         # waving hand
+    "\u2728": "[sparkles]",         # sparkles
+    "\U0001F4A5": "[boom]",         # collision
+    "\U0001F525": "[fire]",         # fire
+    "\u2B50": "[star]",             # star
+    "\U0001F31F": "[glowing-star]", # glowing star
+}
+
+# Control characters that are removed (tab, newline and carriage return stay)
+UNSAFE_CONTROL_CHARS = [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20)]
+
+_CONTROL_CHARS_RE = re.compile(r"[\u0000-\u0008\u000B\u000C\u000E-\u001F]")
+
+# Unicode blocks the ascii_only rule treats as emoji (inclusive)
+EMOJI_RANGES = (
+    (0x2600, 0x27BF),    # Miscellaneous Symbols, Dingbats
+    (0x2B00, 0x2BFF),    # Miscellaneous Symbols and Arrows
+    (0x1F000, 0x1F2FF),  # Game tiles and cards, enclosed alphanumerics, flags
+    (0x1F300, 0x1FAFF),  # Pictographs, emoticons, transport, supplemental symbols
+)
+
+# Code points remembered per table beyond the fixed entries; past this,
+# new ones are still translated, just not stored
+MAX_LEARNED = 65536
+
+
+class TranslationTable(dict):
+    """
+    str.translate() mapping that works out missing code points with
+    `rule(code_point)` and caches the answer.
+    """
+
+    def __init__(self, fixed, rule):
+        super().__init__(fixed)
+        self.rule = rule
+        self.limit = len(fixed) + MAX_LEARNED
+
+    def __missing__(self, code_point):
+        value = self.rule(code_point)
+        if len(self) < self.limit:
+            self[code_point] = value
+        return value
+
+
+def _keep(code_point):
+    return code_point
+
+
+def _ascii_only(code_point):
+    if code_point <= 0x7F:
+        return code_point
+    if any(start <= code_point <= end for start, end in EMOJI_RANGES):
+        return '[emoji]'
+    return '?'
+
+
+def _aggressive(code_point):
+    if code_point < 32 or code_point == 0x7F:
+        return ' '
+    return _ascii_only(code_point)
+
+
+_FIXED = {ord(char): replacement for char, replacement in SAFE_REPLACEMENTS.items()}
+_FIXED.update(dict.fromkeys(UNSAFE_CONTROL_CHARS))
+
+DEFAULT_TABLE = TranslationTable(_FIXED, _keep)
+ASCII_ONLY_TABLE = TranslationTable(_FIXED, _ascii_only)
+AGGRESSIVE_TABLE = TranslationTable(_FIXED, _aggressive)
+
+
+def sanitize_text(s, aggressive: bool = False, ascii_only: bool = False) -> str:
+    """
+    Sanitize text for safe file writing on Windows systems.
+
+    Args:
+        s: Input string to sanitize (other types are converted with str())
+        aggressive: Reduce the text to printable ASCII
+        ascii_only: Replace non-ASCII characters but keep whitespace
+
+    Returns:
+        Sanitized string
+    """
+    if not isinstance(s, str):
+        s = str(s)
+    if aggressive:
+        return s.translate(AGGRESSIVE_TABLE)
+    if ascii_only:
+        return s.translate(ASCII_ONLY_TABLE)
+    if s.isascii():
+        return s.translate(DEFAULT_TABLE)
+
+    for char, replacement in SAFE_REPLACEMENTS.items():
+        if char in s:
+            s = s.replace(char, replacement)
+    if _CONTROL_CHARS_RE.search(s):
+        s = _CONTROL_CHARS_RE.sub('', s)
+    return s
@@ -0,0 +1,124 @@
+"""
+Zip archives built from in-memory files.
+
+Most files of a template pack are byte-identical from one job to the
+next, so deflating them again for every archive is wasted work. Members
+are compressed through a small LRU cache keyed by their text, which
+holds the raw deflate stream, CRC-32 and size; on a hit the cached bytes
+are spliced into the archive as they are. The archive itself is written
+by hand (local headers, central directory, end record) because
+zipfile.ZipFile has no way to take already-compressed data.
+
+The writer only does what packs need: deflated members, no ZIP64, no
+comments or extra fields. Anything it writes reads back with zipfile.
+"""
+import struct
+import time
+import zlib
+from collections import namedtuple
+from functools import lru_cache
+
+# Same level zipfile uses for ZIP_DEFLATED
+COMPRESSION_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+# Number of distinct member texts kept compressed
+MEMBER_CACHE_SIZE = 256
+# Larger texts are compressed every time rather than kept in memory
+MAX_CACHED_MEMBER_SIZE = 256 * 1024
+
+ZIP_VERSION = 20
+ZIP_DEFLATED = 8
+UTF8_NAME_FLAG = 0x800
+# Regular file, rw-r--r--, in the "made by Unix" external attributes
+EXTERNAL_ATTR = (0o100644 << 16)
+MADE_BY = (3 << 8) | ZIP_VERSION
+ZIP32_LIMIT = 0xFFFFFFFF
+
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+END_RECORD = struct.Struct('<4s4H2LH')
+
+DeflatedMember = namedtuple('DeflatedMember', ['data', 'crc', 'size'])
+
+
+def deflate(data: bytes) -> DeflatedMember:
+    """Raw-deflate `data` the way a zip member stores it."""
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return DeflatedMember(compressor.compress(data) + compressor.flush(), zlib.crc32(data), len(data))
+
+
+@lru_cache(maxsize=MEMBER_CACHE_SIZE)
+def _deflate_text(text: str) -> DeflatedMember:
+    return deflate(text.encode('utf-8'))
+
+
+def deflate_member(data) -> DeflatedMember:
+    """
+    Compressed form of one member's content. Text members go through the
+    cache: pack files are module-level strings, so a repeated member is
+    the same object and the lookup costs next to nothing.
+    """
+    if isinstance(data, str):
+        if len(data) <= MAX_CACHED_MEMBER_SIZE:
+            return _deflate_text(data)
+        data = data.encode('utf-8')
+    return deflate(data)
+
+
+def _dos_datetime(timestamp=None):
+    t = time.localtime(timestamp)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def write_zip(members, fileobj):
+    """
+    Write in-memory files into a zip archive on an open file object.
+
+    Args:
+        members (iterable): (arcname, data) tuples; str data is UTF-8 encoded
+        fileobj: Writable binary file object (seekable or not)
+
+    Returns:
+        The file object that was written to
+
+    Raises:
+        ValueError: When the archive would need ZIP64
+    """
+    dos_time, dos_date = _dos_datetime()
+    offset = 0
+    central = []
+
+    for arcname, data in members:
+        member = deflate_member(data)
+        try:
+            name = arcname.encode('ascii')
+            flags = 0
+        except UnicodeEncodeError:
+            name = arcname.encode('utf-8')
+            flags = UTF8_NAME_FLAG
+        if offset > ZIP32_LIMIT or member.size > ZIP32_LIMIT or len(member.data) > ZIP32_LIMIT:
+            raise ValueError(f"Zip member {arcname} is too large for write_zip")
+
+        fileobj.write(LOCAL_HEADER.pack(
+            b'PK\x03\x04', ZIP_VERSION, flags, ZIP_DEFLATED, dos_time, dos_date,
+            member.crc, len(member.data), member.size, len(name), 0,
+        ))
+        fileobj.write(name)
+        fileobj.write(member.data)
+        central.append(CENTRAL_HEADER.pack(
+            b'PK\x01\x02', MADE_BY, ZIP_VERSION, flags, ZIP_DEFLATED, dos_time, dos_date,
+            member.crc, len(member.data), member.size, len(name), 0, 0, 0, 0,
+            EXTERNAL_ATTR, offset,
+        ) + name)
+        offset += LOCAL_HEADER.size + len(name) + len(member.data)
+
+    directory = b''.join(central)
+    if len(central) > 0xFFFF or offset > ZIP32_LIMIT:
+        raise ValueError("Zip archive is too large for write_zip")
+    fileobj.write(directory)
+    fileobj.write(END_RECORD.pack(
+        b'PK\x05\x06', 0, 0, len(central), len(central), len(directory), offset, 0,
+    ))
+
+    return fileobj
@@ -1,8 +1,9 @@
 import os
-import uuid
-import traceback
-from django.http import Http404
-from django.core.files.base import ContentFile
+from urllib.parse import quote
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, quote_etag
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -11,10 +12,19 @@ from rest_framework.permissions import AllowAny
 from django.http import FileResponse
 from django.conf import settings
 
-from .models import TemplateUpload, ConversionJob, LibraryItem, WebsiteTemplate
-from .serializers import TemplateUploadSerializer, ConversionJobSerializer, LibraryItemSerializer, LibraryItemCategorySerializer, CreateConversionJobSerializer, WebsiteTemplateSerializer
-from .adapters import magicai_converter
-from .utils.zipdir import zipdir
+from .models import TemplateUpload, ConversionBatch, ConversionJob, LibraryItem, WebsiteTemplate
+from .serializers import TemplateUploadSerializer, ConversionJobSerializer, LibraryItemSerializer, LibraryItemCategorySerializer, CreateConversionJobSerializer, CreateConversionBatchSerializer, WebsiteTemplateSerializer
+from .conversion import run_conversion, run_conversion_group
+from . import conversion_cache
+from .metrics import render_prometheus
+from .blobs import file_sha256
+from .batches import create_batch, get_batch_progress
+from .library import get_category_tree
+from .pagination import KeysetPagination, LibraryPagination
+from . import search
+from .tags import tag_facets
+from .events import iter_job_events, job_event_stream
+from .utils.http_range import RangeNotSatisfiable, iter_file_range, parse_range_header
 
 
 class TemplateUploadListCreateView(APIView):
@@ -22,9 +32,10 @@ class TemplateUploadListCreateView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        uploads = TemplateUpload.objects.all()
+        paginator = KeysetPagination()
+        uploads = paginator.paginate_queryset(TemplateUpload.objects.all(), request, view=self)
         serializer = TemplateUploadSerializer(uploads, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         serializer = TemplateUploadSerializer(data=request.data)
@@ -74,9 +85,10 @@ class ConversionJobListCreateView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        jobs = ConversionJob.objects.all()
+        paginator = KeysetPagination()
+        jobs = paginator.paginate_queryset(ConversionJob.objects.select_related('upload'), request, view=self)
         serializer = ConversionJobSerializer(jobs, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         # Log the incoming request for debugging
@@ -98,15 +110,19 @@ class ConversionJobListCreateView(APIView):
         except TemplateUpload.DoesNotExist:
             return Response({"errors": {"upload": ["Upload not found."]}}, status=status.HTTP_404_NOT_FOUND)
 
-        job = ConversionJob.objects.create(upload=upload, target=target, status="QUEUED", log="")
+        job = ConversionJob.objects.create(upload=upload, target=target, status="QUEUED")
+        
+        # Jobs are picked up by `manage.py conversion_worker`; inline mode
+        # is only meant for local development without a worker running.
+        if not settings.CONVERSION_RUN_INLINE:
+            return Response(ConversionJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
         
-        # Run conversion synchronously for now
         try:
             run_conversion(job.id)
         except Exception as e:
+            job.append_log(f"{type(e).__name__}: {e}")
             job.status = "ERROR"
-            job.log = f"{type(e).__name__}: {e}"
-            job.save()
+            job.save(update_fields=['status', 'updated_at'])
 
         # Refresh job from database
         job.refresh_from_db()
@@ -118,12 +134,106 @@ class ConversionJobDetailView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request, pk):
+        """
+        Job details plus its log. Pass `?since=<log_offset>` from a previous
+        response to receive only the log text appended since then.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+        except ValueError:
+            since = -1
+        if since < 0:
+            return Response({'error': 'since must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             job = ConversionJob.objects.get(pk=pk)
-            serializer = ConversionJobSerializer(job)
-            return Response(serializer.data)
+            data = ConversionJobSerializer(job).data
+            data['log'], data['log_offset'] = job.read_log(since)
+            return Response(data)
         except ConversionJob.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
+    
+    def delete(self, request, pk):
+        try:
+            job = ConversionJob.objects.get(pk=pk)
+            # The zip file is removed by the post_delete signal unless a
+            # library item or cache entry still shares it
+            job.delete()
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        except ConversionJob.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+
+async def conversion_job_events(request, pk):
+    """
+    Server-Sent Events stream of a job's status changes and log output.
+    A plain async view (DRF views are sync-only) so that, served through
+    dashboard_backend.asgi, open streams don't hold a worker thread. Under
+    WSGI the stream is a plain generator instead, which Django sends as it
+    goes rather than reading it to the end first.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    if not await ConversionJob.objects.filter(pk=pk).aexists():
+        raise Http404('Job not found')
+    
+    if isinstance(request, ASGIRequest):
+        stream = job_event_stream(pk)
+    else:
+        stream = iter_job_events(pk)
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class ConversionBatchCreateView(APIView):
+    """Create one job per upload × target in a single request"""
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        s = CreateConversionBatchSerializer(data=request.data)
+        if not s.is_valid():
+            return Response({"errors": s.errors}, status=status.HTTP_400_BAD_REQUEST)
+        
+        upload_ids = s.validated_data["uploads"]
+        targets = s.validated_data["targets"]
+        found = set(TemplateUpload.objects.filter(id__in=upload_ids).values_list('id', flat=True))
+        missing = [str(pk) for pk in upload_ids if pk not in found]
+        if missing:
+            return Response({"errors": {"uploads": [f"Upload not found: {pk}" for pk in missing]}}, status=status.HTTP_404_NOT_FOUND)
+        
+        batch, jobs = create_batch(upload_ids, targets)
+        
+        if settings.CONVERSION_RUN_INLINE:
+            run_conversion_group([job.id for job in jobs])
+            return Response(get_batch_progress(batch), status=status.HTTP_201_CREATED)
+        return Response(get_batch_progress(batch), status=status.HTTP_202_ACCEPTED)
+
+
+class ConversionBatchDetailView(APIView):
+    permission_classes = [AllowAny]
+    
+    def get(self, request, pk):
+        try:
+            batch = ConversionBatch.objects.get(pk=pk)
+        except ConversionBatch.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        
+        data = get_batch_progress(batch)
+        if request.query_params.get('jobs') in ('1', 'true'):
+            jobs = batch.jobs.select_related('upload').order_by('created_at', 'id')
+            data['jobs'] = ConversionJobSerializer(jobs, many=True).data
+        return Response(data)
+
+
+class ConversionCacheStatsView(APIView):
+    """Hit/miss counters and size of the conversion result cache"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return Response(conversion_cache.get_stats())
 
 
 class LibraryItemListCreateView(APIView):
@@ -131,8 +241,17 @@ class LibraryItemListCreateView(APIView):
     
     def get(self, request):
         items = LibraryItem.objects.all()
+        tag = request.query_params.get('tag')
+        if tag:
+            items = items.filter(tag_index__name=tag.strip().lower())
+        target = request.query_params.get('target')
+        if target:
+            items = items.filter(target=target)
+        
+        paginator = LibraryPagination()
+        items = paginator.paginate_queryset(items, request, view=self)
         serializer = LibraryItemSerializer(items, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         job_id = request.data.get('job_id')
@@ -152,19 +271,14 @@ class LibraryItemListCreateView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Copy the zip file to library location
+            # Point the library item at the job's stored zip rather than
+            # copying it; the file is shared until its last user is deleted
             library_item = LibraryItem.objects.create(
                 name=name,
-                target=job.target
+                target=job.target,
+                zip_file=job.zip_file.name
             )
             
-            # Copy the file content
-            with job.zip_file.open('rb') as source:
-                library_item.zip_file.save(
-                    f"{library_item.id}.zip",
-                    ContentFile(source.read())
-                )
-            
             serializer = LibraryItemSerializer(library_item)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
             
@@ -176,26 +290,87 @@ class LibraryItemListCreateView(APIView):
 
 
 class LibraryItemDownloadView(APIView):
+    """
+    Download a library item's zip.
+    
+    Responses carry a strong ETag (the zip's SHA-256) and Last-Modified,
+    so clients can revalidate with If-None-Match / If-Modified-Since, and
+    honour single byte ranges so interrupted downloads can resume. With
+    LIBRARY_DOWNLOAD_OFFLOAD set, the file body is left to the front proxy.
+    """
     permission_classes = [AllowAny]
     
     def get(self, request, pk):
         try:
             item = LibraryItem.objects.get(pk=pk)
-            if not item.zip_file:
-                return Response(
-                    {'error': 'No file available'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
-            
+        except LibraryItem.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        
+        if not item.zip_file or not item.zip_file.storage.exists(item.zip_file.name):
+            return Response(
+                {'error': 'No file available'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if not item.zip_sha256:
+            item.zip_sha256 = file_sha256(item.zip_file)
+            LibraryItem.objects.filter(pk=item.pk).update(zip_sha256=item.zip_sha256)
+        
+        storage = item.zip_file.storage
+        etag = quote_etag(item.zip_sha256)
+        last_modified = int(storage.get_modified_time(item.zip_file.name).timestamp())
+        filename = f"{item.name}_{item.target.lower()}_template.zip"
+        
+        def add_headers(response):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            response['Accept-Ranges'] = 'bytes'
+            return response
+        
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return add_headers(not_modified)
+        
+        offload = settings.LIBRARY_DOWNLOAD_OFFLOAD
+        if offload:
+            # The proxy serves the body (and handles Range itself)
+            response = HttpResponse(content_type='application/zip')
+            if offload == 'x-accel':
+                response['X-Accel-Redirect'] = settings.LIBRARY_DOWNLOAD_ACCEL_PREFIX + quote(item.zip_file.name)
+            else:
+                response['X-Sendfile'] = item.zip_file.path
+            response['Content-Disposition'] = content_disposition_header(True, filename)
+            return add_headers(response)
+        
+        size = item.zip_file.size
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range or if_range in (etag, http_date(last_modified)):
+            try:
+                byte_range = parse_range_header(request.META.get('HTTP_RANGE'), size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f"bytes */{size}"
+                return add_headers(response)
+        
+        if byte_range is None:
             response = FileResponse(
                 item.zip_file.open('rb'),
                 as_attachment=True,
-                filename=f"{item.name}_{item.target.lower()}_template.zip"
+                filename=filename
             )
-            return response
-            
-        except LibraryItem.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+            return add_headers(response)
+        
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            iter_file_range(item.zip_file.open('rb'), start, end),
+            status=status.HTTP_206_PARTIAL_CONTENT,
+            content_type='application/zip'
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        return add_headers(response)
 
 
 class LibraryItemDetailView(APIView):
@@ -213,15 +388,8 @@ class LibraryItemDetailView(APIView):
         try:
             item = LibraryItem.objects.get(pk=pk)
             
-            # Delete the zip file if it exists
-            if item.zip_file and hasattr(item.zip_file, 'path'):
-                try:
-                    if os.path.exists(item.zip_file.path):
-                        os.remove(item.zip_file.path)
-                except Exception as e:
-                    print(f"Warning: Could not delete zip file {item.zip_file.path}: {e}")
-            
-            # Delete the library item record
+            # Delete the library item record; its zip file is removed by the
+            # post_delete signal once no job or other item shares it
             item.delete()
             
             return Response(status=status.HTTP_204_NO_CONTENT)
@@ -234,41 +402,56 @@ class LibraryItemDetailView(APIView):
             )
 
 
-class LibraryCategoriesView(APIView):
-    """View to get all available template categories and subcategories"""
+class LibrarySearchView(APIView):
+    """Full-text search over library item name, description and tags"""
     permission_classes = [AllowAny]
     
     def get(self, request):
-        from collections import defaultdict
-        
-        # Get all unique category/subcategory combinations with item counts
-        items = LibraryItem.objects.all()
-        categories = defaultdict(lambda: defaultdict(list))
-        
-        for item in items:
-            categories[item.category][item.subcategory].append(item)
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'q is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Format the response
-        result = []
-        for category, subcategories in categories.items():
-            category_data = {
-                'category': category,
-                'category_display': dict(LibraryItem.CATEGORY_CHOICES).get(category, category),
-                'subcategories': []
-            }
-            
-            for subcategory, items_list in subcategories.items():
-                subcategory_data = {
-                    'subcategory': subcategory,
-                    'subcategory_display': dict(LibraryItem.SUBCATEGORY_CHOICES).get(subcategory, subcategory),
-                    'item_count': len(items_list),
-                    'items': LibraryItemSerializer(items_list, many=True).data
-                }
-                category_data['subcategories'].append(subcategory_data)
-            
-            result.append(category_data)
+        try:
+            limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        except ValueError:
+            return Response(
+                {'error': 'limit must be a number'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return Response(result)
+        items = search.search_library(
+            query,
+            limit=limit,
+            category=request.query_params.get('category'),
+            subcategory=request.query_params.get('subcategory'),
+            target=request.query_params.get('target'),
+        )
+        serializer = LibraryItemSerializer(items, many=True)
+        return Response({'results': serializer.data})
+
+
+class LibraryTagFacetsView(APIView):
+    """Per-tag item counts, optionally within a category/subcategory/target"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return Response(tag_facets(
+            category=request.query_params.get('category'),
+            subcategory=request.query_params.get('subcategory'),
+            target=request.query_params.get('target'),
+        ))
+
+
+class LibraryCategoriesView(APIView):
+    """View to get the category/subcategory tree with item counts"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        # Items are listed per subcategory by LibrarySubcategoryView
+        return Response(get_category_tree())
 
 
 class LibraryCategoryView(APIView):
@@ -303,6 +486,14 @@ class LibrarySubcategoryView(APIView):
         return Response(serializer.data)
 
 
+class MetricsView(APIView):
+    """Conversion stage histograms in the Prometheus text format"""
+    permission_classes = [AllowAny]
+    
+    def get(self, request):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class HealthzView(APIView):
     permission_classes = [AllowAny]
     
@@ -330,116 +521,15 @@ class JobSchemaView(APIView):
         })
 
 
-def run_conversion(job_id):
-    """
-    Run the conversion process for a job with enhanced error handling.
-    This is synchronous for now but can be moved to Celery later.
-    """
-    job = None
-    try:
-        job = ConversionJob.objects.get(pk=job_id)
-        job.status = 'RUNNING'
-        job.log = "Starting template conversion..."
-        job.save()
-        
-        print(f"Starting conversion for job {job_id}")
-        
-        # Get the image path
-        image_path = job.upload.image.path
-        print(f"Processing image: {image_path}")
-        
-        # Validate image file exists
-        if not os.path.exists(image_path):
-            raise FileNotFoundError(f"Image file not found: {image_path}")
-        
-        # Run the converter with enhanced error handling
-        try:
-            output_folder = magicai_converter.convert(image_path, job.target)
-            print(f"Conversion completed, output folder: {output_folder}")
-        except UnicodeEncodeError as e:
-            error_msg = f"Unicode encoding error: Cannot encode character '{e.object[e.start:e.end]}' in {e.encoding} encoding. This is typically caused by emoji or special Unicode characters in the template content."
-            print(f"Unicode error: {error_msg}")
-            raise IOError(error_msg) from e
-        except IOError as e:
-            print(f"File system error during conversion: {e}")
-            raise
-        except Exception as e:
-            print(f"Unexpected conversion error: {e}")
-            raise IOError(f"Template conversion failed: {e}") from e
-        
-        # Create zip file
-        zip_filename = f"{uuid.uuid4()}.zip"
-        zip_path = os.path.join(settings.MEDIA_ROOT, 'templates', 'builds', zip_filename)
-        
-        # Ensure the builds directory exists
-        os.makedirs(os.path.dirname(zip_path), exist_ok=True)
-        print(f"Creating zip file: {zip_path}")
-        
-        # Zip the output folder
-        try:
-            zipdir(output_folder, zip_path)
-            print(f"Successfully created zip file")
-        except Exception as e:
-            print(f"Error creating zip file: {e}")
-            raise IOError(f"Failed to create zip file: {e}") from e
-        
-        # Save zip file to job
-        try:
-            with open(zip_path, 'rb') as f:
-                job.zip_file.save(zip_filename, ContentFile(f.read()))
-            print(f"Zip file saved to job")
-        except Exception as e:
-            print(f"Error saving zip file to job: {e}")
-            raise IOError(f"Failed to save zip file: {e}") from e
-        
-        job.status = 'SUCCESS'
-        job.log = f"Conversion completed successfully!\n\nGenerated {job.target} template pack\nTemplate files: Ready for download\nBased on uploaded image analysis\n\nThe template pack includes responsive components and styling ready for use."
-        job.save()
-        
-        print(f"Job {job_id} completed successfully")
-        
-        # Clean up temp folder
-        try:
-            import shutil
-            shutil.rmtree(output_folder, ignore_errors=True)
-        except Exception as e:
-            print(f"Warning: Could not clean up temp folder {output_folder}: {e}")
-        
-    except ConversionJob.DoesNotExist:
-        error_msg = f"Conversion job {job_id} not found"
-        print(f"Error: {error_msg}")
-        
-    except Exception as e:
-        error_msg = str(e)
-        full_traceback = traceback.format_exc()
-        
-        print(f"Conversion failed for job {job_id}: {error_msg}")
-        print(f"Full traceback:\n{full_traceback}")
-        
-        if job:
-            # Provide user-friendly error messages
-            if "Unicode" in error_msg or "encode" in error_msg.lower():
-                user_msg = "ENCODING ERROR: The template contains special characters that cannot be processed on Windows. This is typically caused by emoji or special Unicode symbols in the generated content."
-            elif "FileNotFoundError" in error_msg or "not found" in error_msg.lower():
-                user_msg = "FILE ERROR: The uploaded image file could not be found or accessed."
-            elif "Permission" in error_msg or "access" in error_msg.lower():
-                user_msg = "PERMISSION ERROR: Unable to write template files. Check file system permissions."
-            else:
-                user_msg = f"CONVERSION ERROR: {error_msg}"
-            
-            job.status = 'ERROR'
-            job.log = f"{user_msg}\n\nTechnical Details:\n{error_msg}\n\nFull Error Log:\n{full_traceback}"
-            job.save()
-
-
 class WebsiteTemplateListCreateView(APIView):
     """API view for listing and creating user website templates"""
     permission_classes = [AllowAny]
     
     def get(self, request):
-        templates = WebsiteTemplate.objects.all()
+        paginator = KeysetPagination()
+        templates = paginator.paginate_queryset(WebsiteTemplate.objects.all(), request, view=self)
         serializer = WebsiteTemplateSerializer(templates, many=True)
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
     
     def post(self, request):
         serializer = WebsiteTemplateSerializer(data=request.data)
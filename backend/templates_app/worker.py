@@ -0,0 +1,80 @@
+"""
+Database-backed runner for ConversionJob.
+
+The API only creates QUEUED jobs; `python manage.py conversion_worker`
+polls the table and executes them through the shared queue loop in
+utils/job_queue.py. The other targets of a claimed job's upload in the
+same batch are claimed along with it.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ConversionJob
+from .conversion import run_conversion_group
+from .utils import job_queue
+
+STALE_AFTER_SETTING = 'CONVERSION_JOB_STALE_AFTER'
+
+
+def claim_next_job(worker_id):
+    """Claim the oldest QUEUED job for `worker_id` and return its id, or None."""
+    return job_queue.claim_next_job(ConversionJob, worker_id)
+
+
+def claim_batch_siblings(job_id, worker_id):
+    """
+    Also claim the other QUEUED jobs of the same batch and upload (the
+    other targets of one image), so they run in this worker and the image
+    is analyzed only once. Returns the claimed ids.
+    """
+    job = ConversionJob.objects.filter(pk=job_id).values('batch_id', 'upload_id').first()
+    if not job or job['batch_id'] is None:
+        return []
+    
+    siblings = ConversionJob.objects.filter(status='QUEUED', batch_id=job['batch_id'], upload_id=job['upload_id'])
+    pks = list(siblings.values_list('pk', flat=True))
+    if not pks:
+        return []
+    now = timezone.now()
+    siblings.filter(pk__in=pks).update(status='RUNNING', claimed_by=worker_id, claimed_at=now, updated_at=now)
+    # Another worker may have taken some of them in the meantime
+    return list(ConversionJob.objects.filter(pk__in=pks, claimed_by=worker_id, claimed_at=now).values_list('pk', flat=True))
+
+
+def requeue_stale_jobs():
+    """
+    Put RUNNING jobs whose worker went away back in the queue. A running
+    job refreshes claimed_at at every stage (JobRun.heartbeat), so only
+    jobs that stopped making progress for CONVERSION_JOB_STALE_AFTER
+    seconds are requeued.
+    """
+    return job_queue.requeue_stale_jobs(ConversionJob, STALE_AFTER_SETTING)
+
+
+def run_claimed_job(job_id, worker_id):
+    """Run a claimed job together with its batch siblings; returns how many ran."""
+    job_ids = [job_id] + claim_batch_siblings(job_id, worker_id)
+    print(f"Worker {worker_id} claimed job(s) {', '.join(map(str, job_ids))}")
+    # run_conversion records its own failures on the jobs
+    run_conversion_group(job_ids, worker_id)
+    return len(job_ids)
+
+
+def run_worker(poll_interval=None, max_jobs=None, stop_when_idle=False):
+    """
+    Claim and run jobs until stopped.
+
+    Args:
+        poll_interval (float): Seconds to sleep when the queue is empty
+        max_jobs (int): Exit after running this many jobs (None = no limit)
+        stop_when_idle (bool): Exit as soon as the queue is empty
+
+    Returns:
+        int: Number of jobs run
+    """
+    if poll_interval is None:
+        poll_interval = settings.CONVERSION_WORKER_POLL_INTERVAL
+    return job_queue.run_worker(
+        ConversionJob, run_claimed_job, STALE_AFTER_SETTING, poll_interval,
+        max_jobs=max_jobs, stop_when_idle=stop_when_idle, name='Conversion',
+    )
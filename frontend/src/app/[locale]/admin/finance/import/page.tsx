@@ -1,20 +1,30 @@
 'use client';
 
 import React, { useState } from 'react';
-import { ArrowLeft, Upload, FileText, CheckCircle, AlertCircle } from 'lucide-react';
-import { importExpensesCSV } from '../../../../../lib/financeApi';
+import { ArrowLeft, Upload, FileText, CheckCircle, AlertCircle, Download } from 'lucide-react';
+import { importExpensesCSV, downloadImportErrors, ImportJob } from '../../../../../lib/financeApi';
 
 interface ImportResult {
   message: string;
   created_count: number;
   skipped_count: number;
   errors: string[];
+  job_id?: string;
 }
 
+const toResult = (job: ImportJob): ImportResult => ({
+  message: job.status === 'ERROR' ? `Import failed: ${job.error}` : 'Import completed',
+  created_count: job.created_count,
+  skipped_count: job.skipped_count,
+  errors: job.errors,
+  job_id: job.id,
+});
+
 const ImportPage = () => {
   const [file, setFile] = useState<File | null>(null);
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState<ImportResult | null>(null);
+  const [progress, setProgress] = useState<ImportJob | null>(null);
 
   const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     if (e.target.files && e.target.files[0]) {
@@ -27,9 +37,10 @@ const ImportPage = () => {
     if (!file) return;
 
     setLoading(true);
+    setProgress(null);
     try {
-      const importResult = await importExpensesCSV(file);
-      setResult(importResult);
+      const job = await importExpensesCSV(file, setProgress);
+      setResult(toResult(job));
     } catch (error) {
       console.error('Import error:', error);
       setResult({
@@ -40,6 +51,21 @@ const ImportPage = () => {
       });
     } finally {
       setLoading(false);
+      setProgress(null);
+    }
+  };
+
+  const handleDownloadErrors = async (jobId: string) => {
+    try {
+      const blob = await downloadImportErrors(jobId);
+      const url = URL.createObjectURL(blob);
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `import-errors-${jobId}.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error downloading rejected rows:', error);
     }
   };
 
@@ -131,7 +157,13 @@ const ImportPage = () => {
                   {loading ? (
                     <>
                       <div className="animate-spin rounded-full h-4 w-4 border-b-2 border-white"></div>
-                      <span>Importing...</span>
+                      <span>
+                        {progress?.status === 'RUNNING'
+                          ? `Importing... ${progress.rows_processed} rows processed`
+                          : progress?.status === 'QUEUED'
+                            ? 'Queued...'
+                            : 'Importing...'}
+                      </span>
                     </>
                   ) : (
                     <>
@@ -150,6 +182,7 @@ const ImportPage = () => {
           <div className="mt-8 bg-white rounded-lg shadow-sm border">
             <div className="p-6">
               <h3 className="text-lg font-semibold text-gray-900 mb-4">Import Results</h3>
+              <p className="text-gray-600 mb-4">{result.message}</p>
               
               <div className="grid grid-cols-1 md:grid-cols-3 gap-4 mb-6">
                 <div className="bg-green-50 border border-green-200 rounded-lg p-4">
@@ -188,6 +221,18 @@ const ImportPage = () => {
                 </div>
               )}
 
+              {result.job_id !== undefined && result.skipped_count > 0 && (
+                <div className="mt-4 flex justify-center">
+                  <button
+                    onClick={() => handleDownloadErrors(result.job_id!)}
+                    className="px-4 py-2 text-red-700 border border-red-300 rounded-lg hover:bg-red-50 transition-colors flex items-center space-x-2"
+                  >
+                    <Download className="w-4 h-4" />
+                    <span>Download rejected rows ({result.skipped_count})</span>
+                  </button>
+                </div>
+              )}
+
               <div className="mt-6 flex justify-center">
                 <button
                   onClick={() => window.location.href = '/admin/finance'}
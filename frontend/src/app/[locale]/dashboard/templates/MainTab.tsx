@@ -39,7 +39,12 @@ export default function MainTab() {
   const [uploads, setUploads] = useState<TemplateUpload[]>([]);
   const [jobs, setJobs] = useState<ConversionJob[]>([]);
   const [library, setLibrary] = useState<LibraryItem[]>([]);
+  // Cursors for the next page of each list; null once everything is loaded
+  const [uploadsNext, setUploadsNext] = useState<string | null>(null);
+  const [jobsNext, setJobsNext] = useState<string | null>(null);
+  const [libraryNext, setLibraryNext] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadData();
@@ -48,15 +53,19 @@ export default function MainTab() {
   const loadData = async () => {
     try {
       setLoading(true);
-      const [uploadsData, jobsData, libraryData] = await Promise.all([
+      const [uploadsPage, libraryPage] = await Promise.all([
         api.listUploads(),
-        api.listJobs(),
         api.listLibrary(),
       ]);
+      // Only the jobs of the uploads on screen
+      const jobsPage = await api.listJobsSince(uploadsPage.results[uploadsPage.results.length - 1]?.created_at);
       
-      setUploads(uploadsData);
-      setJobs(jobsData);
-      setLibrary(libraryData);
+      setUploads(uploadsPage.results);
+      setUploadsNext(uploadsPage.next);
+      setJobs(jobsPage.results);
+      setJobsNext(jobsPage.next);
+      setLibrary(libraryPage.results);
+      setLibraryNext(libraryPage.next);
     } catch (error) {
       console.error('Error loading data:', error);
     } finally {
@@ -64,6 +73,40 @@ export default function MainTab() {
     }
   };
 
+  const loadMoreUploads = async () => {
+    if (!uploadsNext) return;
+    try {
+      setLoadingMore(true);
+      const uploadsPage = await api.listUploads(uploadsNext);
+      const jobsPage = jobsNext
+        ? await api.listJobsSince(uploadsPage.results[uploadsPage.results.length - 1]?.created_at, jobsNext)
+        : { next: null, results: [] };
+
+      setUploads(prev => [...prev, ...uploadsPage.results]);
+      setUploadsNext(uploadsPage.next);
+      setJobs(prev => [...prev, ...jobsPage.results]);
+      setJobsNext(jobsPage.next);
+    } catch (error) {
+      console.error('Error loading more uploads:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const loadMoreLibrary = async () => {
+    if (!libraryNext) return;
+    try {
+      setLoadingMore(true);
+      const libraryPage = await api.listLibrary(libraryNext);
+      setLibrary(prev => [...prev, ...libraryPage.results]);
+      setLibraryNext(libraryPage.next);
+    } catch (error) {
+      console.error('Error loading more library items:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleUploadComplete = () => {
     loadData();
   };
@@ -71,8 +114,16 @@ export default function MainTab() {
   const handleConvert = async (uploadId: string, target: 'DJANGO' | 'NEXTJS') => {
     try {
       console.log('Converting upload:', uploadId, 'to target:', target);
-      await api.createJob(uploadId, target);
-      loadData();
+      const job = await api.createJob(uploadId, target);
+      setJobs(prev => [{ ...job, log: job.log ?? '' }, ...prev.filter(j => j.id !== job.id)]);
+      // The job is only queued; follow it until the worker finishes it
+      api.pollJobStatus(
+        job.id,
+        (update) => setJobs(prev => prev.map(j => (j.id === update.id ? { ...j, ...update, log: update.log ?? j.log } : j))),
+        10 * 60 * 1000
+      )
+        .catch((error) => console.error('Error following conversion job:', error))
+        .finally(() => loadData());
     } catch (error) {
       console.error('Error creating conversion job:', error);
       // Show user-friendly error message
@@ -135,6 +186,15 @@ export default function MainTab() {
           onAddToLibrary={handleAddToLibrary}
           onDelete={handleDelete}
         />
+        {uploadsNext && (
+          <button
+            onClick={loadMoreUploads}
+            disabled={loadingMore}
+            className="mt-4 px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </section>
 
       {/* Library */}
@@ -143,6 +203,15 @@ export default function MainTab() {
           Template Library
         </h2>
         <LibraryList items={library} onItemDeleted={handleDeleteLibraryItem} />
+        {libraryNext && (
+          <button
+            onClick={loadMoreLibrary}
+            disabled={loadingMore}
+            className="mt-4 px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </section>
     </div>
   );
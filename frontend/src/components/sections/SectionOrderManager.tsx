@@ -23,10 +23,17 @@ interface SectionOrderManagerProps {
   onUpdate?: () => void;
 }
 
+function sortByOrder(items: LibraryItem[]): LibraryItem[] {
+  return [...items].sort((a, b) => (a.order || 999) - (b.order || 999));
+}
+
 export default function SectionOrderManager({ onUpdate }: SectionOrderManagerProps) {
   const [sections, setSections] = useState<LibraryItem[]>([]);
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
+  // Cursor for the next page of sections; null once everything is loaded
+  const [sectionsNext, setSectionsNext] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadSections();
@@ -35,11 +42,9 @@ export default function SectionOrderManager({ onUpdate }: SectionOrderManagerPro
   const loadSections = async () => {
     try {
       setLoading(true);
-      const libraryData = await api.listLibrary();
-      const nextjsSections = libraryData
-        .filter(item => item.target === 'NEXTJS')
-        .sort((a, b) => ((a as any).order || 999) - ((b as any).order || 999));
-      setSections(nextjsSections);
+      const libraryPage = await api.listLibrary(null, 'NEXTJS');
+      setSections(sortByOrder(libraryPage.results));
+      setSectionsNext(libraryPage.next);
     } catch (error) {
       console.error('Error loading sections:', error);
     } finally {
@@ -47,6 +52,21 @@ export default function SectionOrderManager({ onUpdate }: SectionOrderManagerPro
     }
   };
 
+  const loadMoreSections = async () => {
+    if (!sectionsNext) return;
+    try {
+      setLoadingMore(true);
+      const libraryPage = await api.listLibrary(sectionsNext);
+      // Keep any reordering already done; the new page goes after it
+      setSections(prev => [...prev, ...sortByOrder(libraryPage.results)]);
+      setSectionsNext(libraryPage.next);
+    } catch (error) {
+      console.error('Error loading more sections:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const moveSection = (fromIndex: number, toIndex: number) => {
     const newSections = [...sections];
     const [movedSection] = newSections.splice(fromIndex, 1);
@@ -197,6 +217,15 @@ export default function SectionOrderManager({ onUpdate }: SectionOrderManagerPro
             ))}
           </div>
         )}
+        {sectionsNext && (
+          <button
+            onClick={loadMoreSections}
+            disabled={loadingMore}
+            className="mt-4 px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
 
       {/* Preview Order Section */}
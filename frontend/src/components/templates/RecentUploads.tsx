@@ -1,7 +1,8 @@
 'use client';
 
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
 import { formatDistanceToNow } from 'date-fns';
+import * as api from '@/lib/api';
 import { 
   ArrowDownTrayIcon,
   EyeIcon,
@@ -27,7 +28,7 @@ interface ConversionJob {
   upload_title: string;
   target: 'DJANGO' | 'NEXTJS';
   status: 'QUEUED' | 'RUNNING' | 'SUCCESS' | 'ERROR';
-  log: string;
+  log?: string;
   zip_file: string | null;
   created_at: string;
   updated_at: string;
@@ -72,6 +73,23 @@ const ConversionCard = ({
 }) => {
   const [showAddForm, setShowAddForm] = useState(false);
   const [libraryName, setLibraryName] = useState('');
+  const [errorLog, setErrorLog] = useState<string | null>(null);
+
+  // Job lists don't include the log; fetch it for failed jobs
+  useEffect(() => {
+    if (job.status !== 'ERROR' || job.log) return;
+    let cancelled = false;
+    api.getJob(job.id)
+      .then((detail) => {
+        if (!cancelled) setErrorLog(detail.log ?? '');
+      })
+      .catch((error) => console.error('Error loading job log:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [job.id, job.status, job.log]);
+
+  const log = job.log || errorLog;
 
   const handleAddToLibrary = () => {
     if (libraryName.trim()) {
@@ -156,10 +174,10 @@ const ConversionCard = ({
         </div>
       )}
 
-      {job.status === 'ERROR' && job.log && (
+      {job.status === 'ERROR' && log && (
         <div className="mt-2 p-2 bg-red-50 rounded text-xs text-red-700">
           <p className="font-medium">Error:</p>
-          <p>{job.log}</p>
+          <p>{log}</p>
         </div>
       )}
     </div>
@@ -2,6 +2,7 @@
 
 import { useState, useEffect } from 'react';
 import { PlusIcon, EyeIcon, PencilIcon, TrashIcon } from '@heroicons/react/24/outline';
+import { fetchPage } from '@/lib/api';
 
 interface WebsiteTemplate {
   id: string;
@@ -51,6 +52,9 @@ export default function WebsiteTemplatesTab() {
   const [showUseTemplateModal, setShowUseTemplateModal] = useState(false);
   const [selectedTemplate, setSelectedTemplate] = useState<WebsiteTemplate | null>(null);
   const [loading, setLoading] = useState(true);
+  // Cursor for the next page of templates; null once everything is loaded
+  const [templatesNext, setTemplatesNext] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   // Helper function to convert relative media URLs to full URLs
   const getFullMediaUrl = (relativeUrl: string | null | undefined): string | null => {
@@ -65,23 +69,20 @@ export default function WebsiteTemplatesTab() {
     loadTemplates();
   }, []);
 
+  // Normalize sections data to ensure it's always an array
+  const normalizeTemplates = (data: any[]): WebsiteTemplate[] => data.map((template: any) => ({
+    ...template,
+    sections: Array.isArray(template.sections) 
+      ? template.sections 
+      : (template.sections?.sections || [])
+  }));
+
   const loadTemplates = async () => {
     try {
       setLoading(true);
-      const response = await fetch('http://127.0.0.1:8000/api/templates/website-templates/');
-      if (response.ok) {
-        const data = await response.json();
-        // Normalize sections data to ensure it's always an array
-        const normalizedTemplates = data.map((template: any) => ({
-          ...template,
-          sections: Array.isArray(template.sections) 
-            ? template.sections 
-            : (template.sections?.sections || [])
-        }));
-        setTemplates(normalizedTemplates);
-      } else {
-        console.error('Failed to load templates:', response.statusText);
-      }
+      const page = await fetchPage<any>('http://127.0.0.1:8000/api/templates/website-templates/');
+      setTemplates(normalizeTemplates(page.results));
+      setTemplatesNext(page.next);
     } catch (error) {
       console.error('Error loading templates:', error);
     } finally {
@@ -89,6 +90,20 @@ export default function WebsiteTemplatesTab() {
     }
   };
 
+  const loadMoreTemplates = async () => {
+    if (!templatesNext) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage<any>(templatesNext);
+      setTemplates(prev => [...prev, ...normalizeTemplates(page.results)]);
+      setTemplatesNext(page.next);
+    } catch (error) {
+      console.error('Error loading more templates:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const createTemplate = async (templateData: Omit<WebsiteTemplate, 'id' | 'created_at' | 'updated_at'>) => {
     try {
       console.log('Creating template with data:', templateData);
@@ -431,6 +446,17 @@ export default function WebsiteTemplatesTab() {
           ))}
         </div>
       )}
+      {templatesNext && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMoreTemplates}
+            disabled={loadingMore}
+            className="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-md hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more'}
+          </button>
+        </div>
+      )}
 
       {/* Create Template Modal */}
       {showCreateModal && (
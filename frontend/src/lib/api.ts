@@ -392,6 +392,26 @@ interface TemplateUpload {
   status: 'PENDING' | 'READY' | 'FAILED';
   created_at: string;
   notes: string;
+  // Filled in by the first conversion of the image
+  analysis?: {
+    version: number;
+    width: number;
+    height: number;
+    aspect_ratio: number;
+    layout: 'wide' | 'standard' | 'tall';
+    dominant_colors: string[];
+    palette: { colors: { color: string; weight: number }[]; transparent: number } | null;
+    theme: {
+      primary_color: string;
+      secondary_color: string;
+      accent_color: string;
+      background_color: string;
+    } | null;
+    bands: { name: string; top: number; bottom: number; columns: number }[];
+    sections: string[];
+    feature_columns: number | null;
+    detector: 'projection' | 'aspect-ratio';
+  } | null;
 }
 
 interface ConversionJob {
@@ -400,12 +420,25 @@ interface ConversionJob {
   upload_title: string;
   target: 'DJANGO' | 'NEXTJS';
   status: 'QUEUED' | 'RUNNING' | 'SUCCESS' | 'ERROR';
-  log: string;
+  // Only returned by the detail endpoint; `log_offset` can be passed back
+  // as `since` to fetch just the newer log text
+  log?: string;
+  log_offset?: number;
   zip_file: string | null;
   created_at: string;
   updated_at: string;
 }
 
+interface ConversionBatchProgress {
+  id: string;
+  created_at: string;
+  total: number;
+  counts: Record<ConversionJob['status'], number>;
+  progress: number;
+  done: boolean;
+  jobs?: ConversionJob[];
+}
+
 interface LibraryItem {
   id: string;
   name: string;
@@ -423,18 +456,38 @@ interface LibraryItem {
 interface LibraryCategory {
   category: string;
   category_display: string;
+  item_count: number;
   subcategories: LibrarySubcategory[];
 }
 
+// List endpoints return newest-first pages; follow `next` for older rows
+interface Paginated<T> {
+  next: string | null;
+  results: T[];
+}
+
+// Items are not included; load them with getLibrarySubcategory()
 interface LibrarySubcategory {
   subcategory: string;
   subcategory_display: string;
   item_count: number;
-  items: LibraryItem[];
 }
 
 export const apiClient = new ApiClient();
 
+// One page of a paginated list endpoint; pass its `next` back in for the following page
+export async function fetchPage<T>(url: string): Promise<Paginated<T>> {
+  const response = await fetch(url, {
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}`);
+  }
+
+  return response.json();
+}
+
 // Template Management API Functions using simple fetch
 
 // Upload template screenshot
@@ -463,25 +516,14 @@ export async function uploadTemplate(
   return response.json();
 }
 
-// List all uploads
-export async function listUploads(): Promise<TemplateUpload[]> {
+// List uploads, newest first; pass a page's `next` for the one after it
+export async function listUploads(next?: string | null): Promise<Paginated<TemplateUpload>> {
   const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
-  const url = `${baseUrl}/templates/uploads/`;
+  const url = next || `${baseUrl}/templates/uploads/`;
   console.log('Fetching from URL:', url);
   
   try {
-    const response = await fetch(url, {
-      credentials: 'include',
-    });
-
-    console.log('Response status:', response.status);
-    console.log('Response ok:', response.ok);
-
-    if (!response.ok) {
-      throw new Error(`HTTP ${response.status}`);
-    }
-
-    return response.json();
+    return await fetchPage<TemplateUpload>(url);
   } catch (error) {
     console.error('Fetch error:', error);
     throw error;
@@ -546,11 +588,38 @@ export async function createJob(
   return response.json();
 }
 
-// List all jobs
-export async function listJobs(): Promise<ConversionJob[]> {
+// List jobs, newest first; pass a page's `next` for the one after it
+export async function listJobs(next?: string | null): Promise<Paginated<ConversionJob>> {
+  const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
+  return fetchPage<ConversionJob>(next || `${baseUrl}/templates/jobs/`);
+}
+
+// Job pages from `next` (or the newest) on, until they reach back to `since`.
+// A job is always created after its upload, so this covers every job of the
+// uploads created at or after `since`; the returned `next` continues from there.
+export async function listJobsSince(since?: string, next?: string | null): Promise<Paginated<ConversionJob>> {
+  const cutoff = since ? Date.parse(since) : Infinity;
+  const results: ConversionJob[] = [];
+  let page = await listJobs(next);
+  results.push(...page.results);
+  while (page.next && page.results.length && Date.parse(page.results[page.results.length - 1].created_at) >= cutoff) {
+    page = await listJobs(page.next);
+    results.push(...page.results);
+  }
+  return { next: page.next, results };
+}
+
+// Queue one job per upload × target
+export async function createBatch(
+  uploads: string[],
+  targets: ConversionJob['target'][]
+): Promise<ConversionBatchProgress> {
   const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
-  const response = await fetch(`${baseUrl}/templates/jobs/`, {
+  const response = await fetch(`${baseUrl}/templates/jobs/batches/`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
     credentials: 'include',
+    body: JSON.stringify({ uploads, targets }),
   });
 
   if (!response.ok) {
@@ -560,10 +629,26 @@ export async function listJobs(): Promise<ConversionJob[]> {
   return response.json();
 }
 
-// Get single job
-export async function getJob(id: string): Promise<ConversionJob> {
+// Aggregate progress of a batch (with its jobs when `withJobs` is set)
+export async function getBatch(id: string, withJobs: boolean = false): Promise<ConversionBatchProgress> {
   const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
-  const response = await fetch(`${baseUrl}/templates/jobs/${id}/`, {
+  const query = withJobs ? '?jobs=1' : '';
+  const response = await fetch(`${baseUrl}/templates/jobs/batches/${id}/${query}`, {
+    credentials: 'include',
+  });
+
+  if (!response.ok) {
+    throw new Error(`HTTP ${response.status}`);
+  }
+
+  return response.json();
+}
+
+// Get single job (pass `since` to get only the log appended after that offset)
+export async function getJob(id: string, since: number = 0): Promise<ConversionJob> {
+  const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
+  const query = since > 0 ? `?since=${since}` : '';
+  const response = await fetch(`${baseUrl}/templates/jobs/${id}/${query}`, {
     credentials: 'include',
   });
 
@@ -574,19 +659,96 @@ export async function getJob(id: string): Promise<ConversionJob> {
   return response.json();
 }
 
-// Poll job status until completion
+// Follow job status until completion. Uses the server-sent event stream
+// (/templates/jobs/<id>/events/) and falls back to polling when the
+// browser has no EventSource or the stream can't be opened.
 export async function pollJobStatus(
   jobId: string,
   onUpdate?: (job: ConversionJob) => void,
   timeout: number = 120000 // 2 minutes
+): Promise<ConversionJob> {
+  if (typeof EventSource === 'undefined') {
+    return pollJobStatusByInterval(jobId, onUpdate, timeout);
+  }
+
+  const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${baseUrl}/templates/jobs/${jobId}/events/`, {
+      withCredentials: true,
+    });
+    let job: ConversionJob | null = null;
+    let log = '';
+
+    const finish = (callback: () => void) => {
+      clearTimeout(timer);
+      source.close();
+      callback();
+    };
+
+    const timer = setTimeout(() => {
+      finish(() => reject(new Error('Job polling timeout')));
+    }, timeout);
+
+    source.addEventListener('status', (event) => {
+      job = { ...JSON.parse((event as MessageEvent).data), log };
+      if (onUpdate && job) {
+        onUpdate(job);
+      }
+    });
+
+    source.addEventListener('log', (event) => {
+      const { text } = JSON.parse((event as MessageEvent).data);
+      log += text;
+      if (job) {
+        job = { ...job, log };
+        if (onUpdate) {
+          onUpdate(job);
+        }
+      }
+    });
+
+    source.addEventListener('end', (event) => {
+      const { reason } = JSON.parse((event as MessageEvent).data);
+      if (reason === 'finished' && job) {
+        const finalJob = job;
+        finish(() => resolve(finalJob));
+      } else if (reason === 'deleted') {
+        finish(() => reject(new Error('HTTP 404')));
+      } else {
+        // Server-side stream limit; carry on by polling
+        finish(() => pollJobStatusByInterval(jobId, onUpdate, timeout).then(resolve, reject));
+      }
+    });
+
+    source.onerror = () => {
+      // EventSource retries on its own after a dropped connection; only
+      // give up on the stream if it never delivered anything
+      if (job === null) {
+        finish(() => pollJobStatusByInterval(jobId, onUpdate, timeout).then(resolve, reject));
+      }
+    };
+  });
+}
+
+async function pollJobStatusByInterval(
+  jobId: string,
+  onUpdate?: (job: ConversionJob) => void,
+  timeout: number = 120000
 ): Promise<ConversionJob> {
   const startTime = Date.now();
   const pollInterval = 2000; // 2 seconds
 
   return new Promise((resolve, reject) => {
+    let log = '';
+    let logOffset = 0;
+
     const poll = async () => {
       try {
-        const job = await getJob(jobId);
+        const update = await getJob(jobId, logOffset);
+        log += update.log || '';
+        logOffset = update.log_offset ?? logOffset;
+        const job = { ...update, log };
         
         if (onUpdate) {
           onUpdate(job);
@@ -653,18 +815,12 @@ export async function addToLibrary(
   return response.json();
 }
 
-// List library items
-export async function listLibrary(): Promise<LibraryItem[]> {
+// List library items by category, subcategory and name, optionally for one
+// target; pass a page's `next` for the one after it
+export async function listLibrary(next?: string | null, target?: string): Promise<Paginated<LibraryItem>> {
   const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
-  const response = await fetch(`${baseUrl}/templates/library/`, {
-    credentials: 'include',
-  });
-
-  if (!response.ok) {
-    throw new Error(`HTTP ${response.status}`);
-  }
-
-  return response.json();
+  const query = target ? `?target=${encodeURIComponent(target)}` : '';
+  return fetchPage<LibraryItem>(next || `${baseUrl}/templates/library/${query}`);
 }
 
 // Get single library item
@@ -694,7 +850,7 @@ export async function deleteLibraryItem(id: string): Promise<void> {
   }
 }
 
-// Get all library categories with items
+// Get the library category tree with item counts
 export async function getLibraryCategories(): Promise<LibraryCategory[]> {
   const baseUrl = process.env.NEXT_PUBLIC_API_BASE || 'http://127.0.0.1:8000/api';
   const response = await fetch(`${baseUrl}/templates/library/categories/`, {
@@ -744,4 +900,4 @@ export async function getHomepageItems(): Promise<LibraryItem[]> {
   return getLibrarySubcategory('main-website', 'homepage');
 }
 
-export type { User, AuthTokens, TemplateUpload, ConversionJob, LibraryItem, LibraryCategory, LibrarySubcategory };
+export type { User, AuthTokens, TemplateUpload, ConversionJob, ConversionBatchProgress, LibraryItem, LibraryCategory, LibrarySubcategory, Paginated };
@@ -78,6 +78,21 @@ export interface Summary {
   period: string;
 }
 
+export interface ImportJob {
+  id: string;
+  filename: string;
+  status: 'QUEUED' | 'RUNNING' | 'SUCCESS' | 'ERROR';
+  rows_processed: number;
+  created_count: number;
+  skipped_count: number;
+  checkpoint_line: number;
+  errors: string[];
+  error: string;
+  created_at: string;
+  updated_at: string;
+  finished_at?: string;
+}
+
 export interface ExpenseFilters {
   from?: string;
   to?: string;
@@ -237,7 +252,17 @@ export const markExpensePaid = async (id: number, data: { paid_date?: string; re
 };
 
 // CSV Import
-export const importExpensesCSV = async (file: File): Promise<any> => {
+export const getImportJob = async (id: string): Promise<ImportJob> => {
+  const response = await financeApi.get(`/imports/${id}/`);
+  return response.data;
+};
+
+// The upload is only queued (202); poll the import job until it is done or failed
+export const importExpensesCSV = async (
+  file: File,
+  onUpdate?: (job: ImportJob) => void,
+  pollInterval: number = 2000
+): Promise<ImportJob> => {
   const formData = new FormData();
   formData.append('file', file);
   
@@ -246,6 +271,19 @@ export const importExpensesCSV = async (file: File): Promise<any> => {
       'Content-Type': 'multipart/form-data',
     },
   });
+  let job: ImportJob = response.data;
+  onUpdate?.(job);
+  while (job.status !== 'SUCCESS' && job.status !== 'ERROR') {
+    await new Promise((resolve) => setTimeout(resolve, pollInterval));
+    job = await getImportJob(job.id);
+    onUpdate?.(job);
+  }
+  return job;
+};
+
+// Every row the import rejected, as a CSV file
+export const downloadImportErrors = async (id: string): Promise<Blob> => {
+  const response = await financeApi.get(`/imports/${id}/errors/`, { responseType: 'blob' });
   return response.data;
 };
 
@@ -4,6 +4,12 @@ echo.
 echo Starting Django Backend...
 start "Django Backend" cmd /k "cd /d C:\projects\dashboard\backend && C:\projects\dashboard\.venv\Scripts\python.exe manage.py runserver 127.0.0.1:8000"
 
+echo Starting Conversion Worker...
+start "Conversion Worker" cmd /k "cd /d C:\projects\dashboard\backend && C:\projects\dashboard\.venv\Scripts\python.exe manage.py conversion_worker"
+
+echo Starting Finance Import Worker...
+start "Finance Import Worker" cmd /k "cd /d C:\projects\dashboard\backend && C:\projects\dashboard\.venv\Scripts\python.exe manage.py import_worker"
+
 echo Waiting 3 seconds...
 timeout /t 3 /nobreak > nul
 